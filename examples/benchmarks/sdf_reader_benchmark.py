@@ -0,0 +1,39 @@
+"""
+SDF Reader Engines
+==================
+This benchmarks the available engines (see :data:`tsunami_ip_utils.readers.SDF_ENGINES`) for reading TSUNAMI-B formatted SDF files
+with :class:`tsunami_ip_utils.readers.SdfReader`.
+"""
+
+# %%
+# The ``'pyparsing'`` engine builds a pyparsing grammar and searches the whole file with it, while the ``'fast'`` engine (the
+# default) tokenizes the fixed-layout profile headers with compiled regular expressions and converts all of the groupwise data
+# in a single NumPy call. Both engines produce identical ``sdf_data``, which we verify below before timing them.
+
+from tsunami_ip_utils.readers import SdfReader
+from paths import EXAMPLES, TESTS
+from timeit import timeit
+import numpy as np
+
+sdf_files = [ TESTS / 'example_files' / 'sphere_model_1.sdf' ] + sorted( ( EXAMPLES / 'data' / 'example_sdfs' / 'HMF' ).glob('*.sdf') )
+
+# %%
+# Check that both engines agree
+# -----------------------------
+
+for sdf_file in sdf_files:
+    fast = SdfReader(sdf_file, engine='fast')
+    reference = SdfReader(sdf_file, engine='pyparsing')
+    assert np.array_equal(fast.energy_boundaries, reference.energy_boundaries)
+    assert repr(fast.sdf_data) == repr(reference.sdf_data)
+
+# %%
+# Timings
+# -------
+
+num_repeats = 3
+print(f"{'File':<30} {'pyparsing (s)':>14} {'fast (s)':>10} {'speedup':>8}")
+for sdf_file in sdf_files:
+    pyparsing_time = timeit(lambda: SdfReader(sdf_file, engine='pyparsing'), number=num_repeats) / num_repeats
+    fast_time = timeit(lambda: SdfReader(sdf_file, engine='fast'), number=num_repeats) / num_repeats
+    print(f"{sdf_file.name:<30} {pyparsing_time:>14.3f} {fast_time:>10.3f} {pyparsing_time/fast_time:>7.1f}x")
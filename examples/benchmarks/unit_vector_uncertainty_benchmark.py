@@ -0,0 +1,60 @@
+"""
+Unit Vector Uncertainty Propagation
+===================================
+This benchmarks :func:`tsunami_ip_utils._error._unit_vector_uncertainty_propagation`, which propagates the uncertainties of a
+sensitivity vector to the uncertainties of the corresponding unit vector when calculating :math:`E` with
+``uncertainties='manual'``.
+"""
+
+# %%
+# The propagation needs the row sums of the squared derivative matrix :math:`\partial u_i/\partial v_j` weighted by the squared
+# uncertainties. Forming the derivative matrix explicitly (as in the reference implementation below) costs
+# :math:`\mathcal{O}(n^2)` time and memory, where :math:`n` is the number of nuclide-reaction-group pairs, which is often more
+# than 10,000 for a 252 group library. The closed form used by ``tsunami_ip_utils`` only needs a few sums over the vector, so
+# it is :math:`\mathcal{O}(n)`.
+
+from tsunami_ip_utils._error import _unit_vector_uncertainty_propagation
+from uncertainties import unumpy
+from timeit import timeit
+import numpy as np
+
+def dense_unit_vector_uncertainty_propagation(vector):
+    """Reference implementation which forms the full derivative matrix."""
+    values = unumpy.nominal_values(vector)
+    vector_norm = np.sqrt(np.sum(values**2))
+    derivative_matrix = -values[:, np.newaxis] * values[np.newaxis, :] / vector_norm**3
+    np.fill_diagonal(derivative_matrix, (vector_norm**2 - values**2) / vector_norm**3)
+    return np.sqrt(np.sum(derivative_matrix**2 * unumpy.std_devs(vector)**2, axis=1))
+
+rng = np.random.default_rng(42)
+
+def random_sensitivity_vector(n):
+    values = rng.normal(scale=1e-3, size=n)
+    values[rng.random(n) < 0.3] = 0 # Sensitivity vectors are typically quite sparse
+    return unumpy.uarray(values, np.abs(values) * rng.uniform(0.01, 0.1, size=n))
+
+# %%
+# Check that both implementations agree
+# -------------------------------------
+
+for n in [ 10, 252, 2520 ]:
+    vector = random_sensitivity_vector(n)
+    assert np.allclose(_unit_vector_uncertainty_propagation(vector), dense_unit_vector_uncertainty_propagation(vector),
+                       rtol=1e-10, atol=0)
+
+# %%
+# Timings
+# -------
+# The dense implementation is only timed up to moderate vector lengths, since it needs several :math:`n\times n` temporary
+# arrays (about 2.4 GB for :math:`n=10,000`).
+
+num_repeats = 3
+print(f"{'n':>8} {'dense (s)':>10} {'closed form (s)':>16} {'speedup':>8}")
+for n in [ 252, 2520, 5040, 10080, 50400, 252000 ]:
+    vector = random_sensitivity_vector(n)
+    closed_form_time = timeit(lambda: _unit_vector_uncertainty_propagation(vector), number=num_repeats) / num_repeats
+    if n <= 5040:
+        dense_time = timeit(lambda: dense_unit_vector_uncertainty_propagation(vector), number=num_repeats) / num_repeats
+        print(f"{n:>8} {dense_time:>10.4f} {closed_form_time:>16.4f} {dense_time/closed_form_time:>7.1f}x")
+    else:
+        print(f"{n:>8} {'-':>10} {closed_form_time:>16.4f} {'-':>8}")
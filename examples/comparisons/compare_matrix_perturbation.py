@@ -142,5 +142,5 @@ comparisons = correlation_comparison(
 print(comparisons)
 
 # %%
-# Note also that, since generating points for perturbation plots can be time consuming, this function by default runs in parallel
-# with two less than the number of cores available on your machine. This can be changed by passing the ``num_cores`` argument.
\ No newline at end of file
+# Note also that, with ``make_plot=False``, the projections of each distinct system are only computed once (and cached), so no
+# parallelism is needed. The ``num_cores`` argument is deprecated and has no effect.
\ No newline at end of file
@@ -33,6 +33,16 @@ for key, value in integral_indices.items():
 # indices and the values are the matrices of the integral indices. The integral indices are stored as numpy arrays, and have shapes
 # ``(num_applications, num_experiments)``.
 
+# %%
+# Reading Large Output Files
+# --------------------------
+# For large numbers of applications and experiments, creating a :func:`uncertainties.ufloat` for every integral index can take
+# longer than reading the file itself. With ``as_arrays=True``, each integral index is instead returned as a tuple of plain float
+# arrays of the nominal values and standard deviations:
+
+c_k, c_k_std_devs = read_integral_indices(out_file, as_arrays=True)['c_k']
+print(c_k.shape, c_k_std_devs.shape)
+
 # %%
 # Getting Integral Indices From a Set of Application and Experiment SDFs
 # -----------------------------------------------------------------------
@@ -58,10 +68,11 @@ for key, value in integral_indices.items():
 # -------------------------
 # In each SDF file, the first line contains an annotated name for the SDF file, that is used to identify the SDF in the TSUNAMI-IP
 # output tables. If these names contain spaces (as some of those provided in the MCT directory do), they can cause the
-# :func:`tsnami_ip_utils.readers.read_integral_indices` function to fail. For example, the following code will raise an error:
+# ``'pyparsing'`` engine of :func:`tsnami_ip_utils.readers.read_integral_indices` to fail. For example, the following code will 
+# raise an error:
 
 try:
-    integral_indices = read_integral_indices(EXAMPLES / 'data' / 'tsunami_ip_mct.out')
+    integral_indices = read_integral_indices(EXAMPLES / 'data' / 'tsunami_ip_mct.out', engine='pyparsing')
     print(integral_indices)
 except Exception as e:
     print(e)
@@ -76,7 +87,14 @@ for sdf_path in sdf_paths:
         print(f.readline())
 
 # %%
-# So if you have SDFs with names that contain spaces, you should either use the 
+# The default (``'fast'``) engine locates the integral values by their column positions, so it is not affected by spaces in the
+# names:
+
+integral_indices = read_integral_indices(EXAMPLES / 'data' / 'tsunami_ip_mct.out')
+print(integral_indices['c_k'])
+
+# %%
+# So if you have SDFs with names that contain spaces and need to use the ``'pyparsing'`` engine, you should either use the 
 # :func:`tsunami_ip_utils.integral_indices.get_integral_indices`, which will handle these names by replacing whitespace with ``'-'``,
 # or you can manually replace the whitespaces in the SDF annotated names using the :func:`tsunami_ip_utils.utils.modify_sdf_names`
 # function. Below is an example showing the correct output using the :func:`tsunami_ip_utils.integral_indices.get_integral_indices`
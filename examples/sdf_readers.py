@@ -58,6 +58,19 @@ print(data.sdf_data)
 data.convert_to_dict()
 print(data.sdf_data)
 
+# %%
+# Columnar Sensitivity Data
+# ^^^^^^^^^^^^^^^^^^^^^^^^^
+# Internally, :class:`tsunami_ip_utils.readers.RegionIntegratedSdfReader` stores the profiles in a columnar
+# :class:`tsunami_ip_utils.readers.SensitivityTable`, which holds the groupwise sensitivities and their uncertainties as 2D float
+# arrays along with a structured index describing each profile. The dictionaries above are only created from the table when
+# ``sdf_data`` is first accessed, so when only the numbers are needed, it is much cheaper to work with the table directly
+
+table = data.table
+print(table)
+print(table.index[['isotope', 'reaction_type']])
+print(table.select(reaction_type='fission').values.shape)
+
 # %%
 # Reading .h5 formatted .sdf files
 # ---------------------------------
@@ -71,4 +84,65 @@ print(data.sdf_data)
 from tsunami_ip_utils.readers import read_region_integrated_h5_sdf
 
 data = read_region_integrated_h5_sdf(f'{EXAMPLES}/data/example_sdfs/HMF/HEU-MET-FAST-003-001.sdf.h5')
-print(data)
\ No newline at end of file
+print(data)
+
+# %%
+# For array computations, :func:`tsunami_ip_utils.readers.read_h5_sensitivity_table` reads a ``.h5`` file directly into a
+# :class:`tsunami_ip_utils.readers.SensitivityTable` (optionally only a subset of the nuclide-reactions), and
+# :func:`tsunami_ip_utils.readers.read_h5_sdfs` reads a whole directory of ``.h5`` files into a single
+# :class:`tsunami_ip_utils.readers.SensitivityStack`, whose arrays have one slice per file.
+
+from tsunami_ip_utils.readers import read_h5_sensitivity_table, read_h5_sdfs
+from tempfile import TemporaryDirectory
+
+table = read_h5_sensitivity_table(f'{EXAMPLES}/data/example_sdfs/HMF/HEU-MET-FAST-003-001.sdf.h5', {'92235': ['18']})
+print(table.index)
+stack = read_h5_sdfs(f'{EXAMPLES}/data/example_sdfs/HMF')
+print(stack, stack.values.shape)
+
+# %%
+# The columns of the stacked (flattened) sensitivity vectors are defined by a
+# :class:`tsunami_ip_utils.readers.FeatureRegistry`, which maps each nuclide-reaction-group to a stable column. Saving the
+# registry and passing it when stacking other files later (e.g. new experiments) keeps the same feature space across sessions,
+# with any new nuclide-reactions appended after the existing ones.
+
+from tsunami_ip_utils.readers import FeatureRegistry
+
+with TemporaryDirectory() as registry_directory:
+    stack.registry.save(f'{registry_directory}/registry.npz')
+    registry = FeatureRegistry.load(f'{registry_directory}/registry.npz')
+fission_stack = read_h5_sdfs(f'{EXAMPLES}/data/example_sdfs/HMF', {'92235': ['18']}, registry=registry)
+print(fission_stack.values.shape == stack.values.shape, registry.columns(table)[:, :3])
+
+# %%
+# If SCALE is not available, ``.sdf`` files can also be converted to the same ``.h5`` layout with
+# :func:`tsunami_ip_utils.readers.write_h5_sdf`, or a whole directory of them (in parallel) with
+# :func:`tsunami_ip_utils.readers.convert_sdfs_to_h5`. Converting once and then reading the (compressed, binary) ``.h5``
+# files avoids parsing the text files in every analysis.
+
+from tsunami_ip_utils.readers import convert_sdfs_to_h5
+
+with TemporaryDirectory() as h5_directory:
+    h5_filenames = convert_sdfs_to_h5(f'{EXAMPLES}/data/example_sdfs/HMF', h5_directory)
+    stack = read_h5_sdfs(h5_directory)
+print(stack)
+
+# %%
+# Reading Many SDF Files at Once
+# ------------------------------
+# When reading a large collection of SDF files (e.g. a set of benchmark experiments), the function
+# :func:`tsunami_ip_utils.readers.read_sdfs` reads ``.sdf`` and ``.sdf.h5`` files concurrently in a pool of worker processes
+# (or threads) and returns the results in the same order as the input. If a file cannot be read, the exception is returned in its
+# place rather than aborting the whole batch.
+
+from tsunami_ip_utils.readers import read_sdfs
+
+sdf_files = sorted( ( EXAMPLES / 'data' / 'example_sdfs' / 'HMF' ).glob('*.sdf') )
+readers = read_sdfs(sdf_files, workers=4)
+print(readers[:3])
+
+# %%
+# Passing ``stream=True`` returns a generator instead, so that each result can be processed as soon as it is available
+
+for reader in read_sdfs(sdf_files, workers=4, stream=True):
+    print(len(reader.table))
@@ -1,5 +1,36 @@
 from uncertainties import unumpy
 import numpy as np
+import scipy.sparse as sp
+from typing import Union
+
+# ------------------------------------------------------------------------------------------------
+# Elementwise helpers that work on both dense arrays and sparse (scipy.sparse) matrices, preserving
+# the sparsity of the latter, so that the batched propagation functions below accept either
+# ------------------------------------------------------------------------------------------------
+def _multiply(a: Union[np.ndarray, sp.sparray], b: Union[np.ndarray, sp.sparray]) -> Union[np.ndarray, sp.sparray]:
+    """Elementwise product of ``a`` and ``b`` (sparse if ``a`` is sparse)."""
+    return sp.csr_array(a.multiply(b)) if sp.issparse(a) else a * b
+
+def _scale_rows(matrix: Union[np.ndarray, sp.sparray], factors: np.ndarray) -> Union[np.ndarray, sp.sparray]:
+    """Multiplies each row of ``matrix`` by the corresponding entry of ``factors``."""
+    return sp.diags_array(factors) @ matrix if sp.issparse(matrix) else matrix * factors[:, np.newaxis]
+
+def _row_sums(matrix: Union[np.ndarray, sp.sparray]) -> np.ndarray:
+    """Sums of the rows of ``matrix`` as a 1D array."""
+    return np.asarray(matrix.sum(axis=1)).ravel()
+
+def _dense(matrix: Union[np.ndarray, sp.sparray]) -> np.ndarray:
+    """Converts ``matrix`` to a dense array (if it is sparse)."""
+    return matrix.toarray() if sp.issparse(matrix) else np.asarray(matrix)
+
+def _as_float(matrix: Union[np.ndarray, sp.sparray]) -> Union[np.ndarray, sp.sparray]:
+    return sp.csr_array(matrix, dtype=float) if sp.issparse(matrix) else np.asarray(matrix, dtype=float)
+
+def _unit_vectors(values: Union[np.ndarray, sp.sparray]) -> Union[np.ndarray, sp.sparray]:
+    """Normalizes each row of ``values`` (a row with zero norm becomes ``nan``, or stays empty if it is sparse)."""
+    with np.errstate(divide='ignore'):
+        return _scale_rows(_as_float(values), 1 / np.sqrt(_row_sums(_multiply(values, values))))
+
 
 def _unit_vector_uncertainty_propagation(vector: unumpy.uarray) -> np.ndarray:
     """Performs error propagation for the components of a vector :math:`\\boldsymbol{v}` that is normalized to a unit vector 
@@ -28,6 +59,15 @@ def _unit_vector_uncertainty_propagation(vector: unumpy.uarray) -> np.ndarray:
     .. math::
         \\frac{\\partial u_i}{\\partial v_j} = -\\frac{v_iv_j}{\\lVert\\boldsymbol{v}\\rVert^3}
 
+    so that
+
+    .. math::
+        \\sigma_{u_i}^2 = \\frac{\\sigma_{v_i}^2}{\\lVert\\boldsymbol{v}\\rVert^2} 
+        - \\frac{2v_i^2\\sigma_{v_i}^2}{\\lVert\\boldsymbol{v}\\rVert^4} 
+        + \\frac{v_i^2\\sum_j v_j^2\\sigma_{v_j}^2}{\\lVert\\boldsymbol{v}\\rVert^6}
+
+    which only requires :math:`\\mathcal{O}(n)` operations and memory (the derivative matrix is never formed).
+
     Examples
     --------
     >>> _unit_vector_uncertainty_propagation(unumpy.uarray([1, 2, 3], [0.1, 0.2, 0.3]))
@@ -48,28 +88,68 @@ def _unit_vector_uncertainty_propagation(vector: unumpy.uarray) -> np.ndarray:
     Returns
     -------
         Uncertainties of the unit vector components."""
+    return _unit_vector_std_devs(unumpy.nominal_values(vector), unumpy.std_devs(vector))
 
-    # Calculate norm of the vector
-    vector_norm = np.sqrt(np.sum(unumpy.nominal_values(vector)**2))
+def _unit_vector_std_devs(values: np.ndarray, sigmas: np.ndarray) -> np.ndarray:
+    """Array form of :func:`_unit_vector_uncertainty_propagation` which takes the nominal values and uncertainties of the
+    vector separately. If ``values`` is two dimensional (dense or a ``scipy.sparse`` matrix), each row is treated as a separate 
+    vector.
 
-    # Extract the uncertainties of the vector components
-    vector_uncertainties = unumpy.std_devs(vector)
+    Examples
+    --------
+    >>> _unit_vector_std_devs(np.array([[1, 2, 3], [0, 0, 0]]), np.array([[0.1, 0.2, 0.3], [0.1, 0.2, 0.3]]))
+    array([[0.03113499, 0.05150788, 0.03711537],
+           [0.        , 0.        , 0.        ]])
+    >>> _unit_vector_std_devs(sp.csr_array([[1, 0, 3]]), sp.csr_array([[0.1, 0, 0.3]])).toarray()
+    array([[0.04024922, 0.        , 0.01341641]])
 
-    # Compute the derivative matrix for uncertainty propagation
-    if vector_norm != 0:
-        derivative_matrix = -unumpy.nominal_values(vector)[:, np.newaxis] * unumpy.nominal_values(vector)[np.newaxis, :] / vector_norm**3
-        np.fill_diagonal(derivative_matrix, (vector_norm**2 - unumpy.nominal_values(vector)**2) / vector_norm**3)
-    else:
-        derivative_matrix = np.zeros((len(vector), len(vector)))
+    Parameters
+    ----------
+    values
+        Nominal values of the vector(s) :math:`\\boldsymbol{v}`.
+    sigmas
+        Uncertainties of the vector components.
+
+    Returns
+    -------
+        Uncertainties of the unit vector components (same shape and storage as ``values``)."""
+    if sp.issparse(values):
+        # The same as below, but only the stored components are computed (the others have no uncertainty)
+        squared_values, squared_sigmas = _multiply(_as_float(values), values), _multiply(_as_float(sigmas), sigmas)
+        squared_norms = _row_sums(squared_values)
+        weighted_sums = _row_sums(_multiply(squared_values, squared_sigmas))
+        with np.errstate(divide='ignore'):
+            inverse_squared_norms = np.where(squared_norms == 0, 0.0, 1 / squared_norms)
+        variances = _scale_rows(squared_sigmas, inverse_squared_norms) \
+                    - _scale_rows(_multiply(squared_values, squared_sigmas), 2 * inverse_squared_norms**2) \
+                    + _scale_rows(squared_values, weighted_sums * inverse_squared_norms**3)
+        variances.data = np.sqrt(np.clip(variances.data, 0, None))
+        return variances
 
-    # Calculate the uncertainties of the unit vector components
-    unit_vector_uncertainties = np.sqrt(np.sum((derivative_matrix**2 * vector_uncertainties**2), axis=1))
+    values = np.asarray(values, dtype=float)
+    sigmas = np.asarray(sigmas, dtype=float)
 
-    # Return the unit vector with uncertainties
-    return unit_vector_uncertainties
+    squared_values = values**2
+    squared_sigmas = sigmas**2
+    squared_norms = np.sum(squared_values, axis=-1, keepdims=True)
+    weighted_sum = np.sum(squared_values * squared_sigmas, axis=-1, keepdims=True)
+
+    # Row sums of the squared derivative matrix times the squared uncertainties (see the docstring above)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        variances = squared_sigmas / squared_norms - 2 * squared_values * squared_sigmas / squared_norms**2 \
+                    + squared_values * weighted_sum / squared_norms**3
+    variances = np.where(squared_norms == 0, 0.0, variances)
+
+    # The variances are sums of squares, so any negative values are round-off from the cancellation above
+    return np.sqrt(np.clip(variances, 0, None))
 
 def _dot_product_uncertainty_propagation(vect1: unumpy.uarray, vect2: unumpy.uarray) -> float:
     """Calculates the uncertainty in the dot product of two vectors with uncertainties
+
+    Examples
+    --------
+    >>> _dot_product_uncertainty_propagation(unumpy.uarray([1, 2, 0], [0.1, 0.2, 0.3]), unumpy.uarray([3, 4, 5], [0.3, 0.4, 0.5]))
+    1.2083045973594573
     
     Parameters
     ----------
@@ -81,15 +161,186 @@ def _dot_product_uncertainty_propagation(vect1: unumpy.uarray, vect2: unumpy.uar
     Returns
     -------
         Uncertainty in the dot product of the two vectors."""
+    return _dot_product_std_dev(unumpy.nominal_values(vect1), unumpy.std_devs(vect1), unumpy.nominal_values(vect2), 
+                                unumpy.std_devs(vect2))
+
+def _dot_product_std_dev(values1: np.ndarray, sigmas1: np.ndarray, values2: np.ndarray, sigmas2: np.ndarray) -> float:
+    """Array form of :func:`_dot_product_uncertainty_propagation` which takes the nominal values and uncertainties of the
+    vectors separately. Each product :math:`a_ib_i` contributes :math:`b_i^2\\sigma_{a_i}^2 + a_i^2\\sigma_{b_i}^2` to the
+    variance of the dot product, and components where either :math:`a_i` or :math:`b_i` is zero do not contribute.
+
+    Examples
+    --------
+    >>> _dot_product_std_dev(np.array([1, 2, 0]), np.array([0.1, 0.2, 0.3]), np.array([3, 4, 5]), np.array([0.3, 0.4, 0.5]))
+    1.2083045973594573
+
+    Parameters
+    ----------
+    values1
+        Nominal values of the first vector.
+    sigmas1
+        Uncertainties of the first vector.
+    values2
+        Nominal values of the second vector.
+    sigmas2
+        Uncertainties of the second vector.
+
+    Returns
+    -------
+        Uncertainty in the dot product of the two vectors."""
+    values1, sigmas1 = np.asarray(values1, dtype=float), np.asarray(sigmas1, dtype=float)
+    values2, sigmas2 = np.asarray(values2, dtype=float), np.asarray(sigmas2, dtype=float)
+    mask = ( values1 != 0 ) & ( values2 != 0 )
+    variance = np.sum(np.where(mask, values2**2 * sigmas1**2 + values1**2 * sigmas2**2, 0.0))
+    return float(np.sqrt(variance))
+
+def _pairwise_dot_product_std_devs(values1: np.ndarray, sigmas1: np.ndarray, values2: np.ndarray, 
+                                   sigmas2: np.ndarray) -> np.ndarray:
+    """Batched form of :func:`_dot_product_std_dev` which calculates the uncertainty of the dot product of every row of
+    ``values1`` with every row of ``values2`` (e.g. a whole matrix of :math:`E` values from stacked unit vectors) using two
+    matrix products (the vectors may be dense arrays or ``scipy.sparse`` matrices). The zero masking is implicit, since :math:`b_i^2\\sigma_{a_i}^2` vanishes when :math:`b_i=0` and
+    :math:`\\sigma_{a_i}` is masked where :math:`a_i=0` (and vice versa).
+
+    Examples
+    --------
+    >>> _pairwise_dot_product_std_devs(np.array([[1, 2, 0], [0, 1, 1]]), np.array([[0.1, 0.2, 0.3], [0.1, 0.1, 0.1]]),
+    ...                                np.array([[3, 4, 5]]), np.array([[0.3, 0.4, 0.5]]))
+    array([[1.2083046 ],
+           [0.90553851]])
+
+    Parameters
+    ----------
+    values1
+        Nominal values of the first set of vectors, shape ``(m, n)``.
+    sigmas1
+        Uncertainties of the first set of vectors.
+    values2
+        Nominal values of the second set of vectors, shape ``(k, n)``.
+    sigmas2
+        Uncertainties of the second set of vectors.
+
+    Returns
+    -------
+        Uncertainties of the dot products, shape ``(m, k)``."""
+    values1, sigmas1 = _as_float(values1), _as_float(sigmas1)
+    values2, sigmas2 = _as_float(values2), _as_float(sigmas2)
+    variances = _multiply(_multiply(sigmas1, sigmas1), values1 != 0) @ _multiply(values2, values2).T \
+                + _multiply(values1, values1) @ _multiply(_multiply(sigmas2, sigmas2), values2 != 0).T
+    return np.sqrt(_dense(variances))
+
+def _normalized_dot_product_std_dev(values1: np.ndarray, sigmas1: np.ndarray, values2: np.ndarray, sigmas2: np.ndarray, 
+                                    correlated: bool=False) -> float:
+    """Calculates the exact first order (linear) uncertainty of the dot product of two normalized vectors
+    :math:`E = \\frac{\\boldsymbol{a}\\cdot\\boldsymbol{b}}{\\lVert\\boldsymbol{a}\\rVert\\lVert\\boldsymbol{b}\\rVert}` from 
+    the analytic gradients
+
+    .. math::
+        \\frac{\\partial E}{\\partial a_j} = \\frac{\\hat{b}_j - E\\hat{a}_j}{\\lVert\\boldsymbol{a}\\rVert},\\quad
+        \\frac{\\partial E}{\\partial b_j} = \\frac{\\hat{a}_j - E\\hat{b}_j}{\\lVert\\boldsymbol{b}\\rVert}
+
+    Unlike :func:`_unit_vector_uncertainty_propagation` followed by :func:`_dot_product_uncertainty_propagation`, this 
+    accounts for the correlation between the components of each unit vector introduced by the normalization (so it is what
+    the uncertainties package gives for the same expression). If ``correlated`` is ``True``, then :math:`\\boldsymbol{a}` and
+    :math:`\\boldsymbol{b}` are treated as the same random vector (e.g. an application and experiment read from the same 
+    file), and the gradients are summed before propagating the (shared) uncertainties ``sigmas1``.
+
+    Examples
+    --------
+    >>> _normalized_dot_product_std_dev(np.array([1, 2, 3]), np.array([0.1, 0.2, 0.3]), np.array([3, 2, 1]), 
+    ...                                 np.array([0.3, 0.2, 0.1]))
+    0.043195939772483115
+
+    >>> _normalized_dot_product_std_dev(np.array([1, 2, 3]), np.array([0.1, 0.2, 0.3]), np.array([1, 2, 3]), 
+    ...                                 np.array([0.1, 0.2, 0.3]), correlated=True)
+    0.0
+
+    Parameters
+    ----------
+    values1
+        Nominal values of the first vector.
+    sigmas1
+        Uncertainties of the first vector.
+    values2
+        Nominal values of the second vector.
+    sigmas2
+        Uncertainties of the second vector.
+    correlated
+        Whether the two vectors are the same random vector. Default is ``False``.
+
+    Returns
+    -------
+        Uncertainty in the normalized dot product."""
+    values1, sigmas1 = np.asarray(values1, dtype=float), np.asarray(sigmas1, dtype=float)
+    values2, sigmas2 = np.asarray(values2, dtype=float), np.asarray(sigmas2, dtype=float)
+    norm1, norm2 = np.linalg.norm(values1), np.linalg.norm(values2)
+    units1, units2 = values1 / norm1, values2 / norm2
+    E = units1 @ units2
+
+    gradient1 = ( units2 - E * units1 ) / norm1
+    gradient2 = ( units1 - E * units2 ) / norm2
+    if correlated:
+        variance = np.sum(sigmas1**2 * ( gradient1 + gradient2 )**2)
+    else:
+        variance = np.sum(sigmas1**2 * gradient1**2) + np.sum(sigmas2**2 * gradient2**2)
+    return float(np.sqrt(variance))
+
+def _pairwise_normalized_dot_product_std_devs(values1: np.ndarray, sigmas1: np.ndarray, values2: np.ndarray, 
+                                              sigmas2: np.ndarray, correlated: np.ndarray=None) -> np.ndarray:
+    """Batched form of :func:`_normalized_dot_product_std_dev` which calculates the uncertainty of the normalized dot product 
+    of every row of ``values1`` with every row of ``values2``. Expanding the squared gradients, e.g.
+
+    .. math::
+        \\sum_j \\sigma_{a_j}^2\\left(\\frac{\\partial E}{\\partial a_j}\\right)^2 = \\sum_j r_j \\hat{b}_j^2 
+        - 2E\\sum_j r_j\\hat{a}_j\\hat{b}_j + E^2\\sum_j r_j\\hat{a}_j^2,\\quad r_j = \\frac{\\sigma_{a_j}^2}{\\lVert\\boldsymbol{a}
+        \\rVert^2}
+
+    reduces the calculation for all pairs to a handful of matrix products (the vectors may be dense arrays or ``scipy.sparse``
+    matrices).
+
+    Examples
+    --------
+    >>> _pairwise_normalized_dot_product_std_devs(np.array([[1, 2, 3], [1, 2, 3]]), np.array([[0.1, 0.2, 0.3], [0.1, 0.2, 0.3]]),
+    ...                                           np.array([[3, 2, 1]]), np.array([[0.3, 0.2, 0.1]])).round(8)
+    array([[0.04319594],
+           [0.04319594]])
+
+    Parameters
+    ----------
+    values1
+        Nominal values of the first set of vectors, shape ``(m, n)``.
+    sigmas1
+        Uncertainties of the first set of vectors.
+    values2
+        Nominal values of the second set of vectors, shape ``(k, n)``.
+    sigmas2
+        Uncertainties of the second set of vectors.
+    correlated
+        Optional boolean array of shape ``(m, k)`` marking the pairs that are the same random vector (see 
+        :func:`_normalized_dot_product_std_dev`). These pairs are calculated directly.
+
+    Returns
+    -------
+        Uncertainties of the normalized dot products, shape ``(m, k)``."""
+    values1, sigmas1 = _as_float(values1), _as_float(sigmas1)
+    values2, sigmas2 = _as_float(values2), _as_float(sigmas2)
+    units1, units2 = _unit_vectors(values1), _unit_vectors(values2)
+    with np.errstate(divide='ignore'):
+        relative_variances1 = _scale_rows(_multiply(sigmas1, sigmas1), 1 / _row_sums(_multiply(values1, values1)))
+        relative_variances2 = _scale_rows(_multiply(sigmas2, sigmas2), 1 / _row_sums(_multiply(values2, values2)))
+    E = _dense(units1 @ units2.T)
+
+    variances = _dense(relative_variances1 @ _multiply(units2, units2).T) \
+                - 2 * E * _dense(_multiply(relative_variances1, units1) @ units2.T) \
+                + E**2 * _row_sums(_multiply(relative_variances1, _multiply(units1, units1)))[:, np.newaxis] \
+                + _dense(_multiply(units1, units1) @ relative_variances2.T) \
+                - 2 * E * _dense(units1 @ _multiply(relative_variances2, units2).T) \
+                + E**2 * _row_sums(_multiply(relative_variances2, _multiply(units2, units2)))[np.newaxis, :]
+
+    # The variances are sums of squares, so any negative values are round-off from the cancellation above
+    std_devs = np.sqrt(np.clip(variances, 0, None))
 
-    dot_product_uncertainty = 0
-    for i in range(len(vect1)):
-        if vect1[i].n == 0 or vect2[i].n == 0:
-            product_uncertainty = 0
-        else:
-            product_uncertainty = vect1[i].n * vect2[i].n * np.sqrt((vect1[i].s/vect1[i].n)**2 + \
-                                                                    (vect2[i].s/vect2[i].n)**2)
-        dot_product_uncertainty += product_uncertainty**2
-    dot_product_uncertainty = np.sqrt(dot_product_uncertainty)
-
-    return dot_product_uncertainty
+    if correlated is not None:
+        for i, j in zip(*np.nonzero(correlated)):
+            std_devs[i, j] = _normalized_dot_product_std_dev(_dense(values1[[i]])[0], _dense(sigmas1[[i]])[0], 
+                                                             _dense(values2[[j]])[0], _dense(sigmas2[[j]])[0], correlated=True)
+    return std_devs
@@ -0,0 +1,159 @@
+"""An on-disk cache for parsed SDF files. Each cached file is stored in its own directory as a set of ``.npy`` files (which can be
+memory mapped on later reads) along with a small ``index.json`` file containing the data used to check that the cache entry is
+still valid, i.e. the path, size, modification time and content hash of the SDF file. The modification time of ``index.json`` is
+used to track when the entry was last used for least recently used eviction."""
+
+import numpy as np
+from pathlib import Path
+from typing import Dict, Optional, Union
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from tsunami_ip_utils import config
+
+ARRAY_NAMES = ['energy_boundaries', 'values', 'sigmas', 'index', 'integrated_values']
+"""Names of the arrays stored for each cached SDF file."""
+
+def _sdf_cache_dir(cache_dir: Optional[Union[str, Path]]=None) -> Path:
+    """Returns the directory containing the SDF cache under ``cache_dir`` (by default read from the config at call time so that 
+    it can be changed)."""
+    return Path(config.cache_dir if cache_dir is None else cache_dir) / 'sdf_cache'
+
+def _content_hash(filename: Union[str, Path]) -> str:
+    """Computes the SHA-256 hash of the contents of a file."""
+    sha256 = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+def _entry_dir(filename: Union[str, Path], cache_dir: Optional[Union[str, Path]]=None) -> Path:
+    """Returns the cache directory for a given SDF file, which is keyed by the hash of its absolute path."""
+    path = str(Path(filename).resolve())
+    return _sdf_cache_dir(cache_dir) / hashlib.sha1(path.encode()).hexdigest()
+
+def _load(filename: Union[str, Path], cache_dir: Optional[Union[str, Path]]=None) -> Optional[Dict[str, np.ndarray]]:
+    """Loads the cached arrays for an SDF file as read-only memory maps.
+    
+    Parameters
+    ----------
+    filename
+        Path to the sdf file.
+    cache_dir
+        The cache directory (containing the ``sdf_cache`` directory). Default is ``None``, which uses ``config.cache_dir``.
+    
+    Returns
+    -------
+        Dictionary of the cached arrays keyed by ``ARRAY_NAMES``, or ``None`` if the file is not cached or if the cache entry
+        is out of date (in which case it is removed)."""
+    entry = _entry_dir(filename, cache_dir)
+    try:
+        with open(entry / 'index.json', 'r') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    stat = os.stat(filename)
+    if stat.st_size != index['size']:
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+    
+    if stat.st_mtime_ns != index['mtime_ns']:
+        # The file may have been touched without being modified, so only invalidate the entry if the contents changed
+        if _content_hash(filename) != index['content_hash']:
+            shutil.rmtree(entry, ignore_errors=True)
+            return None
+        index['mtime_ns'] = stat.st_mtime_ns
+        with open(entry / 'index.json', 'w') as f:
+            json.dump(index, f)
+
+    try:
+        arrays = { name: np.load(entry / f'{name}.npy', mmap_mode='r') for name in ARRAY_NAMES }
+    except (OSError, ValueError):
+        shutil.rmtree(entry, ignore_errors=True)
+        return None
+
+    # Mark the entry as recently used
+    os.utime(entry / 'index.json')
+    return arrays
+
+def _store(filename: Union[str, Path], arrays: Dict[str, np.ndarray], cache_dir: Optional[Union[str, Path]]=None, 
+           max_size: Optional[int]=None) -> None:
+    """Stores the arrays for a parsed SDF file in the cache, then evicts least recently used entries if the cache is larger than
+    ``max_size``.
+    
+    Parameters
+    ----------
+    filename
+        Path to the sdf file.
+    arrays
+        Dictionary of arrays keyed by ``ARRAY_NAMES``.
+    cache_dir
+        The cache directory (containing the ``sdf_cache`` directory). Default is ``None``, which uses ``config.cache_dir``.
+    max_size
+        Maximum size of the cache in bytes. Default is ``None``, which uses ``config.sdf_cache_max_size``."""
+    sdf_cache_dir = _sdf_cache_dir(cache_dir)
+    sdf_cache_dir.mkdir(parents=True, exist_ok=True)
+    entry = _entry_dir(filename, cache_dir)
+
+    stat = os.stat(filename)
+    index = {
+        'path': str(Path(filename).resolve()),
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'content_hash': _content_hash(filename),
+    }
+
+    # Write the entry to a temporary directory first so that a partially written entry is never read
+    temporary_entry = Path(tempfile.mkdtemp(dir=sdf_cache_dir, prefix='.tmp_'))
+    for name in ARRAY_NAMES:
+        np.save(temporary_entry / f'{name}.npy', np.ascontiguousarray(arrays[name]))
+    with open(temporary_entry / 'index.json', 'w') as f:
+        json.dump(index, f)
+
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(temporary_entry, entry)
+    except OSError: # Another process cached the same file concurrently
+        shutil.rmtree(temporary_entry, ignore_errors=True)
+
+    _evict(config.sdf_cache_max_size if max_size is None else max_size, keep=entry, cache_dir=cache_dir)
+
+def _entry_size(entry: Path) -> int:
+    """Returns the total size (in bytes) of the files in a cache entry."""
+    return sum( f.stat().st_size for f in entry.iterdir() )
+
+def _evict(max_size: int, keep: Optional[Path]=None, cache_dir: Optional[Union[str, Path]]=None) -> None:
+    """Removes the least recently used cache entries until the total size of the cache is at most ``max_size``.
+    
+    Parameters
+    ----------
+    max_size
+        Maximum size of the cache in bytes.
+    keep
+        A cache entry that should not be evicted (e.g. the one that was just written).
+    cache_dir
+        The cache directory (containing the ``sdf_cache`` directory). Default is ``None``, which uses ``config.cache_dir``."""
+    entries = []
+    for entry in _sdf_cache_dir(cache_dir).iterdir():
+        if not entry.is_dir() or entry.name.startswith('.tmp_'):
+            continue
+        try:
+            entries.append( ( (entry / 'index.json').stat().st_mtime, _entry_size(entry), entry ) )
+        except OSError: # Entry was removed concurrently or is incomplete
+            continue
+
+    total_size = sum( size for _, size, _ in entries )
+    for _, size, entry in sorted(entries, key=lambda entry: entry[0]):
+        if total_size <= max_size:
+            break
+        if entry == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total_size -= size
+
+def _clear() -> None:
+    """Removes all entries from the SDF cache."""
+    shutil.rmtree(_sdf_cache_dir(), ignore_errors=True)
@@ -2,19 +2,19 @@
 values using correlation methods with either cross section sampling or uncertainty contributions."""
 
 from tsunami_ip_utils.readers import read_integral_indices
-from tsunami_ip_utils.integral_indices import calculate_E
+from tsunami_ip_utils.integral_indices import calculate_E_variants
 import numpy as np
 from uncertainties import unumpy
 import pandas as pd
 from pandas import DataFrame as df
 from pathlib import Path
-from tsunami_ip_utils.perturbations import generate_points
+from tsunami_ip_utils.perturbations import generate_points, calculate_perturbation_c_k
 from typing import List, Dict, Tuple, Any, Optional, Union
 from tsunami_ip_utils.viz.scatter_plot import EnhancedPlotlyFigure, InteractiveScatterLegend
 from tsunami_ip_utils.viz.plot_utils import generate_plot_objects_array_from_perturbations, generate_plot_objects_array_from_contributions
 from tsunami_ip_utils.integral_indices import get_uncertainty_contributions, calculate_E_contributions
 from tsunami_ip_utils.viz import matrix_plot
-import multiprocessing
+import warnings
 from tsunami_ip_utils.utils import _run_and_read_TSUNAMI_IP, _convert_paths
 
 def E_calculation_comparison(application_filenames: Union[List[str], List[Path]], 
@@ -22,8 +22,8 @@ def E_calculation_comparison(application_filenames: Union[List[str], List[Path]]
                              tsunami_ip_output_filename: Optional[Union[str, Path]]=None) -> Dict[str, df]:
     """Function that compares the calculated similarity parameter E with the TSUNAMI-IP output for each application with each
     experiment. The comparison is done for the nominal values and the uncertainties of the E values. In addition, the
-    difference between manually calculated uncertainties and automatically calculated uncertainties (i.e. via the uncertainties
-    package) is also calculated. The results are returned as a pandas DataFrame.
+    difference between manually calculated uncertainties and the default (jacobian) uncertainties (see 
+    :data:`tsunami_ip_utils.integral_indices.E_UNCERTAINTIES`) is also calculated. The results are returned as a pandas DataFrame.
     
     Parameters
     ----------
@@ -49,24 +49,13 @@ def E_calculation_comparison(application_filenames: Union[List[str], List[Path]]
     -----
     Each of the results dataframes in the dictionary can easily be written to excel using the pandas ``to_excel`` method."""
     
-    # First perform the manual calculations for each type of E index
+    # First perform the manual calculations for each type of E index (the sdfs are read once for all of the types)
     E_types = ['total', 'fission', 'capture', 'scatter']
     E = {}
-    for E_type in E_types + ['total_manual', 'fission_manual', 'capture_manual', 'scatter_manual']:
-        if 'manual' in E_type: # Manual uncertainty propagation
-            if E_type.replace('_manual', '') == 'total':
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type='all', uncertainties='manual')
-            elif E_type.replace('_manual', '') == 'scatter':
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type='elastic', uncertainties='manual')
-            else:
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type=E_type.replace('_manual', ''), uncertainties='manual')
-        else: # Automatic uncertainty propagation
-            if E_type == 'total':
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type='all')
-            elif E_type == 'scatter':
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type='elastic')
-            else:
-                E[E_type] = calculate_E(application_filenames, experiment_filenames, reaction_type=E_type)
+    for suffix, uncertainties in [ ('', 'jacobian'), ('_manual', 'manual') ]:
+        E_variants = calculate_E_variants(application_filenames, experiment_filenames, uncertainties=uncertainties)
+        for E_type in E_types:
+            E[E_type + suffix] = E_variants[f"E_{E_type}"]
 
     print("Done with calculations")
 
@@ -175,23 +164,6 @@ def _update_annotation(fig: EnhancedPlotlyFigure, integral_index: float, index_n
             summary_stats_annotation.update(bordercolor='red')
         return fig,  calculated_value, percent_difference
 
-def _process_pair(args):
-    application_file, experiment_file, base_library, perturbation_factors, num_perturbations, integral_value = args
-    points_array = generate_points(
-        application_file, 
-        experiment_file, 
-        base_library=base_library, 
-        perturbation_factors=perturbation_factors, 
-        num_perturbations=num_perturbations
-    )
-    x_points = unumpy.nominal_values([ pair[0] for pair in points_array ])
-    y_points = unumpy.nominal_values([ pair[1] for pair in points_array ])
-
-    # Calculate the Pearson correlation coefficient
-    calculated_value = np.corrcoef(x_points, y_points)[0, 1]
-    percent_difference = (integral_value - calculated_value) / integral_value * 100
-    return calculated_value, percent_difference
-
 @_convert_paths
 def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_name: str, 
                            application_files: Union[List[str], List[Path]], 
@@ -199,7 +171,7 @@ def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_
                            base_library: Optional[Union[str, Path]]=None, 
                            perturbation_factors: Optional[Union[str, Path]]=None, 
                            num_perturbations: Optional[int]=None, make_plot: bool=True, 
-                           num_cores: int=multiprocessing.cpu_count() - 2,
+                           num_cores: Optional[int]=None,
                            plot_objects_kwargs: dict={},
                            matrix_plot_kwargs: dict={}) -> Tuple[pd.DataFrame, Any]:
     """Function that compares the calculated similarity parameter :math:`c_k` (calculated using the cross section sampling method) 
@@ -209,8 +181,9 @@ def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_
     Notes
     -----
     * If the chosen method is 'perturbation', the matrix plot can become extremely memory intensive, so it is recommended
-      to set ``make_plot=False`` (if only the matrix of comparisons is desired) and/or to use ``num_cores=1`` or a small
-      number of perturbations to avoid memory issues.
+      to set ``make_plot=False`` if only the matrix of comparisons is desired (then only the projections of each system
+      are stored, see :func:`tsunami_ip_utils.perturbations.calculate_perturbation_c_k`) or to use a small number of 
+      perturbations to avoid memory issues.
     
     Parameters
     ----------
@@ -238,8 +211,8 @@ def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_
     make_plot
         Whether to generate the matrix plot. Default is ``True``.
     num_cores
-        If ``make_plot`` is ``False``, the number of cores to use for multiprocessing. Default is two less than the number
-        of available cores.
+        Deprecated and ignored (a ``DeprecationWarning`` is emitted if it is given), since the perturbation :math:`c_k` values 
+        are computed from the (cached) projections of each system with matrix products instead of a process pool.
     plot_objects_kwargs
         Optional keyword arguments to pass when generating the plot objects.
     matrix_plot_kwargs
@@ -264,6 +237,11 @@ def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_
     if num_applications != len(application_files) or num_experiments != len(experiment_files):
         raise ValueError("The dimensions of the integral index matrix do not match the number of applications and experiments.")
 
+    if num_cores is not None:
+        warnings.warn("The num_cores argument of correlation_comparison is deprecated and has no effect, the perturbation "
+                      "c_k values are computed from the projections of each system without multiprocessing.", 
+                      DeprecationWarning, stacklevel=3)
+
     # Check for missing input parameters or inconsistent method
     missing_perturbation_parameters = any([base_library is None, perturbation_factors is None,
                                              num_perturbations is None])
@@ -295,20 +273,11 @@ def correlation_comparison(integral_index_matrix: unumpy.uarray, integral_index_
                                                num_perturbations)
                 plot_objects_array = generate_plot_objects_array_from_perturbations(points_array, **plot_objects_kwargs)
             else:
-                num_applications = len(application_files)
-                num_experiments = len(experiment_files)
-                
-                # Prepare arguments for multiprocessing
-                tasks = [(application_files[i], experiment_files[j], base_library, perturbation_factors, num_perturbations, integral_index_matrix[i, j])
-                        for i in range(num_applications) for j in range(num_experiments)]
-                
-                # Use multiprocessing to process data
-                with multiprocessing.Pool(processes=num_cores) as pool:
-                    results = pool.map(_process_pair, tasks)
-                
-                # Reshape the results into matrices
-                calculated_values = np.array([result[0] for result in results]).reshape(num_applications, num_experiments)
-                percent_differences = np.array([result[1] for result in results]).reshape(num_applications, num_experiments)
+                # The projections of each distinct system are only computed once, and c_k for every pair is then computed from
+                # them in a single step
+                calculated_values = calculate_perturbation_c_k(application_files, experiment_files, base_library, 
+                                                               perturbation_factors, num_perturbations)
+                percent_differences = (integral_index_matrix - calculated_values) / integral_index_matrix * 100
                 
 
         case 'uncertainty_contributions_nuclide':
@@ -32,4 +32,18 @@ not intended for use by users, but is necessary for generating documentation pro
 
 cache_dir = Path("~/.tsunami_ip_utils_cache").expanduser()
 """Directory to store cached cross section libraries and perturbations. This is also where the package will look for already cached
-data, so be sure it corresponds with where your cached data actually is, if you have manually changed this."""
\ No newline at end of file
+data, so be sure it corresponds with where your cached data actually is, if you have manually changed this."""
+
+sdf_cache = False
+"""Whether to cache parsed region integrated SDF files on disk (under ``cache_dir / 'sdf_cache'``). When enabled, the first read
+of an SDF file stores its sensitivity data as NumPy arrays, and later reads of the (unchanged) file simply memory map them."""
+
+sdf_cache_max_size = 2 * 1024**3
+"""Maximum size (in bytes) of the SDF cache. When exceeded, the least recently used cached SDF files are evicted."""
+
+prefetch_depth = 2
+"""Number of blocks of perturbed cross section samples that are read ahead (in background threads) while the current block is
+used, when generating perturbation points. Set to ``0`` to disable prefetching."""
+
+prefetch_max_size = 1024**3
+"""Maximum total size (in bytes) of the blocks of perturbed cross section samples that are read ahead."""
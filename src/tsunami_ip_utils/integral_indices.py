@@ -1,14 +1,18 @@
 from uncertainties import ufloat, umath, unumpy
 import numpy as np
-from tsunami_ip_utils.readers import RegionIntegratedSdfReader, read_uncertainty_contributions_out, read_uncertainty_contributions_sdf
-from tsunami_ip_utils._error import _unit_vector_uncertainty_propagation, _dot_product_uncertainty_propagation
+from tsunami_ip_utils.readers import RegionIntegratedSdfReader, SensitivityStack, read_uncertainty_contributions_out, \
+    read_uncertainty_contributions_sdf
+from tsunami_ip_utils._error import _unit_vector_uncertainty_propagation, _unit_vector_std_devs, _dot_product_std_dev, \
+    _pairwise_dot_product_std_devs, _normalized_dot_product_std_dev, _pairwise_normalized_dot_product_std_devs, _unit_vectors, \
+    _dense, _multiply, _row_sums
 from copy import deepcopy
 from typing import List, Set, Tuple, Dict, Union, Optional
 from pathlib import Path
 from uncertainties.core import Variable
-from tsunami_ip_utils.utils import _convert_paths
+from tsunami_ip_utils.utils import _convert_paths, _unique_systems
 import os
 from tempfile import NamedTemporaryFile
+from concurrent.futures import ProcessPoolExecutor
 import tempfile
 from string import Template
 import subprocess
@@ -35,7 +39,9 @@ def _calculate_E_from_sensitivity_vecs(application_vector: unumpy.uarray, experi
         Filename of the experiment sdf file (only needed for automatic uncertianty propagation).
     uncertainties
         Type of error propagation to use. Default is 'automatic' which uses the uncertainties package.
-        If set to 'manual', then manual error propagation is used which is generally faster
+        If set to 'manual', then manual error propagation is used which is generally faster. If set to 'jacobian', then the
+        exact first order uncertainty is calculated from the analytic gradients of E (see 
+        :func:`tsunami_ip_utils._error._normalized_dot_product_std_dev`), which can't be used with custom norms.
     experiment_norm
         Norm of the experiment vector. If not provided, it is calculated. This is mainly used for
         calculating E contributions, where the denominator is not actually the norm of the application and experiment
@@ -50,7 +56,21 @@ def _calculate_E_from_sensitivity_vecs(application_vector: unumpy.uarray, experi
         Similarity parameter between the application and the experiment"""
     
     norms_not_provided = ( experiment_norm == None ) and ( application_norm == None )
-    if uncertainties == 'automatic': # Automatic error propagation with uncertainties package
+    if uncertainties == 'jacobian': # Linear error propagation with the analytic gradients of E
+        if not norms_not_provided:
+            raise ValueError("Jacobian error propagation can only be used with the norms of the application and experiment "
+                             "vectors")
+
+        application_values, experiment_values = unumpy.nominal_values(application_vector), \
+                                                unumpy.nominal_values(experiment_vector)
+        E = application_values @ experiment_values / ( np.linalg.norm(application_values) * np.linalg.norm(experiment_values) )
+        E_uncertainty = _normalized_dot_product_std_dev(application_values, unumpy.std_devs(application_vector), 
+                                                        experiment_values, unumpy.std_devs(experiment_vector), 
+                                                        correlated=( application_filename == experiment_filename ) and \
+                                                                   application_filename is not None)
+        return ufloat(E, E_uncertainty)
+    
+    elif uncertainties == 'automatic': # Automatic error propagation with uncertainties package
         if application_filename == None or experiment_filename == None:
             raise ValueError("Application and experiment filenames must be provided for automatic error propagation")
         
@@ -105,13 +125,9 @@ def _calculate_E_from_sensitivity_vecs(application_vector: unumpy.uarray, experi
         application_unit_vector_error = _unit_vector_uncertainty_propagation(application_vector)
         experiment_unit_vector_error = _unit_vector_uncertainty_propagation(experiment_vector)
 
-        # Construct application and experiment unit vectors as unumpy.uarray objects
-        application_unit_vector = unumpy.uarray(unumpy.nominal_values(application_unit_vector), \
-                                                    application_unit_vector_error)
-        experiment_unit_vector = unumpy.uarray(unumpy.nominal_values(experiment_unit_vector), experiment_unit_vector_error)
-
         # Now calculate error in dot product to get the uncertainty in E
-        E_uncertainty = _dot_product_uncertainty_propagation(application_unit_vector, experiment_unit_vector)
+        E_uncertainty = _dot_product_std_dev(unumpy.nominal_values(application_unit_vector), application_unit_vector_error,
+                                             unumpy.nominal_values(experiment_unit_vector), experiment_unit_vector_error)
 
         return ufloat(E, E_uncertainty)
 
@@ -141,8 +157,143 @@ def _create_sensitivity_vector(sdfs: List[unumpy.uarray]) -> unumpy.uarray:
     return unumpy.uarray(senstivities, uncertainties)
 
 
+E_ENGINES = ['matrix', 'pairwise']
+"""Available engines for :func:`calculate_E`. ``'matrix'`` aligns all systems to a shared nuclide-reaction-group feature space
+and computes every :math:`E` value with a single matrix product, while ``'pairwise'`` uses the original loop over each 
+application-experiment pair."""
+
+E_UNCERTAINTIES = ['jacobian', 'manual', 'automatic']
+"""Available uncertainty propagation methods for :func:`calculate_E`. ``'jacobian'`` propagates the sensitivity uncertainties 
+through the analytic gradients of :math:`E` (the exact first order uncertainty), ``'manual'`` propagates them to the 
+unit vectors and then treats the unit vector components as independent, and ``'automatic'`` uses the uncertainties package 
+(only with the ``'pairwise'`` engine)."""
+
+def _read_stack(filenames: Union[List[str], List[Path]], reaction_type: str='all', sparse: bool=False,
+                drop_threshold: Optional[float]=None) -> SensitivityStack:
+    """Reads the region integrated sensitivity profiles of the given sdf files (each distinct system is only read once) into a 
+    :class:`tsunami_ip_utils.readers.SensitivityStack`. The parameters are the same as for :func:`_read_sensitivity_stack`."""
+    unique_filenames, inverse, _ = _unique_systems(filenames)
+    tables = []
+    for filename in unique_filenames:
+        table = RegionIntegratedSdfReader(filename).table.select(reaction_type)
+        tables.append(table.drop_insignificant(drop_threshold) if drop_threshold is not None else table)
+    return SensitivityStack([ tables[system] for system in inverse ], filenames, sparse=sparse)
+
+def _read_sensitivity_stack(filenames: Union[List[str], List[Path]], reaction_type: str='all', sparse: bool=False,
+                            drop_threshold: Optional[float]=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads the region integrated sensitivity profiles of the given sdf files (each distinct system is only read once), and 
+    aligns them to a shared nuclide-reaction-group feature space.
+    
+    Parameters
+    ----------
+    filenames
+        Paths to the sdf files.
+    reaction_type
+        The type of reaction to consider. Default is ``'all'`` which considers all reactions.
+    sparse
+        Whether to return the sensitivity vectors as sparse (CSR) matrices. Default is ``False``.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`).
+    
+    Returns
+    -------
+    values
+        Sensitivity vector of each system, shape ``(len(filenames), num_features)``. Nuclide-reactions that are missing from a
+        system are filled with (or, if ``sparse``, implicit) zeros.
+    sigmas
+        Uncertainties of the sensitivity vectors (same shape as ``values``)."""
+    return _read_stack(filenames, reaction_type, sparse, drop_threshold).flatten()
+
+def _calculate_E_matrix(application_values: np.ndarray, application_sigmas: np.ndarray, experiment_values: np.ndarray,
+                        experiment_sigmas: np.ndarray, uncertainties: str='jacobian', correlated: np.ndarray=None
+                        ) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculates :math:`E` (with uncertainties) for every application with every experiment from stacked sensitivity vectors 
+    (one row per system, all in the same feature space) using matrix products. The sensitivity vectors may be dense arrays or 
+    ``scipy.sparse`` matrices.
+    
+    Parameters
+    ----------
+    application_values
+        Application sensitivity vectors, shape ``(num_applications, num_features)``.
+    application_sigmas
+        Uncertainties of the application sensitivity vectors.
+    experiment_values
+        Experiment sensitivity vectors, shape ``(num_experiments, num_features)``.
+    experiment_sigmas
+        Uncertainties of the experiment sensitivity vectors.
+    uncertainties
+        The uncertainty propagation method, either ``'jacobian'`` (default) or ``'manual'`` (see ``E_UNCERTAINTIES``).
+    correlated
+        Optional boolean array of shape ``(num_experiments, num_applications)`` marking the experiment-application pairs that 
+        are the same system (only used by ``'jacobian'``).
+    
+    Returns
+    -------
+    E
+        Similarity parameter for each experiment with each application, shape ``(num_experiments, num_applications)``.
+    E_std_devs
+        Uncertainties of ``E`` (same shape)."""
+    # When the applications and experiments are the same systems, they are only normalized once
+    shared = experiment_values is application_values
+    application_units = _unit_vectors(application_values)
+    experiment_units = application_units if shared else _unit_vectors(experiment_values)
+    E = _dense(experiment_units @ application_units.T)
+
+    if uncertainties == 'jacobian':
+        E_std_devs = _pairwise_normalized_dot_product_std_devs(experiment_values, experiment_sigmas, application_values, 
+                                                               application_sigmas, correlated)
+        return E, E_std_devs
+
+    application_unit_sigmas = _unit_vector_std_devs(application_values, application_sigmas)
+    experiment_unit_sigmas = application_unit_sigmas if shared else _unit_vector_std_devs(experiment_values, experiment_sigmas)
+    E_std_devs = _pairwise_dot_product_std_devs(experiment_units, experiment_unit_sigmas, application_units, 
+                                                application_unit_sigmas)
+    return E, E_std_devs
+
+def _calculate_system_E_matrix(values: np.ndarray, sigmas: np.ndarray, application_systems: np.ndarray, 
+                               experiment_systems: np.ndarray, uncertainties: str='jacobian'
+                               ) -> Tuple[np.ndarray, np.ndarray]:
+    """Calculates :math:`E` (with uncertainties) for every application with every experiment, where the applications and 
+    experiments are given as rows of the sensitivity vectors of the distinct systems (e.g. from :func:`_unique_systems`). Each 
+    distinct pair of systems is only calculated once, and the applications and experiments are the same random vectors when 
+    they are the same system.
+    
+    Parameters
+    ----------
+    values
+        Sensitivity vectors of the distinct systems, shape ``(num_systems, num_features)`` (dense or ``scipy.sparse``).
+    sigmas
+        Uncertainties of the sensitivity vectors.
+    application_systems
+        Row of ``values`` of each application.
+    experiment_systems
+        Row of ``values`` of each experiment.
+    uncertainties
+        The uncertainty propagation method, either ``'jacobian'`` (default) or ``'manual'``.
+    
+    Returns
+    -------
+    E
+        Similarity parameter for each experiment with each application, shape ``(num_experiments, num_applications)``.
+    E_std_devs
+        Uncertainties of ``E`` (same shape)."""
+    unique_applications, application_inverse = np.unique(application_systems, return_inverse=True)
+    unique_experiments, experiment_inverse = np.unique(experiment_systems, return_inverse=True)
+    application_values, application_sigmas = values[unique_applications], sigmas[unique_applications]
+    if np.array_equal(unique_applications, unique_experiments): # E is only normalized and calculated once for a square set
+        experiment_values, experiment_sigmas = application_values, application_sigmas
+    else:
+        experiment_values, experiment_sigmas = values[unique_experiments], sigmas[unique_experiments]
+
+    E, E_std_devs = _calculate_E_matrix(application_values, application_sigmas, experiment_values, experiment_sigmas, 
+                                        uncertainties, np.equal.outer(unique_experiments, unique_applications))
+    rows, columns = np.ix_(experiment_inverse.ravel(), application_inverse.ravel())
+    return E[rows, columns], E_std_devs[rows, columns]
+
 def calculate_E(application_filenames: Union[List[str], List[Path]], experiment_filenames: Union[List[str], List[Path]], 
-                reaction_type: str='all', uncertainties: str='manual') -> np.ndarray:
+                reaction_type: str='all', uncertainties: str='jacobian', engine: str='matrix', sparse: bool=False, 
+                drop_threshold: Optional[float]=None) -> np.ndarray:
     """Calculates the similarity parameter, E for each application with each available experiment given the application 
     and experiment sdf files
     
@@ -154,27 +305,78 @@ def calculate_E(application_filenames: Union[List[str], List[Path]], experiment_
         Paths to the experiment sdf files.
     reaction_type 
         The type of reaction to consider in the calculation of E. Default is ``'all``' which considers all 
-        reactions.
+        reactions. Only used by the ``'matrix'`` engine.
     uncertainties 
-        The type of uncertainty propagation to use. Default is ``'automatic'`` which uses the uncertainties
-        package for error propagation. If set to ``'manual'``, then manual error propagation is used.
+        The type of uncertainty propagation to use, one of ``E_UNCERTAINTIES``. Default is ``'jacobian'`` which calculates the
+        exact first order uncertainty from the analytic gradients of E (treating an application and experiment from the same 
+        file as the same system). If set to ``'manual'``, the uncertainties of the unit vectors are propagated to their dot 
+        product as if their components were independent, and if set to ``'automatic'``, then the uncertainties package is 
+        used for error propagation (with the ``'pairwise'`` engine).
+    engine
+        The engine used to compute E, one of ``E_ENGINES`` (default is ``'matrix'``).
+    sparse
+        Whether to store the sensitivity vectors as sparse matrices (only used by the ``'matrix'`` engine). This reduces the 
+        memory use and the cost of the matrix products when most of the groupwise sensitivities are zero, e.g. for many 
+        systems with different materials. Default is ``False``.
+    drop_threshold
+        If given, groupwise sensitivities that are not statistically significant, i.e. with :math:`|S| < k\\sigma` for this
+        :math:`k`, are dropped before calculating E (only used by the ``'matrix'`` engine). Default is ``None``, which keeps
+        all of the sensitivities.
     
     Returns
     -------
-        Similarity parameter for each application with each experiment, shape: ``(len(application_filenames), len(experiment_filenames))``"""
-
-    # Read the application and experiment sdf files
-
-    application_sdfs = [ RegionIntegratedSdfReader(filename).convert_to_dict() for filename in application_filenames ]
-    experiment_sdfs  = [ RegionIntegratedSdfReader(filename).convert_to_dict() for filename in experiment_filenames ]
+        Similarity parameter for each application with each experiment, shape: ``(len(experiment_filenames), len(application_filenames))``
+        
+    Examples
+    --------
+    >>> filenames = [ f'examples/data/example_sdfs/u235-dummy/sphere_model_{i}.sdf' for i in [1, 2] ]
+    >>> E = calculate_E(filenames, filenames)
+    >>> unumpy.nominal_values(E).round(6)
+    array([[1.      , 0.999822],
+           [0.999822, 1.      ]])
+    >>> unumpy.std_devs(E).round(8)
+    array([[0.000e+00, 3.894e-05],
+           [3.894e-05, 0.000e+00]])
+    >>> unumpy.std_devs(calculate_E(filenames, filenames, uncertainties='manual')).round(6)
+    array([[0.002431, 0.002396],
+           [0.002396, 0.002359]])
+    >>> np.allclose(unumpy.nominal_values(calculate_E(filenames, filenames, sparse=True)), unumpy.nominal_values(E))
+    True
+    """
+    if engine not in E_ENGINES:
+        raise ValueError(f"Invalid engine '{engine}'. The engine must be one of {E_ENGINES}.")
+    if uncertainties not in E_UNCERTAINTIES:
+        raise ValueError(f"Invalid uncertainties '{uncertainties}'. The uncertainties must be one of {E_UNCERTAINTIES}.")
+    
+    if engine == 'matrix' and uncertainties != 'automatic':
+        # Align all of the distinct systems at once, so that the applications and experiments share the same feature space
+        unique_filenames, systems, _ = _unique_systems(list(application_filenames) + list(experiment_filenames))
+        values, sigmas = _read_sensitivity_stack(unique_filenames, reaction_type, sparse, drop_threshold)
+        num_applications = len(application_filenames)
+        E, E_std_devs = _calculate_system_E_matrix(values, sigmas, systems[:num_applications], systems[num_applications:], 
+                                                   uncertainties)
+        return unumpy.umatrix(E, E_std_devs)
+
+    # Read the sdf files of each distinct system (files with the same contents are the same system)
+    unique_filenames, systems, _ = _unique_systems(list(application_filenames) + list(experiment_filenames))
+    sdfs = [ RegionIntegratedSdfReader(filename).convert_to_dict() for filename in unique_filenames ]
+    application_systems, experiment_systems = systems[:len(application_filenames)], systems[len(application_filenames):]
 
     # Create a matrix to store the similarity parameter E for each application with each experiment
-    E_vals = unumpy.umatrix(np.zeros( ( len(experiment_sdfs), len(application_sdfs) ) ), \
-                            np.zeros( ( len(experiment_sdfs), len(application_sdfs) ) ))
+    E_vals = unumpy.umatrix(np.zeros( ( len(experiment_systems), len(application_systems) ) ), \
+                            np.zeros( ( len(experiment_systems), len(application_systems) ) ))
     
-    # Now calculate the similarity parameter E for each application with each experiment
-    for i, experiment in enumerate(experiment_sdfs):
-        for j, application in enumerate(application_sdfs):
+    # Now calculate the similarity parameter E for each application with each experiment. Since E is symmetric, each unordered
+    # pair of systems is only calculated once
+    unique_E = {}
+    for i, experiment_system in enumerate(experiment_systems):
+        for j, application_system in enumerate(application_systems):
+            pair = ( min(experiment_system, application_system), max(experiment_system, application_system) )
+            if pair in unique_E:
+                E_vals[i, j] = unique_E[pair]
+                continue
+
+            experiment, application = sdfs[experiment_system], sdfs[application_system]
             # Now add missing data to the application and experiment dictionaries
             all_isotopes = set(application.sdf_data.keys()).union(set(experiment.sdf_data.keys()))
             _add_missing_reactions_and_nuclides(application.sdf_data, experiment.sdf_data, all_isotopes)
@@ -193,11 +395,310 @@ def calculate_E(application_filenames: Union[List[str], List[Path]], experiment_
             application_vector = _create_sensitivity_vector(application_profiles)
             experiment_vector  = _create_sensitivity_vector(experiment_profiles)
 
-            E_vals[i, j] = _calculate_E_from_sensitivity_vecs(application_vector, experiment_vector, \
-                                                             application_filenames[j], experiment_filenames[i], uncertainties)
+            unique_E[pair] = _calculate_E_from_sensitivity_vecs(application_vector, experiment_vector, \
+                                                               unique_filenames[application_system], \
+                                                               unique_filenames[experiment_system], uncertainties)
+            E_vals[i, j] = unique_E[pair]
 
     return E_vals
 
+E_VARIANTS = {
+    'E_total': 'all',
+    'E_fission': 'fission',
+    'E_capture': 'capture',
+    'E_scatter': 'elastic',
+}
+"""The variants of :math:`E` reported by TSUNAMI-IP (keyed as in :func:`tsunami_ip_utils.readers.read_integral_indices`) and 
+the reaction type of the profiles that each one is calculated from. As in TSUNAMI-IP, :math:`E_{\\text{scatter}}` is 
+calculated from the elastic scattering sensitivities."""
+
+def calculate_E_variants(application_filenames: Union[List[str], List[Path]], 
+                         experiment_filenames: Union[List[str], List[Path]], uncertainties: str='jacobian', 
+                         sparse: bool=False, drop_threshold: Optional[float]=None) -> Dict[str, unumpy.umatrix]:
+    """Calculates all of the variants of the similarity parameter :math:`E` in ``E_VARIANTS`` for each application with each 
+    experiment. The sdf files are only read and aligned once, and each variant is calculated from the columns of the shared
+    sensitivity vectors selected by a mask of its reaction type, so this is equivalent to (but much faster than) calling 
+    :func:`calculate_E` with the ``'matrix'`` engine for each reaction type.
+    
+    Parameters
+    ----------
+    application_filenames
+        Paths to the application sdf files.
+    experiment_filenames
+        Paths to the experiment sdf files.
+    uncertainties
+        The type of uncertainty propagation to use, either ``'jacobian'`` (default) or ``'manual'`` (see :func:`calculate_E`).
+    sparse
+        Whether to store the sensitivity vectors as sparse matrices (see :func:`calculate_E`). Default is ``False``.
+    drop_threshold
+        If given, insignificant groupwise sensitivities are dropped (see :func:`calculate_E`). Default is ``None``.
+    
+    Returns
+    -------
+        Dictionary of each variant of :math:`E` keyed by ``'E_total'``, ``'E_fission'``, ``'E_capture'`` and ``'E_scatter'``
+        (as for TSUNAMI-IP output read with :func:`tsunami_ip_utils.readers.read_integral_indices`). Each is a matrix of shape
+        ``(len(experiment_filenames), len(application_filenames))``, as returned by :func:`calculate_E`.
+        
+    Examples
+    --------
+    >>> filenames = [ f'examples/data/example_sdfs/u235-dummy/sphere_model_{i}.sdf' for i in [1, 2] ]
+    >>> E = calculate_E_variants(filenames, filenames)
+    >>> list(E.keys())
+    ['E_total', 'E_fission', 'E_capture', 'E_scatter']
+    >>> E_capture = calculate_E(filenames, filenames, 'capture')
+    >>> np.allclose(unumpy.nominal_values(E['E_capture']), unumpy.nominal_values(E_capture))
+    True
+    >>> np.allclose(unumpy.std_devs(E['E_capture']), unumpy.std_devs(E_capture))
+    True
+    """
+    if uncertainties not in ['jacobian', 'manual']:
+        raise ValueError(f"Invalid uncertainties '{uncertainties}'. The uncertainties must be either 'jacobian' or 'manual'.")
+
+    unique_filenames, systems, _ = _unique_systems(list(application_filenames) + list(experiment_filenames))
+    stack = _read_stack(unique_filenames, sparse=sparse, drop_threshold=drop_threshold)
+    values, sigmas = stack.flatten()
+    num_applications = len(application_filenames)
+
+    E = {}
+    for variant, reaction_type in E_VARIANTS.items():
+        if reaction_type == 'all':
+            variant_values, variant_sigmas = values, sigmas
+        else: # Select the groups of the profiles with this reaction type
+            profiles = stack.index['reaction_type'] == reaction_type
+            columns = np.flatnonzero(np.repeat(profiles, stack.num_groups))
+            variant_values, variant_sigmas = values[:, columns], sigmas[:, columns]
+        E_values, E_std_devs = _calculate_system_E_matrix(variant_values, variant_sigmas, systems[:num_applications], 
+                                                          systems[num_applications:], uncertainties)
+        E[variant] = unumpy.umatrix(E_values, E_std_devs)
+
+    return E
+
+
+class PartialGramTensor:
+    """Profile-wise (i.e. nuclide-reaction-wise) partial dot products of the sensitivity vectors of every experiment with every
+    application, along with the matching partial squared norms (and the partial sums needed to propagate the uncertainties to 
+    first order, as with ``uncertainties='jacobian'`` in :func:`calculate_E`). Since :math:`E` for any subset :math:`K` of the 
+    nuclide-reactions is
+
+    .. math::
+        E_K = \\frac{\\sum_{p\\in K} \\boldsymbol{S}_{E,p}\\cdot\\boldsymbol{S}_{A,p}}{\\sqrt{\\sum_{p\\in K} 
+        \\lVert\\boldsymbol{S}_{E,p}\\rVert^2 \\sum_{p\\in K} \\lVert\\boldsymbol{S}_{A,p}\\rVert^2}}
+
+    (and similarly for the nuclide-wise and reaction-wise contributions to :math:`E`), once the tensor is computed, :math:`E` for
+    any subset of nuclides and reactions, and all of the contributions, are given by masked sums over profiles without touching 
+    the sensitivity data again.
+
+    Examples
+    --------
+    >>> filenames = [ f'examples/data/example_sdfs/u235-dummy/sphere_model_{i}.sdf' for i in [1, 2] ]
+    >>> gram = PartialGramTensor(filenames, filenames)
+    >>> gram
+    <tsunami_ip_utils.integral_indices.PartialGramTensor of 10 profiles for 2 experiments and 2 applications>
+    >>> np.allclose(unumpy.nominal_values(gram.E()), unumpy.nominal_values(calculate_E(filenames, filenames)))
+    True
+    >>> fission = gram.E(gram.select('fission'))
+    >>> np.allclose(unumpy.std_devs(fission), unumpy.std_devs(calculate_E(filenames, filenames, 'fission')))
+    True
+    >>> contributions = gram.contributions('reaction')
+    >>> contributions['fission'].shape
+    (2, 2)
+    """
+    application_filenames: List[Union[str, Path]]
+    """Paths to the application sdf files."""
+
+    experiment_filenames: List[Union[str, Path]]
+    """Paths to the experiment sdf files."""
+
+    index: np.ndarray
+    """Structured array of the descriptive data of each profile, with fields 
+    :attr:`tsunami_ip_utils.readers.SensitivityTable.INDEX_NAMES`."""
+
+    dot_products: np.ndarray
+    """Partial dot products :math:`\\boldsymbol{S}_{E,p}\\cdot\\boldsymbol{S}_{A,p}` of each profile :math:`p`, shape 
+    ``(num_profiles, num_experiments, num_applications)``."""
+
+    experiment_squared_norms: np.ndarray
+    """Partial squared norms of the experiment sensitivity vectors, shape ``(num_profiles, num_experiments)``."""
+
+    application_squared_norms: np.ndarray
+    """Partial squared norms of the application sensitivity vectors, shape ``(num_profiles, num_applications)``."""
+
+    variance_terms: Optional[np.ndarray]
+    """Partial sums :math:`\\sum_g \\sigma_{E}^2S_A^2`, :math:`\\sum_g \\sigma_{E}^2S_ES_A`, :math:`\\sum_g S_E^2\\sigma_{A}^2` 
+    and :math:`\\sum_g S_E\\sigma_{A}^2S_A` over the groups of each profile, shape 
+    ``(4, num_profiles, num_experiments, num_applications)``, or ``None`` if the uncertainties were not computed."""
+
+    experiment_weighted_norms: Optional[np.ndarray]
+    """Partial sums :math:`\\sum_g \\sigma_E^2S_E^2`, shape ``(num_profiles, num_experiments)`` (or ``None``)."""
+
+    application_weighted_norms: Optional[np.ndarray]
+    """Partial sums :math:`\\sum_g \\sigma_A^2S_A^2`, shape ``(num_profiles, num_applications)`` (or ``None``)."""
+
+    same_system: np.ndarray
+    """Boolean array of shape ``(num_experiments, num_applications)`` which is ``True`` where the experiment and application
+    are the same system, i.e. files with the same contents (these are treated as the same random vector when propagating the 
+    uncertainties)."""
+
+    def __init__(self, application_filenames: Union[List[str], List[Path]], experiment_filenames: Union[List[str], List[Path]],
+                 uncertainties: bool=True, sparse: bool=False, drop_threshold: Optional[float]=None):
+        """Compute the partial Gram tensor for the given applications and experiments.
+        
+        Parameters
+        ----------
+        application_filenames
+            Paths to the application sdf files.
+        experiment_filenames
+            Paths to the experiment sdf files.
+        uncertainties
+            Whether to compute the partial sums needed for the uncertainties. Default is ``True``.
+        sparse
+            Whether to read the sensitivity vectors sparsely (see :func:`calculate_E`). Default is ``False``.
+        drop_threshold
+            If given, insignificant groupwise sensitivities are dropped (see :func:`calculate_E`)."""
+        self.application_filenames = list(application_filenames)
+        self.experiment_filenames = list(experiment_filenames)
+
+        # The partial sums are only computed for the distinct systems, and then expanded to every application and experiment
+        unique_filenames, systems, _ = _unique_systems(self.application_filenames + self.experiment_filenames)
+        application_systems, experiment_systems = systems[:len(self.application_filenames)], \
+                                                  systems[len(self.application_filenames):]
+        unique_applications, application_inverse = np.unique(application_systems, return_inverse=True)
+        unique_experiments, experiment_inverse = np.unique(experiment_systems, return_inverse=True)
+        stack = _read_stack(unique_filenames, sparse=sparse, drop_threshold=drop_threshold)
+        self.index = stack.index
+        values, sigmas = stack.flatten()
+        values, sigmas = values[np.concatenate([unique_applications, unique_experiments])], \
+                         sigmas[np.concatenate([unique_applications, unique_experiments])]
+        if stack.sparse: # Column slices of the profiles are cheap in CSC format
+            values, sigmas = values.tocsc(), sigmas.tocsc()
+
+        num_profiles, num_groups = len(self.index), stack.num_groups
+        num_applications, num_experiments = len(unique_applications), len(unique_experiments)
+        self.dot_products = np.zeros((num_profiles, num_experiments, num_applications))
+        self.experiment_squared_norms = np.zeros((num_profiles, num_experiments))
+        self.application_squared_norms = np.zeros((num_profiles, num_applications))
+        self.variance_terms = np.zeros((4,) + self.dot_products.shape) if uncertainties else None
+        self.experiment_weighted_norms = np.zeros_like(self.experiment_squared_norms) if uncertainties else None
+        self.application_weighted_norms = np.zeros_like(self.application_squared_norms) if uncertainties else None
+        for profile in range(num_profiles):
+            groups = slice(profile * num_groups, ( profile + 1 ) * num_groups)
+            application, experiment = values[:num_applications, groups], values[num_applications:, groups]
+            squared_application, squared_experiment = _multiply(application, application), _multiply(experiment, experiment)
+            self.dot_products[profile] = _dense(experiment @ application.T)
+            self.experiment_squared_norms[profile] = _row_sums(squared_experiment)
+            self.application_squared_norms[profile] = _row_sums(squared_application)
+            if not uncertainties:
+                continue
+
+            application_variances = _multiply(sigmas[:num_applications, groups], sigmas[:num_applications, groups])
+            experiment_variances = _multiply(sigmas[num_applications:, groups], sigmas[num_applications:, groups])
+            self.variance_terms[0, profile] = _dense(experiment_variances @ squared_application.T)
+            self.variance_terms[1, profile] = _dense(_multiply(experiment_variances, experiment) @ application.T)
+            self.variance_terms[2, profile] = _dense(squared_experiment @ application_variances.T)
+            self.variance_terms[3, profile] = _dense(experiment @ _multiply(application_variances, application).T)
+            self.experiment_weighted_norms[profile] = _row_sums(_multiply(experiment_variances, squared_experiment))
+            self.application_weighted_norms[profile] = _row_sums(_multiply(application_variances, squared_application))
+
+        experiment_inverse, application_inverse = experiment_inverse.ravel(), application_inverse.ravel()
+        self.dot_products = self.dot_products[:, experiment_inverse][:, :, application_inverse]
+        self.experiment_squared_norms = self.experiment_squared_norms[:, experiment_inverse]
+        self.application_squared_norms = self.application_squared_norms[:, application_inverse]
+        if uncertainties:
+            self.variance_terms = self.variance_terms[:, :, experiment_inverse][:, :, :, application_inverse]
+            self.experiment_weighted_norms = self.experiment_weighted_norms[:, experiment_inverse]
+            self.application_weighted_norms = self.application_weighted_norms[:, application_inverse]
+        self.same_system = np.equal.outer(experiment_systems, application_systems)
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.integral_indices.PartialGramTensor of {len(self.index)} profiles for " \
+               f"{self.dot_products.shape[1]} experiments and {self.dot_products.shape[2]} applications>"
+
+    def select(self, reaction_type: str='all', zaids: Optional[List[str]]=None, mts: Optional[List[str]]=None) -> np.ndarray:
+        """Returns a boolean mask of the profiles with a given reaction type and/or ZAIDs and reaction MTs (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.select`)."""
+        mask = np.ones(len(self.index), dtype=bool)
+        if reaction_type != 'all':
+            mask &= self.index['reaction_type'] == reaction_type
+        if zaids is not None:
+            mask &= np.isin(self.index['zaid'], [ str(zaid) for zaid in zaids ])
+        if mts is not None:
+            mask &= np.isin(self.index['reaction_mt'], [ str(mt) for mt in mts ])
+        return mask
+
+    def _partial_E(self, profiles: np.ndarray, norm_profiles: np.ndarray) -> Union[np.ndarray, unumpy.umatrix]:
+        """Calculates the sum of the partial dot products over ``profiles`` normalized by the norms over ``norm_profiles`` (a 
+        superset of ``profiles``), along with its first order uncertainty."""
+        profiles, norm_profiles = profiles.astype(float), norm_profiles.astype(float)
+        experiment_squared_norms = ( norm_profiles @ self.experiment_squared_norms )[:, np.newaxis]
+        application_squared_norms = ( norm_profiles @ self.application_squared_norms )[np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            E = np.tensordot(profiles, self.dot_products, axes=1) / np.sqrt(experiment_squared_norms * application_squared_norms)
+        if self.variance_terms is None:
+            return E
+
+        # Expanded squared gradients of E with respect to the experiment and application sensitivities (see 
+        # _pairwise_normalized_dot_product_std_devs), restricted to the profiles in the numerator
+        terms = np.tensordot(profiles, self.variance_terms, axes=([0], [1]))
+        experiment_weighted_norms = ( profiles @ self.experiment_weighted_norms )[:, np.newaxis]
+        all_experiment_weighted_norms = ( norm_profiles @ self.experiment_weighted_norms )[:, np.newaxis]
+        all_application_weighted_norms = ( norm_profiles @ self.application_weighted_norms )[np.newaxis, :]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            variances = terms[0] / ( experiment_squared_norms * application_squared_norms ) \
+                        - 2 * E * terms[1] / ( experiment_squared_norms**1.5 * application_squared_norms**0.5 ) \
+                        + E**2 * all_experiment_weighted_norms / experiment_squared_norms**2 \
+                        + terms[2] / ( experiment_squared_norms * application_squared_norms ) \
+                        - 2 * E * terms[3] / ( experiment_squared_norms**0.5 * application_squared_norms**1.5 ) \
+                        + E**2 * all_application_weighted_norms / application_squared_norms**2
+
+            # When the experiment and application are the same random vector, the gradients are summed before propagating
+            same_system_variances = 4 * ( ( 1 - 2 * E ) * experiment_weighted_norms + E**2 * all_experiment_weighted_norms ) \
+                                    / experiment_squared_norms**2
+        variances = np.where(self.same_system, same_system_variances, variances)
+        return unumpy.umatrix(E, np.sqrt(np.clip(variances, 0, None)))
+
+    def E(self, profiles: Optional[np.ndarray]=None) -> Union[np.ndarray, unumpy.umatrix]:
+        """Calculates :math:`E` for each experiment with each application using only the given profiles.
+        
+        Parameters
+        ----------
+        profiles
+            Boolean mask of the profiles to include (e.g. from :meth:`select`). Default is ``None``, which includes all profiles.
+        
+        Returns
+        -------
+            :math:`E` for the subset of profiles, shape ``(num_experiments, num_applications)``. This is a ``unumpy.umatrix`` 
+            if the uncertainties were computed, and a plain array otherwise."""
+        profiles = np.ones(len(self.index), dtype=bool) if profiles is None else np.asarray(profiles, dtype=bool)
+        return self._partial_E(profiles, profiles)
+
+    def contributions(self, by: str='nuclide') -> Dict[Union[str, Tuple[str, str]], Union[np.ndarray, unumpy.umatrix]]:
+        """Calculates the contributions to :math:`E` (over all profiles) of each nuclide, reaction or nuclide-reaction pair, i.e.
+        the partial dot products of its profiles normalized by the norms of the full sensitivity vectors.
+        
+        Parameters
+        ----------
+        by
+            What to group the contributions by, ``'nuclide'`` (default), ``'reaction'`` or ``'nuclide_reaction'``.
+        
+        Returns
+        -------
+            Dictionary of the contributions (each with the same shape and type as returned by :meth:`E`) keyed by the isotope
+            name, the reaction type, or a tuple of both."""
+        if by == 'nuclide':
+            keys = self.index['isotope'].tolist()
+        elif by == 'reaction':
+            keys = self.index['reaction_type'].tolist()
+        elif by == 'nuclide_reaction':
+            keys = list(zip(self.index['isotope'].tolist(), self.index['reaction_type'].tolist()))
+        else:
+            raise ValueError(f"Invalid value '{by}' for by. Must be one of 'nuclide', 'reaction' or 'nuclide_reaction'.")
+
+        all_profiles = np.ones(len(self.index), dtype=bool)
+        positions = { key: position for position, key in enumerate(dict.fromkeys(keys)) }
+        groups = np.array([ positions[key] for key in keys ], dtype=np.int64)
+        return { key: self._partial_E(groups == position, all_profiles) for key, position in positions.items() }
+
+
 def _get_reaction_wise_E_contributions(application: dict, experiment: dict, isotope: str, all_reactions: List[str], 
                                       application_norm: Variable, experiment_norm: Variable) -> List[dict]:
     """Calculate contributions to the similarity parameter E for each reaction type for a given isotope.
@@ -275,8 +776,9 @@ def _add_missing_reactions_and_nuclides(application: dict, experiment: dict, all
         first_application_nuclide = list(application.keys())[0]
         first_application_reaction = list(application[first_application_nuclide].keys())[0]
         if mode == 'sdfs':
+            num_groups = len(application[first_application_nuclide][first_application_reaction]['sensitivities'])
             zero_data = {
-                'sensitivities': application[first_application_nuclide][first_application_reaction]['sensitivities']
+                'sensitivities': unumpy.uarray(np.zeros(num_groups), np.zeros(num_groups))
             }
         elif mode == 'contribution':
             zero_data = ufloat(0,0)
@@ -394,8 +896,119 @@ def _get_nuclide_and_reaction_wise_E_contributions(application: RegionIntegrated
     return nuclide_wise_contributions, nuclide_reaction_wise_contributions
 
 
-def calculate_E_contributions(application_filenames: List[str], experiment_filenames: List[str]
-                              ) -> Tuple[Dict[str, unumpy.uarray], Dict[str, unumpy.uarray]]:
+E_CONTRIBUTION_ENGINES = ['segment', 'pairwise']
+"""Available engines for :func:`calculate_E_contributions`. ``'segment'`` aligns all systems to a shared set of profiles and
+calculates every contribution with segment reductions over the profile axis, while ``'pairwise'`` uses the original loop over
+each nuclide and reaction of each system."""
+
+def _segment_sums(array: np.ndarray, keys: List) -> Tuple[List, np.ndarray]:
+    """Sums ``array`` over the segments of its last axis that share the same key (the keys of each index along the last axis).
+    
+    Returns
+    -------
+    unique_keys
+        The distinct keys, in order of their first appearance.
+    sums
+        The sums over each segment, with the last axis of ``array`` replaced by one entry per key in ``unique_keys``.
+        
+    Examples
+    --------
+    >>> _segment_sums(np.array([[1., 2., 3., 4.]]), ['a', 'b', 'a', 'c'])
+    (['a', 'b', 'c'], array([[4., 2., 4.]]))"""
+    positions = { key: position for position, key in enumerate(dict.fromkeys(keys)) }
+    segment_ids = np.array([ positions[key] for key in keys ], dtype=np.int64)
+    order = np.argsort(segment_ids, kind='stable')
+    starts = np.searchsorted(segment_ids[order], np.arange(len(positions)))
+    return list(positions), np.add.reduceat(array[..., order], starts, axis=-1)
+
+def _profile_sums(stack: SensitivityStack) -> np.ndarray:
+    """Sums of :math:`S^2`, :math:`S^4`, :math:`\\sigma^2S^2` and :math:`\\sigma^2S^4` over the groups of each profile of each
+    system of a (dense or sparse) sensitivity stack, shape ``(4, num_systems, num_profiles)``. For a sparse stack, only the 
+    stored groups are summed."""
+    num_systems, num_profiles = len(stack), len(stack.index)
+    if stack.sparse:
+        # The values and sigmas have the same sparsity structure, so their stored entries line up
+        systems = np.repeat(np.arange(num_systems), np.diff(stack.values.indptr))
+        segments = systems * num_profiles + stack.values.indices // stack.num_groups
+        squared_values, squared_sigmas = stack.values.data**2, stack.sigmas.data**2
+        quantities = [ squared_values, squared_values**2, squared_sigmas * squared_values, squared_sigmas * squared_values**2 ]
+        return np.stack([ np.bincount(segments, weights=quantity, minlength=num_systems * num_profiles) 
+                          for quantity in quantities ]).reshape(4, num_systems, num_profiles)
+
+    squared_values = stack.values**2
+    weighted_values = squared_values * stack.sigmas**2
+    return np.stack([ np.sum(squared_values, axis=-1), np.sum(squared_values**2, axis=-1), 
+                      np.sum(weighted_values, axis=-1), np.sum(squared_values * weighted_values, axis=-1) ])
+
+def _self_E_contributions(filenames: List[Union[str, Path]], drop_threshold: Optional[float]=None, sparse: bool=False
+                          ) -> Tuple[List[List[dict]], List[List[dict]]]:
+    """Calculates the nuclide-wise and nuclide-reaction-wise contributions to :math:`E` of each system with itself for the given 
+    sdf files, with the same (``'manual'``) uncertainties as :func:`_get_nuclide_and_reaction_wise_E_contributions`. The
+    groupwise data of all systems is aligned into a single stack, reduced to a few sums over the groups of each profile, and
+    then summed over the profiles of each nuclide (or nuclide-reaction pair) with ``np.add.reduceat``, so the sensitivities are
+    only passed over once. If ``sparse``, the stack is stored sparsely and only its nonzero groups are reduced.
+    
+    Returns
+    -------
+        * nuclide_wise_contributions
+            For each system, a list of dictionaries with the contribution of each of its nuclides.
+        * nuclide_reaction_wise_contributions
+            For each system, a list of dictionaries with the contribution of each of its nuclides with each of its reactions
+            (reactions that a nuclide does not have contribute zero)."""
+    stack = _read_stack(filenames, sparse=sparse, drop_threshold=drop_threshold)
+
+    # Sums of S^2, S^4, sigma^2 S^2 and sigma^2 S^4 over the groups of each profile, shape (4, num_systems, num_profiles)
+    profile_sums = _profile_sums(stack)
+    squared_norms = np.sum(profile_sums[0], axis=-1, keepdims=True)
+
+    isotopes, reactions = stack.index['isotope'].tolist(), stack.index['reaction_type'].tolist()
+    nuclides, nuclide_sums = _segment_sums(profile_sums, isotopes)
+    nuclide_reactions, nuclide_reaction_sums = _segment_sums(profile_sums, list(zip(isotopes, reactions)))
+
+    def contributions(sums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # The manual method propagates the uncertainties to the unit vector of the profiles in the segment (i.e. normalized
+        # by the norm of the segment), but the contribution is normalized by the norm of the full sensitivity vector, and the
+        # vector is treated as independent of itself in the dot product (which doubles the variance)
+        segment_squared_norms, fourth_powers, weighted_norms, weighted_fourth_powers = sums
+        with np.errstate(divide='ignore', invalid='ignore'):
+            E = segment_squared_norms / squared_norms
+            variances = 2 / squared_norms * ( weighted_norms / segment_squared_norms \
+                                              - 2 * weighted_fourth_powers / segment_squared_norms**2 \
+                                              + weighted_norms * fourth_powers / segment_squared_norms**3 )
+        E = np.where(segment_squared_norms > 0, E, 0.0)
+        variances = np.where(segment_squared_norms > 0, variances, 0.0)
+        return E, np.sqrt(np.clip(variances, 0, None))
+
+    nuclide_E, nuclide_std_devs = contributions(nuclide_sums)
+    nuclide_reaction_E, nuclide_reaction_std_devs = contributions(nuclide_reaction_sums)
+    nuclide_present = _segment_sums(stack.present.astype(int), isotopes)[1] > 0
+    nuclide_reaction_present = _segment_sums(stack.present.astype(int), list(zip(isotopes, reactions)))[1] > 0
+
+    nuclide_wise_contributions, nuclide_reaction_wise_contributions = [], []
+    for system in range(len(stack)):
+        nuclide_wise_contributions.append([
+            { 'isotope': nuclide, 'contribution': ufloat(nuclide_E[system, position], nuclide_std_devs[system, position]) }
+            for position, nuclide in enumerate(nuclides) if nuclide_present[system, position]
+        ])
+
+        # Each nuclide of the system is paired with every reaction of the system, as for the pairwise engine
+        present = { key: position for position, key in enumerate(nuclide_reactions) 
+                    if nuclide_reaction_present[system, position] }
+        system_nuclides = list(dict.fromkeys( isotope for isotope, _ in present ))
+        system_reactions = list(dict.fromkeys( reaction for _, reaction in present ))
+        nuclide_reaction_wise_contributions.append([
+            { 'isotope': isotope, 'reaction_type': reaction, 
+              'contribution': ufloat(nuclide_reaction_E[system, present[(isotope, reaction)]], 
+                                     nuclide_reaction_std_devs[system, present[(isotope, reaction)]]) 
+                              if (isotope, reaction) in present else ufloat(0, 0) }
+            for isotope in system_nuclides for reaction in system_reactions
+        ])
+
+    return nuclide_wise_contributions, nuclide_reaction_wise_contributions
+
+def calculate_E_contributions(application_filenames: List[str], experiment_filenames: List[str], 
+                              drop_threshold: Optional[float]=None, engine: str='segment', workers: Optional[int]=None,
+                              sparse: bool=False) -> Tuple[Dict[str, unumpy.uarray], Dict[str, unumpy.uarray]]:
     """Calculates the contributions to the similarity parameter E for each application with each available experiment 
     on a nuclide basis and on a nuclide-reaction basis.
     
@@ -405,6 +1018,19 @@ def calculate_E_contributions(application_filenames: List[str], experiment_filen
         Paths to the application sdf files.
     experiment_filenames
         Paths to the experiment sdf files.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped before calculating the
+        contributions (see :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`). Default is ``None``.
+    engine
+        The engine used to calculate the contributions, one of ``E_CONTRIBUTION_ENGINES``. Default is ``'segment'``, which 
+        calculates the contributions of every system at once from a single aligned array of all of the sensitivities.
+    workers
+        If given (and the engine is ``'segment'``), the systems are split into this many batches which are processed in a pool
+        of worker processes. This is only worthwhile for very large lists of systems. Default is ``None``, which processes all
+        of the systems in this process.
+    sparse
+        Whether to store the aligned sensitivities sparsely (only used by the ``'segment'`` engine), which saves memory when 
+        many groups are zero (or dropped with ``drop_threshold``). Default is ``False``.
     
     Returns
     -------
@@ -413,30 +1039,91 @@ def calculate_E_contributions(application_filenames: List[str], experiment_filen
             experiment on a nuclide basis.
         * E_contributions_nuclide_reaction
             Contributions to the similarity parameter E for each application with
-            each experiment on a nuclide-reaction basis."""
+            each experiment on a nuclide-reaction basis.
+    
+    Examples
+    --------
+    >>> filenames = [ f'examples/data/example_sdfs/u235-dummy/sphere_model_{i}.sdf' for i in [1, 2] ]
+    >>> nuclide_wise, nuclide_reaction_wise = calculate_E_contributions(filenames, filenames[:1])
+    >>> len(nuclide_wise['contribution']['application']), len(nuclide_wise['contribution']['experiment'])
+    (2, 1)
+    >>> [ contribution['isotope'] for contribution in nuclide_wise['contribution']['application'][0] ]
+    ['u-235']
+    >>> total = sum( contribution['contribution'] for contribution in nuclide_wise['contribution']['application'][0] )
+    >>> round(total.n, 12)
+    1.0
+    
+    The contributions are the same as with the original (``'pairwise'``) engine, up to the order of the nuclides and reactions
+    
+    >>> _, pairwise = calculate_E_contributions(filenames, filenames[:1], engine='pairwise')
+    >>> key = lambda contribution: (contribution['isotope'], contribution['reaction_type'])
+    >>> segment_contributions = sorted(nuclide_reaction_wise['contribution']['application'][1], key=key)
+    >>> pairwise_contributions = sorted(pairwise['contribution']['application'][1], key=key)
+    >>> all( np.isclose(x['contribution'].n, y['contribution'].n) and np.isclose(x['contribution'].s, y['contribution'].s) 
+    ...      for x, y in zip(segment_contributions, pairwise_contributions) )
+    True
     
-    application_sdfs = [ RegionIntegratedSdfReader(filename) for filename in application_filenames ]
-    experiment_sdfs  = [ RegionIntegratedSdfReader(filename) for filename in experiment_filenames ]
+    Storing the sensitivities sparsely gives the same contributions
     
+    >>> _, sparse_contributions = calculate_E_contributions(filenames, filenames[:1], sparse=True)
+    >>> all( np.isclose(x['contribution'].n, y['contribution'].n) and np.isclose(x['contribution'].s, y['contribution'].s) 
+    ...      for x, y in zip(nuclide_reaction_wise['contribution']['application'][1], 
+    ...                      sparse_contributions['contribution']['application'][1]) )
+    True
+    """
+    if engine not in E_CONTRIBUTION_ENGINES:
+        raise ValueError(f"Invalid engine '{engine}'. The engine must be one of {E_CONTRIBUTION_ENGINES}.")
+
     # Initialize np object arrays to store the E contributions
     E_nuclide_wise          = {'contribution': {'application': [], 'experiment': []}}
     E_nuclide_reaction_wise = {'contribution': {'application': [], 'experiment': []}}
 
-    # Calculate contributions to E for each application
-    for application in application_sdfs:
-        nuclide_wise_contributions, nuclide_reaction_wise_contributions = \
-            _get_nuclide_and_reaction_wise_E_contributions(application, application)
+    if engine == 'segment':
+        # Each distinct system is only processed once, even if it is both an application and an experiment
+        filenames, systems, _ = _unique_systems(list(application_filenames) + list(experiment_filenames))
+        if workers is None or len(filenames) < 2:
+            nuclide_wise_contributions, nuclide_reaction_wise_contributions = \
+                _self_E_contributions(filenames, drop_threshold, sparse)
+        else:
+            batches = [ batch.tolist() for batch in np.array_split(np.array(filenames, dtype=object), 
+                                                                  min(workers, len(filenames))) ]
+            with ProcessPoolExecutor(max_workers=len(batches)) as pool:
+                results = list(pool.map(_self_E_contributions, batches, [drop_threshold] * len(batches), 
+                                        [sparse] * len(batches)))
+            nuclide_wise_contributions = [ system for result in results for system in result[0] ]
+            nuclide_reaction_wise_contributions = [ system for result in results for system in result[1] ]
+
+        for key, key_systems in [ ('application', systems[:len(application_filenames)]), 
+                                  ('experiment', systems[len(application_filenames):]) ]:
+            for position in key_systems:
+                E_nuclide_wise['contribution'][key].append(
+                    [ dict(contribution) for contribution in nuclide_wise_contributions[position] ])
+                E_nuclide_reaction_wise['contribution'][key].append(
+                    [ dict(contribution) for contribution in nuclide_reaction_wise_contributions[position] ])
+    else:
+        application_sdfs = [ RegionIntegratedSdfReader(filename) for filename in application_filenames ]
+        experiment_sdfs  = [ RegionIntegratedSdfReader(filename) for filename in experiment_filenames ]
+
+        if drop_threshold is not None:
+            # The profile dictionaries are created lazily from the tables, so the dropped groups carry through to them
+            for sdf in application_sdfs + experiment_sdfs:
+                sdf.table = sdf.table.drop_insignificant(drop_threshold)
+
+        # Calculate contributions to E for each application
+        for application in application_sdfs:
+            nuclide_wise_contributions, nuclide_reaction_wise_contributions = \
+                _get_nuclide_and_reaction_wise_E_contributions(application, application)
 
-        E_nuclide_wise['contribution']['application'].append(nuclide_wise_contributions)
-        E_nuclide_reaction_wise['contribution']['application'] = nuclide_reaction_wise_contributions
+            E_nuclide_wise['contribution']['application'].append(nuclide_wise_contributions)
+            E_nuclide_reaction_wise['contribution']['application'].append(nuclide_reaction_wise_contributions)
 
-    # Calculate contributions to E for each experiment
-    for experiment in experiment_sdfs:
-        nuclide_wise_contributions, nuclide_reaction_wise_contributions = \
-            _get_nuclide_and_reaction_wise_E_contributions(experiment, experiment)
+        # Calculate contributions to E for each experiment
+        for experiment in experiment_sdfs:
+            nuclide_wise_contributions, nuclide_reaction_wise_contributions = \
+                _get_nuclide_and_reaction_wise_E_contributions(experiment, experiment)
 
-        E_nuclide_wise['contribution']['experiment'].append(nuclide_wise_contributions)
-        E_nuclide_reaction_wise['contribution']['experiment'] = nuclide_reaction_wise_contributions
+            E_nuclide_wise['contribution']['experiment'].append(nuclide_wise_contributions)
+            E_nuclide_reaction_wise['contribution']['experiment'].append(nuclide_reaction_wise_contributions)
 
     E_nuclide_wise['filenames'] = {
         'application': application_filenames,
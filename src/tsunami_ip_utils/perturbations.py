@@ -1,23 +1,28 @@
 """This module is used for generating cross section perturbations and combining them with the sensitivity profiles for a given application
 experiment pair to generate a similarity scatter plot"""
 
-from tsunami_ip_utils.readers import RegionIntegratedSdfReader, read_region_integrated_h5_sdf
-from tsunami_ip_utils.utils import _convert_paths
+from tsunami_ip_utils.readers import RegionIntegratedSdfReader, read_h5_sensitivity_table, FeatureRegistry, \
+    SensitivityTable
+from tsunami_ip_utils.utils import _convert_paths, _unique_systems
 from pathlib import Path
 from tsunami_ip_utils.xs import read_multigroup_xs
 import pickle
+import json
+import shutil
 import os
 import tempfile
 from string import Template
 import subprocess
 import time
-from tsunami_ip_utils.utils import _filter_by_nuclie_reaction_dict
 import multiprocessing
-from multiprocessing import Pool
 from tqdm import tqdm
 import numpy as np
+import scipy.sparse as sp
+from scipy.stats import rankdata
 from tqdm.contrib.concurrent import process_map
-from typing import List, Tuple, Dict, Union
+from typing import List, Tuple, Dict, Union, Optional, Callable, Iterable, Iterator, Any
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from tsunami_ip_utils import config
 from numpy.typing import ArrayLike
 from tsunami_ip_utils.config import cache_dir
@@ -25,6 +30,9 @@ from tsunami_ip_utils.config import cache_dir
 # Number of xs perturbation samples available in SCALE
 NUM_SAMPLES = config.NUM_SAMPLES
 
+# Maximum size (in bytes) of the block of cross section perturbations read at once when projecting samples
+_PROJECTION_CHUNK_BYTES = 2**24
+
 def _generate_and_read_perturbed_library(base_library: Union[str, Path], perturbation_factors: Union[str, Path], sample_number: int, 
                                          all_nuclide_reactions: dict) -> dict:
     """Generates and reads perturbed multigroup cross section libraries.
@@ -93,11 +101,807 @@ def _generate_and_read_perturbed_library(base_library: Union[str, Path], perturb
 
     return perturbed_xs
 
+class PerturbationStore:
+    """An on-disk store of a base multigroup cross section library and its perturbed samples, with each library flattened into 
+    a dense vector over a shared nuclide-reaction-group feature space (the same layout as the region integrated sensitivity
+    profiles, see :class:`tsunami_ip_utils.readers.FeatureRegistry`). The base library is stored in ``base.npy``, the samples
+    in a single ``samples.npy`` tensor of shape ``(num_samples, num_features)``, and the sidecar index ``registry.npz`` (along 
+    with ``metadata.json``) describes the columns. The arrays are read as memory maps, so reading a few nuclide-reactions of a 
+    sample only reads those columns from disk instead of loading the whole library.
+
+    Examples
+    --------
+    >>> base_xs = { '92235': { '18': np.array([1.0, 2.0]), '102': np.array([0.5, 0.25]) }, '1001': { '2': np.ones(2) } }
+    >>> with tempfile.TemporaryDirectory() as directory:
+    ...     store = PerturbationStore.create(Path(directory) / 'store', base_xs, num_samples=3)
+    ...     store.write_sample(2, { '92235': { '18': np.array([1.1, 1.8]), '102': np.array([0.5, 0.3]) }, 
+    ...                             '1001': { '2': np.ones(2) } })
+    ...     store = PerturbationStore(Path(directory) / 'store') # Reopen the store
+    ...     print(store)
+    ...     print(store.written)
+    ...     print(store.perturbations([2], store.columns({ '92235': ['102'] })))
+    <tsunami_ip_utils.perturbations.PerturbationStore of 3 samples with 3 nuclide-reactions and 2 energy groups>
+    [False  True False]
+    [[0.   0.05]]
+    """
+    directory: Path
+    """Directory containing the store."""
+
+    registry: FeatureRegistry
+    """The nuclide-reaction-group feature space of the stored libraries (the profiles are identified by ZAID and reaction MT, 
+    with zone number and volume zero, as for region integrated sensitivity profiles)."""
+
+    num_samples: int
+    """Number of perturbed samples that the store has room for. Samples are numbered from 1 to ``num_samples``, as in SCALE."""
+
+    def __init__(self, directory: Union[str, Path]):
+        """Open an existing store (created with :meth:`create`).
+        
+        Parameters
+        ----------
+        directory
+            Directory containing the store."""
+        self.directory = Path(directory)
+        with open(self.directory / 'metadata.json', 'r') as f:
+            metadata = json.load(f)
+        self.num_samples = metadata['num_samples']
+        self.registry = FeatureRegistry.load(self.directory / 'registry.npz')
+        index = self.registry.index
+        self._positions = { key: position for position, key in enumerate(zip(index['zaid'].tolist(), 
+                                                                             index['reaction_mt'].tolist())) }
+
+    @classmethod
+    def create(cls, directory: Union[str, Path], base_xs: Dict[str, Dict[str, np.ndarray]], 
+               num_samples: int=NUM_SAMPLES) -> 'PerturbationStore':
+        """Create a new (empty) store for the given base library. The samples tensor is allocated up front, and each sample is 
+        then written with :meth:`write_sample`.
+        
+        Parameters
+        ----------
+        directory
+            Directory to create the store in (any existing store in it is overwritten).
+        base_xs
+            The base cross sections, keyed by nuclide ZAID and then reaction MT (as read by 
+            :func:`tsunami_ip_utils.xs.read_multigroup_xs`). These nuclide-reactions make up the features of the store.
+        num_samples
+            Number of perturbed samples. Default is ``NUM_SAMPLES`` = :globalparam:`NUM_SAMPLES`.
+            
+        Returns
+        -------
+            The new store."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        keys = [ (nuclide, reaction) for nuclide, reactions in base_xs.items() for reaction in reactions ]
+        num_groups = len(base_xs[keys[0][0]][keys[0][1]]) if keys else 0
+        index = SensitivityTable.from_columns(
+            np.zeros((len(keys), num_groups)), np.zeros((len(keys), num_groups)),
+            isotope=[''] * len(keys), reaction_type=[''] * len(keys), zaid=[ str(zaid) for zaid, _ in keys ], 
+            reaction_mt=[ str(mt) for _, mt in keys ], zone_number=[0] * len(keys), zone_volume=[0] * len(keys)
+        ).index
+        FeatureRegistry(num_groups, index).save(directory / 'registry.npz')
+
+        base = np.concatenate([ np.asarray(base_xs[nuclide][reaction], dtype=float) for nuclide, reaction in keys ]) \
+               if keys else np.empty(0)
+        np.save(directory / 'base.npy', base)
+        np.lib.format.open_memmap(directory / 'samples.npy', mode='w+', dtype=float, shape=(num_samples, len(base))).flush()
+        np.save(directory / 'written.npy', np.zeros(num_samples, dtype=bool))
+        with open(directory / 'metadata.json', 'w') as f:
+            json.dump({ 'num_samples': num_samples, 'num_groups': num_groups }, f)
+        return cls(directory)
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.perturbations.PerturbationStore of {self.num_samples} samples with " \
+               f"{self.registry.num_profiles} nuclide-reactions and {self.registry.num_groups} energy groups>"
+
+    @property
+    def available_nuclide_reactions(self) -> Dict[str, List[str]]:
+        """The nuclide-reactions in the store, keyed by ZAID with a list of reaction MTs."""
+        nuclide_reactions = {}
+        for nuclide, reaction in self._positions:
+            nuclide_reactions.setdefault(nuclide, []).append(reaction)
+        return nuclide_reactions
+
+    @property
+    def written(self) -> np.ndarray:
+        """Boolean array which is ``True`` for each sample (in order of sample number) that has been written."""
+        return np.load(self.directory / 'written.npy')
+
+    def columns(self, nuclide_reactions: Optional[Dict[str, List[str]]]=None) -> np.ndarray:
+        """Returns the feature columns (in the order of the store) of the given nuclide-reactions, e.g. for reading a subset 
+        of the features with :meth:`samples`. Nuclide-reactions that are not in the store are skipped.
+        
+        Parameters
+        ----------
+        nuclide_reactions
+            Dictionary keyed by nuclide ZAID with a list of reaction MTs. Default is ``None``, which returns all columns.
+        
+        Returns
+        -------
+            Integer array of the columns."""
+        if nuclide_reactions is None:
+            return np.arange(self.registry.num_features)
+        positions = sorted( self._positions[(str(nuclide), str(reaction))] for nuclide, reactions in nuclide_reactions.items()
+                            for reaction in reactions if (str(nuclide), str(reaction)) in self._positions )
+        return ( np.array(positions, dtype=np.int64)[:, np.newaxis] * self.registry.num_groups \
+                 + np.arange(self.registry.num_groups) ).ravel()
+
+    def base(self, columns: Optional[np.ndarray]=None) -> np.ndarray:
+        """Reads the base cross sections (for the given columns, or all of them by default)."""
+        base = np.load(self.directory / 'base.npy', mmap_mode='r')
+        return np.array(base if columns is None else base[columns])
+
+    def samples(self, sample_numbers: Optional[ArrayLike]=None, columns: Optional[np.ndarray]=None) -> np.ndarray:
+        """Reads the perturbed cross sections of the given samples.
+        
+        Parameters
+        ----------
+        sample_numbers
+            Numbers of the samples to read (from 1 to :attr:`num_samples`). Default is ``None``, which reads all samples.
+        columns
+            Feature columns to read (e.g. from :meth:`columns`). Default is ``None``, which reads all columns.
+        
+        Returns
+        -------
+            The perturbed cross sections, shape ``(len(sample_numbers), len(columns))``."""
+        samples = np.load(self.directory / 'samples.npy', mmap_mode='r')
+        rows = np.arange(self.num_samples) if sample_numbers is None else np.asarray(sample_numbers, dtype=np.int64) - 1
+        columns = np.arange(samples.shape[1]) if columns is None else np.asarray(columns, dtype=np.int64)
+        return np.array(samples[np.ix_(rows, columns)]) # Only the pages containing the selected entries are read
+
+    def perturbations(self, sample_numbers: Optional[ArrayLike]=None, columns: Optional[np.ndarray]=None) -> np.ndarray:
+        """Reads the cross section perturbations :math:`\\Delta\\boldsymbol{\\sigma}` (perturbed minus base cross sections) of the
+        given samples. The parameters and shape of the result are the same as for :meth:`samples`."""
+        return self.samples(sample_numbers, columns) - self.base(columns)
+
+    def as_dict(self, values: np.ndarray, columns: Optional[np.ndarray]=None) -> Dict[str, Dict[str, np.ndarray]]:
+        """Converts a vector of cross sections over the given columns (e.g. a row from :meth:`samples`) into a dictionary keyed 
+        by nuclide ZAID and then reaction MT (the format of :func:`tsunami_ip_utils.xs.read_multigroup_xs`). The columns must 
+        cover whole nuclide-reactions, as returned by :meth:`columns`."""
+        columns = self.columns() if columns is None else np.asarray(columns)
+        index = self.registry.index
+        xs = {}
+        for start in range(0, len(columns), self.registry.num_groups):
+            position = columns[start] // self.registry.num_groups
+            xs.setdefault(index['zaid'][position], {})[index['reaction_mt'][position]] = \
+                values[start:start + self.registry.num_groups]
+        return xs
+
+    def write_sample(self, sample_number: int, perturbed_xs: Dict[str, Dict[str, np.ndarray]]) -> None:
+        """Writes a perturbed library to the store. Different samples can be written concurrently (e.g. from several processes).
+        
+        Parameters
+        ----------
+        sample_number
+            Number of the sample (from 1 to :attr:`num_samples`).
+        perturbed_xs
+            The perturbed cross sections, keyed by nuclide ZAID and then reaction MT. Nuclide-reactions of the store which are 
+            missing are given the base cross sections (i.e. they are not perturbed)."""
+        if not 1 <= sample_number <= self.num_samples:
+            raise ValueError(f"The sample number must be between 1 and {self.num_samples}, not {sample_number}.")
+        row = self.base()
+        num_groups = self.registry.num_groups
+        for (nuclide, reaction), position in self._positions.items():
+            if nuclide in perturbed_xs and reaction in perturbed_xs[nuclide]:
+                row[position * num_groups:( position + 1 ) * num_groups] = perturbed_xs[nuclide][reaction]
+
+        samples = np.load(self.directory / 'samples.npy', mmap_mode='r+')
+        samples[sample_number - 1] = row
+        samples.flush()
+        written = np.load(self.directory / 'written.npy', mmap_mode='r+')
+        written[sample_number - 1] = True
+        written.flush()
+
+def _prefetch(read: Callable[[Any], np.ndarray], blocks: Iterable[Any], block_bytes: int) -> Iterator[Tuple[Any, np.ndarray]]:
+    """Reads blocks (e.g. of perturbed cross section samples) in order, reading up to ``config.prefetch_depth`` blocks ahead in 
+    a pool of background threads while the caller processes the current block, so that reading from disk overlaps with 
+    computation. The number of blocks read ahead is also limited so that they take at most ``config.prefetch_max_size``
+    bytes. The blocks are yielded in order, so the results do not depend on the prefetching.
+    
+    Parameters
+    ----------
+    read
+        Function that reads a block.
+    blocks
+        The blocks to read (e.g. sample numbers or slices of them).
+    block_bytes
+        Size of a block (in bytes) once read.
+    
+    Yields
+    ------
+        Each block and the result of ``read`` for it."""
+    depth = min(config.prefetch_depth, config.prefetch_max_size // max(1, block_bytes))
+    if depth <= 0:
+        for block in blocks:
+            yield block, read(block)
+        return
+
+    with ThreadPoolExecutor(max_workers=depth) as executor:
+        pending = deque()
+        try:
+            for block in blocks:
+                pending.append((block, executor.submit(read, block)))
+                if len(pending) > depth:
+                    block, future = pending.popleft()
+                    yield block, future.result()
+            while pending:
+                block, future = pending.popleft()
+                yield block, future.result()
+        finally:
+            # If the caller stops early, don't read the remaining blocks
+            for _, future in pending:
+                future.cancel()
+
+def _perturbation_store(base_library: Path) -> PerturbationStore:
+    """Opens the :class:`PerturbationStore` of a base library in the cache, creating it if necessary (from the base library 
+    pickle cached by earlier versions if there is one, since reading the base library is slow)."""
+    directory = cache_dir / f'cached_{base_library.name}_store'
+    if (directory / 'metadata.json').exists(): # The metadata is written last, so the store is complete
+        return PerturbationStore(directory)
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    legacy_base_library_cache = cache_dir / f'cached_{base_library.name}.pkl'
+    if legacy_base_library_cache.exists():
+        with open(legacy_base_library_cache, 'rb') as f:
+            base_xs = pickle.load(f)
+    else:
+        # Read the base library, use an arbitrary nuclide reaction dict just to get the available reactions
+        _, available_nuclide_reactions = read_multigroup_xs(base_library, { '92235': ['18'] }, \
+                                                            return_available_nuclide_reactions=True)
+        base_xs = read_multigroup_xs(base_library, available_nuclide_reactions)
+    return PerturbationStore.create(directory, base_xs)
+
+def _write_perturbed_sample(store: PerturbationStore, base_library: Path, perturbation_factors: Path, 
+                            sample_number: int) -> None:
+    """Generates a perturbed library with SCALE and writes it to the store (a per-sample pickle cached by earlier versions is
+    used instead if there is one)."""
+    legacy_cache = cache_dir / f'cached_{base_library.name}_perturbations' / f'perturbed_xs_{sample_number}.pkl'
+    if legacy_cache.exists():
+        with open(legacy_cache, 'rb') as f:
+            perturbed_xs = pickle.load(f)
+    else:
+        perturbed_xs = _generate_and_read_perturbed_library(base_library, perturbation_factors, sample_number, 
+                                                            store.available_nuclide_reactions)
+    store.write_sample(sample_number, perturbed_xs)
+
+def _check_num_perturbations(store: PerturbationStore, num_perturbations: int) -> None:
+    """Raises a ``ValueError`` if the store does not have room for ``num_perturbations`` samples."""
+    if num_perturbations > store.num_samples:
+        raise ValueError(f"Cannot use {num_perturbations} perturbations, the perturbation store only has room for "
+                         f"{store.num_samples} samples.")
+
+def _write_missing_samples(store: PerturbationStore, base_library: Path, perturbation_factors: Path, 
+                           num_perturbations: int) -> None:
+    """Generates the first ``num_perturbations`` perturbed libraries that are not in the store yet."""
+    _check_num_perturbations(store, num_perturbations)
+    written = store.written
+    for i in tqdm(np.flatnonzero(~written[:num_perturbations]) + 1, desc="Generating perturbed libraries"):
+        _write_perturbed_sample(store, base_library, perturbation_factors, int(i))
+
+def _read_sensitivity_table(path: Path, name: str) -> SensitivityTable:
+    """Reads the region integrated sensitivity profiles of the ``name`` (application or experiment) from an sdf or h5 file."""
+    if path.suffix == '.sdf':
+        return RegionIntegratedSdfReader(path).table
+    elif path.suffix == '.h5':
+        return read_h5_sensitivity_table(path)
+    else:
+        raise ValueError(f"The {name} path must be either an sdf or h5 file.")
+
+def _sensitivity_matrix(tables: List[SensitivityTable], store: PerturbationStore, sparse: bool=False, 
+                        drop_threshold: Optional[float]=None) -> Tuple[Union[np.ndarray, sp.csr_array], np.ndarray]:
+    """Stacks the (nominal) sensitivity profiles of several systems into one matrix over the columns of a 
+    :class:`PerturbationStore` covering the union of their nuclide-reactions. Nuclide-reactions that are not in the store
+    cannot be perturbed, so they are left out.
+    
+    Parameters
+    ----------
+    tables
+        Region integrated sensitivity profiles of each system.
+    store
+        The perturbation store.
+    sparse
+        Whether to return the sensitivity vectors as a sparse (CSR) matrix, which only stores the nonzero groups. Default is 
+        ``False``.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`). Default is ``None``.
+    
+    Returns
+    -------
+    sensitivities
+        Sensitivity vector of each system, shape ``(len(tables), len(columns))``.
+    columns
+        The columns of the store that the sensitivity vectors correspond to."""
+    if drop_threshold is not None:
+        tables = [ table.drop_insignificant(drop_threshold) for table in tables ]
+    keys = [ list(zip(table.index['zaid'].tolist(), table.index['reaction_mt'].tolist())) for table in tables ]
+    positions = np.array(sorted({ store._positions[key] for system_keys in keys for key in system_keys 
+                                  if key in store._positions }), dtype=np.int64)
+    offsets = { position: offset for offset, position in enumerate(positions.tolist()) }
+    num_groups = store.registry.num_groups
+    columns = ( positions[:, np.newaxis] * num_groups + np.arange(num_groups) ).ravel()
+
+    # The row of each system's profiles in the matrix (or -1 for nuclide-reactions that are not in the store)
+    profile_offsets = [ np.array([ offsets[store._positions[key]] if key in store._positions else -1 for key in system_keys ],
+                                 dtype=np.int64) for system_keys in keys ]
+    if sparse:
+        systems, matrix_columns, values = [], [], []
+        for system, (table, table_offsets) in enumerate(zip(tables, profile_offsets)):
+            rows, groups = np.nonzero(( table.values != 0 ) & ( table_offsets >= 0 )[:, np.newaxis])
+            systems.append(np.full(len(rows), system))
+            matrix_columns.append(table_offsets[rows] * num_groups + groups)
+            values.append(table.values[rows, groups])
+        coordinates = (np.concatenate(systems), np.concatenate(matrix_columns)) if tables else ([], [])
+        sensitivities = sp.coo_array((np.concatenate(values) if tables else [], coordinates), 
+                                     shape=(len(tables), len(columns))).tocsr()
+        return sensitivities, columns
+
+    sensitivities = np.zeros((len(tables), len(positions), num_groups))
+    for system, (table, table_offsets) in enumerate(zip(tables, profile_offsets)):
+        in_store = table_offsets >= 0
+        sensitivities[system, table_offsets[in_store]] = table.values[in_store]
+    return sensitivities.reshape(len(tables), -1), columns
+
+def _project_perturbations(store: PerturbationStore, sensitivities: Union[np.ndarray, sp.csr_array], columns: np.ndarray, 
+                           sample_numbers: ArrayLike) -> np.ndarray:
+    """Computes :math:`\\boldsymbol{S}\\cdot\\Delta\\boldsymbol{\\sigma}_n` for each sensitivity vector and each of the given samples 
+    with a matrix product per block of samples (the blocks are at most ``_PROJECTION_CHUNK_BYTES`` in size, and the next 
+    blocks are read while the current one is projected, see :func:`_prefetch`).
+    
+    Parameters
+    ----------
+    store
+        The perturbation store (all of the given samples must be written).
+    sensitivities
+        Sensitivity vectors, shape ``(num_systems, len(columns))``, dense or sparse (e.g. from :func:`_sensitivity_matrix`).
+    columns
+        The columns of the store that the sensitivity vectors correspond to.
+    sample_numbers
+        Numbers of the samples to project (from 1 to ``store.num_samples``).
+    
+    Returns
+    -------
+        The projections, shape ``(len(sample_numbers), num_systems)``."""
+    sample_numbers = np.asarray(sample_numbers, dtype=np.int64)
+    projections = np.empty((len(sample_numbers), sensitivities.shape[0]))
+    chunk_size = max(1, _PROJECTION_CHUNK_BYTES // ( 8 * max(1, len(columns)) ))
+    chunks = [ slice(start, start + chunk_size) for start in range(0, len(sample_numbers), chunk_size) ]
+    read = lambda chunk: store.perturbations(sample_numbers[chunk], columns)
+    for chunk, perturbations in _prefetch(read, chunks, 8 * chunk_size * len(columns)):
+        projections[chunk] = ( sensitivities @ perturbations.T ).T
+    return projections
+
+class _ProjectionCache:
+    """The projections :math:`x_n = \\boldsymbol{S}\\cdot\\Delta\\boldsymbol{\\sigma}_n` of each distinct system (by file 
+    contents) among a set of applications and experiments. The projections only depend on the system and the library, so they
+    are cached in the ``projections`` directory of the library's :class:`PerturbationStore`, as one vector of length 
+    ``num_samples`` per system (named by the content hash of its sdf file, with ``NaN`` for samples that have not been 
+    projected yet). The systems are resolved and the cache files are loaded once, so the projections of more samples can be 
+    requested repeatedly (e.g. a batch at a time) and only the missing ones are computed. Projections with groups dropped
+    (``drop_threshold``) are cached separately."""
+    systems: np.ndarray
+    """The distinct system of each of the applications followed by the experiments (indexing the columns of the 
+    projections)."""
+
+    def __init__(self, application_paths: List[Path], experiment_paths: List[Path], base_library: Path, 
+                 perturbation_factors: Path, sparse: bool=False, drop_threshold: Optional[float]=None):
+        self._num_applications = len(application_paths)
+        self._sparse, self._drop_threshold = sparse, drop_threshold
+        self._unique_paths, self.systems, hashes = _unique_systems(application_paths + experiment_paths)
+        self._base_library, self._perturbation_factors = base_library, perturbation_factors
+        self._store = _perturbation_store(base_library)
+        self._directory = self._store.directory / 'projections'
+        self._directory.mkdir(exist_ok=True)
+
+        system_hashes = dict(zip(self.systems.tolist(), hashes))
+        suffix = '' if drop_threshold is None else f'_drop_{drop_threshold:g}'
+        self._cache_files = [ self._directory / f'{system_hashes[system]}{suffix}.npy' 
+                              for system in range(len(self._unique_paths)) ]
+        self._projections = np.full((self._store.num_samples, len(self._unique_paths)), np.nan)
+        for system, cache_file in enumerate(self._cache_files):
+            if cache_file.exists():
+                self._projections[:, system] = np.load(cache_file)
+
+        # The sensitivities of the systems that have been read (only systems with missing projections are read)
+        self._read_systems = np.empty(0, dtype=np.int64)
+        self._sensitivities, self._columns = None, None
+
+    def projections(self, num_perturbations: int) -> np.ndarray:
+        """Returns the projections of the first ``num_perturbations`` samples, shape ``(num_perturbations, num_systems)``, 
+        computing (and caching) any that are missing."""
+        _check_num_perturbations(self._store, num_perturbations)
+        missing = np.isnan(self._projections[:num_perturbations])
+        missing_systems = np.flatnonzero(missing.any(axis=0))
+        if len(missing_systems) > 0:
+            _write_missing_samples(self._store, self._base_library, self._perturbation_factors, num_perturbations)
+
+            # Read and project only the systems (and samples) that are missing from the cache
+            if not np.isin(missing_systems, self._read_systems).all():
+                first_paths = {}
+                for index, system in enumerate(self.systems.tolist()):
+                    first_paths.setdefault(system, index)
+                tables = [ _read_sensitivity_table(self._unique_paths[system], 
+                                                   'application' if first_paths[system] < self._num_applications else 'experiment')
+                           for system in missing_systems ]
+                self._sensitivities, self._columns = _sensitivity_matrix(tables, self._store, self._sparse, 
+                                                                         self._drop_threshold)
+                self._read_systems = missing_systems
+            rows = np.searchsorted(self._read_systems, missing_systems)
+            sample_numbers = np.flatnonzero(missing[:, missing_systems].any(axis=1)) + 1
+            self._projections[np.ix_(sample_numbers - 1, missing_systems)] = \
+                _project_perturbations(self._store, self._sensitivities[rows], self._columns, sample_numbers)
+
+            for system in missing_systems:
+                # Write to a temporary file first so that concurrent readers never see a partially written cache file
+                with tempfile.NamedTemporaryFile(dir=self._directory, suffix='.npy', delete=False) as f:
+                    np.save(f, self._projections[:, system])
+                os.replace(f.name, self._cache_files[system])
+
+        return self._projections[:num_perturbations]
+
+def _system_projections(application_paths: List[Path], experiment_paths: List[Path], base_library: Path, 
+                        perturbation_factors: Path, num_perturbations: int, sparse: bool=False, 
+                        drop_threshold: Optional[float]=None) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the projections of the first ``num_perturbations`` samples for each distinct system among the applications 
+    and experiments (using the cache, see :class:`_ProjectionCache`). ``sparse`` and ``drop_threshold`` are as for
+    :func:`_sensitivity_matrix`.
+    
+    Returns
+    -------
+    projections
+        The projections of each distinct system, shape ``(num_perturbations, num_systems)``.
+    systems
+        The distinct system of each of the applications followed by the experiments (indexing the columns of 
+        ``projections``)."""
+    cache = _ProjectionCache(application_paths, experiment_paths, base_library, perturbation_factors, sparse, drop_threshold)
+    return cache.projections(num_perturbations), cache.systems
+
+def _generate_points_vectorized(application_paths: List[Path], experiment_paths: List[Path], base_library: Path, 
+                                perturbation_factors: Path, num_perturbations: int, sparse: bool=False, 
+                                drop_threshold: Optional[float]=None) -> np.ndarray:
+    """Generates the perturbation points of every application with every experiment for :func:`generate_points` with
+    ``vectorized=True`` from the projections of each distinct system (see :func:`_system_projections`).
+    
+    Returns
+    -------
+        The points, shape ``(len(application_paths), len(experiment_paths), num_perturbations, 2)``."""
+    projections, systems = _system_projections(application_paths, experiment_paths, base_library, perturbation_factors, 
+                                               num_perturbations, sparse, drop_threshold)
+    application_systems, experiment_systems = systems[:len(application_paths)], systems[len(application_paths):]
+    points = np.empty((len(application_paths), len(experiment_paths), num_perturbations, 2))
+    points[..., 0] = projections.T[application_systems][:, np.newaxis]
+    points[..., 1] = projections.T[experiment_systems][np.newaxis, :]
+    return points
+
+@_convert_paths
+def calculate_perturbation_c_k(application_filenames: Union[List[str], List[Path]], 
+                               experiment_filenames: Union[List[str], List[Path]], base_library: Union[str, Path], 
+                               perturbation_factors: Union[str, Path], num_perturbations: int, sparse: bool=False, 
+                               drop_threshold: Optional[float]=None) -> np.ndarray:
+    """Calculates the similarity parameter :math:`c_k` of every application with every experiment using the nuclear data 
+    sampling method (see :func:`generate_points`), i.e. the Pearson correlation coefficient of the projections 
+    :math:`x_n = \\boldsymbol{S}_A\\cdot\\Delta\\boldsymbol{\\sigma}_n` and :math:`y_n = \\boldsymbol{S}_E\\cdot\\Delta\\boldsymbol{\\sigma}_n`.
+    
+    Parameters
+    ----------
+    application_filenames
+        Paths to the application sensitivity profiles (``.sdf`` or ``.h5`` files).
+    experiment_filenames
+        Paths to the experiment sensitivity profiles (``.sdf`` or ``.h5`` files).
+    base_library
+        Path to the base cross section library.
+    perturbation_factors
+        Path to the perturbation factors directory.
+    num_perturbations
+        Number of perturbed cross section libraries (samples) to use.
+    sparse
+        Whether to store the stacked sensitivity vectors sparsely when projecting the samples. Default is ``False``.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped before projecting (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`). Default is ``None``.
+        
+    Returns
+    -------
+        The :math:`c_k` values, shape ``(len(application_filenames), len(experiment_filenames))``.
+        
+    Notes
+    -----
+    The projections of each distinct system are computed once (and cached, so later calls with the same systems and library
+    do not need to read the perturbed libraries at all), and the whole matrix is then computed with a single 
+    ``np.corrcoef`` of the stacked projections. For :math:`N` applications and :math:`M` experiments this costs 
+    :math:`\\mathcal{O}\\left((N+M)\\cdot\\text{samples}\\cdot\\text{features}\\right)` instead of 
+    :math:`\\mathcal{O}\\left(N\\cdot M\\cdot\\text{samples}\\cdot\\text{features}\\right)` when processing each pair separately."""
+    projections, systems = _system_projections(application_filenames, experiment_filenames, Path(base_library), 
+                                               Path(perturbation_factors), num_perturbations, sparse, drop_threshold)
+    correlations = np.atleast_2d(np.corrcoef(projections, rowvar=False))
+    application_systems, experiment_systems = systems[:len(application_filenames)], systems[len(application_filenames):]
+    return correlations[np.ix_(application_systems, experiment_systems)]
+
+def _cross_correlations(samples: np.ndarray, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    """Pearson correlation coefficients of each variable in ``first`` with each variable in ``second`` (columns of 
+    ``samples``), shape ``(len(first), len(second))``, from a single matrix product of the centered samples."""
+    first_samples = samples[:, first] - samples[:, first].mean(axis=0)
+    second_samples = samples[:, second] - samples[:, second].mean(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return ( first_samples.T @ second_samples ) / np.sqrt(np.outer(np.sum(first_samples**2, axis=0), 
+                                                                      np.sum(second_samples**2, axis=0)))
+
+class CorrelationAccumulator:
+    """Streaming estimate of the Pearson and Spearman correlation coefficients (i.e. :math:`c_k` from the nuclear data sampling
+    method) of each variable in ``first`` with each variable in ``second``, where the samples of all variables (e.g. the 
+    projections of each distinct system) are added a batch at a time. The Pearson correlations are updated with Welford-style 
+    running means and co-moments, and their uncertainties are estimated with a bootstrap confidence interval over the samples 
+    seen so far. Once the half-width of the confidence interval of a pair falls below a tolerance (see 
+    :meth:`check_convergence`), its estimates are frozen and further samples do not change them.
+
+    Examples
+    --------
+    >>> rng = np.random.default_rng(0)
+    >>> x = rng.normal(size=1000)
+    >>> samples = np.column_stack([ x, x + rng.normal(scale=0.1, size=1000), x + rng.normal(scale=1.0, size=1000) ])
+    >>> accumulator = CorrelationAccumulator(first=[0], second=[1, 2], seed=0) # A strongly and a weakly correlated pair
+    >>> for start in range(0, 1000, 100):
+    ...     accumulator.update(samples[start:start + 100])
+    ...     if accumulator.check_convergence(tolerance=0.02, min_samples=200):
+    ...         break
+    >>> accumulator.num_samples, accumulator.converged
+    (array([[ 200, 1000]]), array([[ True, False]]))
+    >>> np.allclose(accumulator.pearson[0, 1], np.corrcoef(samples[:, 0], samples[:, 2])[0, 1])
+    True
+    """
+    first: np.ndarray
+    """Variables (columns of the samples) of the rows of the array of pairs."""
+
+    second: np.ndarray
+    """Variables (columns of the samples) of the columns of the array of pairs."""
+
+    confidence: float
+    """Confidence level of the bootstrap confidence intervals."""
+
+    num_bootstrap: int
+    """Number of bootstrap resamples used to estimate the confidence intervals."""
+
+    converged: np.ndarray
+    """Boolean array (of shape ``(len(first), len(second))``) which is ``True`` for each pair whose estimates have converged 
+    (and are frozen)."""
+
+    def __init__(self, first: ArrayLike, second: ArrayLike, confidence: float=0.95, num_bootstrap: int=200, 
+                 seed: Optional[int]=None):
+        """Create an empty accumulator.
+        
+        Parameters
+        ----------
+        first
+            Variables (columns of the samples) of the rows of the array of pairs (e.g. the system of each application).
+        second
+            Variables of the columns of the array of pairs (e.g. the system of each experiment).
+        confidence
+            Confidence level of the bootstrap confidence intervals. Default is ``0.95``.
+        num_bootstrap
+            Number of bootstrap resamples. Default is ``200``.
+        seed
+            Seed of the random number generator used for the bootstrap resamples. Default is ``None``."""
+        if not 0 < confidence < 1:
+            raise ValueError(f"The confidence level must be between 0 and 1, not {confidence}.")
+        self.first, self.second = np.asarray(first, dtype=np.int64), np.asarray(second, dtype=np.int64)
+        self.confidence = confidence
+        self.num_bootstrap = num_bootstrap
+        shape = (len(self.first), len(self.second))
+        self.converged = np.zeros(shape, dtype=bool)
+        self._num_variables = int(max(self.first.max(initial=-1), self.second.max(initial=-1))) + 1
+        self._rng = np.random.default_rng(seed)
+        self._count = 0
+        self._mean = np.zeros(self._num_variables)
+        self._comoments = np.zeros((self._num_variables, self._num_variables))
+        self._samples = []
+        self._frozen = { name: np.full(shape, np.nan) for name in ['pearson', 'spearman', 'half_width'] }
+        self._frozen['num_samples'] = np.zeros(shape, dtype=np.int64)
+        # The half-widths of the last convergence check, so that reading them does not draw new bootstrap resamples
+        self._half_widths = np.full(shape, np.nan)
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.perturbations.CorrelationAccumulator of {self._count} samples with " \
+               f"{np.count_nonzero(self.converged)}/{self.converged.size} pairs converged>"
+
+    def update(self, samples: ArrayLike) -> None:
+        """Adds a batch of samples.
+        
+        Parameters
+        ----------
+        samples
+            Samples of each variable, shape ``(batch_size, num_variables)``."""
+        samples = np.asarray(samples, dtype=float)
+        if samples.ndim != 2 or samples.shape[1] < self._num_variables:
+            raise ValueError(f"Expected a batch of shape (batch_size, {self._num_variables}), but got {samples.shape}.")
+        if len(samples) == 0:
+            return
+
+        # Merge the statistics of the batch with the running statistics (Chan et al.'s parallel form of Welford's algorithm)
+        samples = samples[:, :self._num_variables]
+        count = len(samples)
+        mean = samples.mean(axis=0)
+        delta = mean - self._mean
+        total = self._count + count
+        centered = samples - mean
+        self._comoments += centered.T @ centered + np.outer(delta, delta) * self._count * count / total
+        self._mean += delta * count / total
+        self._count = total
+        self._samples.append(samples)
+
+    def _all_samples(self) -> np.ndarray:
+        """All samples added so far, shape ``(num_samples, num_variables)``."""
+        if len(self._samples) > 1:
+            self._samples = [ np.concatenate(self._samples) ]
+        return self._samples[0] if self._samples else np.empty((0, self._num_variables))
+
+    def _current(self, name: str) -> np.ndarray:
+        """The current (unfrozen) estimate of ``name`` for every pair."""
+        if name == 'pearson':
+            variances = np.diag(self._comoments)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return self._comoments[np.ix_(self.first, self.second)] / \
+                       np.sqrt(np.outer(variances[self.first], variances[self.second]))
+        elif name == 'spearman':
+            samples = self._all_samples()
+            if len(samples) == 0:
+                return np.full(self.converged.shape, np.nan)
+            return _cross_correlations(rankdata(samples, axis=0), self.first, self.second)
+        elif name == 'half_width':
+            return self._half_widths
+        else:
+            return np.full(self.converged.shape, self._count)
+
+    def _estimate(self, name: str) -> np.ndarray:
+        return np.where(self.converged, self._frozen[name], self._current(name))
+
+    @property
+    def num_samples(self) -> np.ndarray:
+        """The number of samples used for the estimates of each pair (for converged pairs, the number of samples at 
+        convergence)."""
+        return self._estimate('num_samples')
+
+    @property
+    def pearson(self) -> np.ndarray:
+        """The Pearson correlation coefficient of each pair."""
+        return self._estimate('pearson')
+
+    @property
+    def spearman(self) -> np.ndarray:
+        """The Spearman rank correlation coefficient of each pair."""
+        return self._estimate('spearman')
+
+    @property
+    def half_width(self) -> np.ndarray:
+        """The half-width of the confidence interval of the Pearson correlation coefficient of each pair (at convergence for
+        converged pairs, otherwise from the last call of :meth:`check_convergence`, or ``NaN`` before the first call). Reading
+        it does not run a bootstrap, so it does not affect later (seeded) convergence checks."""
+        return self._estimate('half_width')
+
+    def confidence_interval_half_width(self, pairs: Optional[np.ndarray]=None) -> np.ndarray:
+        """Estimates the half-width of the bootstrap (percentile) confidence interval of the Pearson correlation coefficient 
+        from the samples added so far. Each bootstrap resample of the samples gives the correlations of all selected pairs
+        with a single matrix product of the samples of the variables involved.
+        
+        Parameters
+        ----------
+        pairs
+            Boolean mask (of shape ``(len(first), len(second))``) of the pairs to compute the half-width for. Default is 
+            ``None``, which computes it for all pairs.
+        
+        Returns
+        -------
+            The half-widths of the selected pairs (``NaN`` for pairs that are not selected or with fewer than two samples)."""
+        half_widths = np.full(self.converged.shape, np.nan)
+        samples = self._all_samples()
+        pairs = np.ones(self.converged.shape, dtype=bool) if pairs is None else np.asarray(pairs, dtype=bool)
+        if len(samples) < 2 or not pairs.any():
+            return half_widths
+
+        # Only the variables of the rows and columns with selected pairs are needed
+        rows, columns = np.flatnonzero(pairs.any(axis=1)), np.flatnonzero(pairs.any(axis=0))
+        first, second = self.first[rows], self.second[columns]
+        selected = pairs[np.ix_(rows, columns)]
+        correlations = np.empty((self.num_bootstrap, np.count_nonzero(selected)))
+        for resample in range(self.num_bootstrap):
+            indices = self._rng.integers(0, len(samples), size=len(samples))
+            correlations[resample] = _cross_correlations(samples[indices], first, second)[selected]
+        lower, upper = np.quantile(correlations, [ (1 - self.confidence) / 2, (1 + self.confidence) / 2 ], axis=0)
+        half_widths[pairs] = (upper - lower) / 2
+        return half_widths
+
+    def check_convergence(self, tolerance: float, min_samples: int=2) -> bool:
+        """Marks the pairs whose confidence interval half-width is at most ``tolerance`` as converged, which freezes their 
+        estimates.
+        
+        Parameters
+        ----------
+        tolerance
+            Tolerance on the half-width of the confidence interval of the Pearson correlation coefficient.
+        min_samples
+            Minimum number of samples before a pair can be considered converged. Default is ``2``.
+        
+        Returns
+        -------
+            Whether all pairs have converged."""
+        if self._count >= min_samples:
+            unconverged = ~self.converged
+            half_widths = self.confidence_interval_half_width(unconverged)
+            self._half_widths = np.where(unconverged, half_widths, self._half_widths)
+            newly_converged = unconverged & (half_widths <= tolerance)
+            if newly_converged.any():
+                for name in self._frozen:
+                    self._frozen[name] = np.where(newly_converged, half_widths if name == 'half_width' else self._current(name), 
+                                                  self._frozen[name])
+                self.converged = self.converged | newly_converged
+        return bool(self.converged.all())
+
+@_convert_paths
+def stream_perturbation_c_k(application_filenames: Union[List[str], List[Path]], 
+                            experiment_filenames: Union[List[str], List[Path]], base_library: Union[str, Path], 
+                            perturbation_factors: Union[str, Path], tolerance: float, 
+                            max_perturbations: int=NUM_SAMPLES, batch_size: int=50, min_perturbations: int=100, 
+                            confidence: float=0.95, num_bootstrap: int=200, seed: Optional[int]=None, 
+                            sparse: bool=False, drop_threshold: Optional[float]=None) -> CorrelationAccumulator:
+    """Calculates :math:`c_k` of every application with every experiment with the nuclear data sampling method (as in 
+    :func:`calculate_perturbation_c_k`), but processes the samples in batches and stops once the half-width of the bootstrap
+    confidence interval of every :math:`c_k` is at most ``tolerance``, instead of always using a fixed number of samples.
+    
+    Parameters
+    ----------
+    application_filenames
+        Paths to the application sensitivity profiles (``.sdf`` or ``.h5`` files).
+    experiment_filenames
+        Paths to the experiment sensitivity profiles (``.sdf`` or ``.h5`` files).
+    base_library
+        Path to the base cross section library.
+    perturbation_factors
+        Path to the perturbation factors directory.
+    tolerance
+        Tolerance on the half-width of the confidence interval of :math:`c_k`.
+    max_perturbations
+        Maximum number of samples to use. Default is ``NUM_SAMPLES`` = :globalparam:`NUM_SAMPLES`.
+    batch_size
+        Number of samples added between convergence checks. Default is ``50``.
+    min_perturbations
+        Minimum number of samples before a :math:`c_k` value can be considered converged. Default is ``100``.
+    confidence
+        Confidence level of the confidence intervals. Default is ``0.95``.
+    num_bootstrap
+        Number of bootstrap resamples used to estimate the confidence intervals. Default is ``200``.
+    seed
+        Seed for the bootstrap resamples. Default is ``None``.
+    sparse
+        Whether to store the stacked sensitivity vectors sparsely when projecting the samples. Default is ``False``.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped before projecting (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`). Default is ``None``.
+        
+    Returns
+    -------
+        The accumulator, with a pair for each application and experiment (i.e. of shape ``(len(application_filenames), 
+        len(experiment_filenames))``). Its :attr:`CorrelationAccumulator.pearson` are the :math:`c_k` values, and 
+        :attr:`CorrelationAccumulator.num_samples` are the number of samples used for each of them. 
+        :attr:`CorrelationAccumulator.converged` is ``False`` for the values that did not converge within 
+        ``max_perturbations`` samples."""
+    num_applications = len(application_filenames)
+    cache = _ProjectionCache(application_filenames, experiment_filenames, Path(base_library), Path(perturbation_factors), 
+                             sparse, drop_threshold)
+    accumulator = CorrelationAccumulator(cache.systems[:num_applications], cache.systems[num_applications:], confidence, 
+                                         num_bootstrap, seed)
+    num_processed = 0
+    while num_processed < max_perturbations and not accumulator.converged.all():
+        num_perturbations = min(num_processed + batch_size, max_perturbations)
+        # Only the projections of the new samples are computed (if they are not cached already)
+        accumulator.update(cache.projections(num_perturbations)[num_processed:])
+        accumulator.check_convergence(tolerance, min_perturbations)
+        num_processed = num_perturbations
+    return accumulator
+
 @_convert_paths
 def generate_points(application_path: Union[Path, List[Path]], experiment_path: Union[Path, List[Path]], 
-                    base_library: Union[str, Path], perturbation_factors: Union[str, Path], num_perturbations: int
+                    base_library: Union[str, Path], perturbation_factors: Union[str, Path], num_perturbations: int,
+                    vectorized: bool=False, sparse: bool=False, drop_threshold: Optional[float]=None
                     ) -> Union[ List[ Tuple[ float, float ] ], 
-                               np.ndarray[ List[ Tuple[ float, float ] ] ]]:
+                                                      np.ndarray[ List[ Tuple[ float, float ] ] ], np.ndarray ]:
     """Generates points for a similarity scatter plot using the nuclear data sampling method.
 
     Parameters
@@ -112,20 +916,34 @@ def generate_points(application_path: Union[Path, List[Path]], experiment_path:
         Path to the perturbation factors directory.
     num_perturbations
         Number of perturbation points to generate.
+    vectorized
+        Whether to compute the points of all samples (and all application-experiment pairs) with a few matrix products of the
+        stacked sensitivity vectors and the cross section perturbations. The points are then floats without uncertainties 
+        (the nominal sensitivities are used). Default is ``False``.
+    sparse
+        Whether to store the stacked sensitivity vectors sparsely (only used if ``vectorized``). Default is ``False``.
+    drop_threshold
+        If given, groupwise sensitivities with :math:`|S| < k\\sigma` for this :math:`k` are dropped before projecting (see 
+        :meth:`tsunami_ip_utils.readers.SensitivityTable.drop_insignificant`). Default is ``None``.
     
     Returns
     -------
-        A list of points for the similarity scatter plot.
+        A list of points for the similarity scatter plot. If ``vectorized``, a float array of shape ``(num_perturbations, 2)``
+        instead (or ``(num_applications, num_experiments, num_perturbations, 2)`` if lists of paths are given).
 
     Notes
     -----    
     * This function will automatically cache the base cross section library and the perturbed cross section libraries in the 
       user's home directory under the ``.tsunami_ip_utils_cache`` directory if not already cached. Caching is recommended if
       perturbation points are to be generated multiple times, because the I/O overhead of dumping and reading the base and
-      perturbed cross section libraries can be significant.
+      perturbed cross section libraries can be significant. The cache is a :class:`PerturbationStore`, so only the columns
+      for the nuclide-reactions present in the given sensitivity profiles are read from disk.
 
     * This function can also generate a matrix of points for a given set of experiment and applications for making a matrix plot
       done by passing a list of paths for the application and experiment sensitivity profiles.
+
+    * If only the correlation coefficients are needed, :func:`stream_perturbation_c_k` can be used to choose the number of 
+      samples adaptively, instead of guessing ``num_perturbations``.
         
     Theory
     ======
@@ -151,52 +969,55 @@ def generate_points(application_path: Union[Path, List[Path]], experiment_path:
     if isinstance(perturbation_factors, str):
         perturbation_factors = Path(perturbation_factors)
     
+    if vectorized:
+        if isinstance(application_path, list) != isinstance(experiment_path, list):
+            raise ValueError("Both application and experiment paths must be lists or neither.")
+        elif isinstance(application_path, list):
+            return _generate_points_vectorized(application_path, experiment_path, base_library, perturbation_factors, 
+                                               num_perturbations, sparse, drop_threshold)
+        else:
+            return _generate_points_vectorized([application_path], [experiment_path], base_library, perturbation_factors, 
+                                               num_perturbations, sparse, drop_threshold)[0, 0]
+
     # Check if the application and experiment paths are lists (vectorization)
     if isinstance(application_path, list) and isinstance(experiment_path, list):
+        # Files with the same contents are the same system, so the points for each unordered pair of systems are only generated
+        # once. The points for the reversed pair are the same with the application and experiment coordinates swapped
+        unique_paths, systems, _ = _unique_systems(application_path + experiment_path)
+        application_systems, experiment_systems = systems[:len(application_path)], systems[len(application_path):]
         points_array = np.empty( ( len(application_path), len(experiment_path), num_perturbations, 2), dtype=object )
-        for i, application in enumerate(application_path):
-            for j, experiment in enumerate(experiment_path):
-                if i < j: # Skip upper right triangle of the matrix (since it's symmetric)
-                    continue
-
-                points_array[i, j] = generate_points(
-                    application, 
-                    experiment, 
-                    base_library, 
-                    perturbation_factors, 
-                    num_perturbations
-                )
-        # Now popupate the upper right triangle of the matrix with the transpose of the lower left triangle
-        for i, application in enumerate(application_path):
-            for j, experiment in enumerate(experiment_path):
-                if i < j:
-                    points_array[i, j] = points_array[j, i]
+        unique_points = {}
+        for i, application_system in enumerate(application_systems):
+            for j, experiment_system in enumerate(experiment_systems):
+                if (application_system, experiment_system) not in unique_points:
+                    if (experiment_system, application_system) in unique_points:
+                        points = unique_points[(experiment_system, application_system)][:, ::-1]
+                    else:
+                        points = np.array(generate_points(
+                            unique_paths[application_system], 
+                            unique_paths[experiment_system], 
+                            base_library, 
+                            perturbation_factors, 
+                            num_perturbations,
+                            drop_threshold=drop_threshold
+                        ), dtype=object)
+                    unique_points[(application_system, experiment_system)] = points
+
+                points_array[i, j] = unique_points[(application_system, experiment_system)]
 
         return points_array
     elif isinstance(application_path, list) or isinstance(experiment_path, list):
         raise ValueError("Both application and experiment paths must be lists or neither.")
 
-    # Read the sdfs for the application and experiment
-    if application_path.suffix == '.sdf':
-        application = RegionIntegratedSdfReader(application_path).convert_to_dict('numbers').sdf_data
-        application = { nuclide_name: { reaction_name: reaction['sensitivities'] } \
-                       for nuclide_name, nuclide in application.items() \
-                       for reaction_name, reaction in nuclide.items() }
-    elif application_path.suffix == '.h5':
-        application = read_region_integrated_h5_sdf(application_path)
-    else:
-        raise ValueError("The application path must be either an sdf or h5 file.")
-    
-    if experiment_path.suffix == '.sdf':
-        experiment  = RegionIntegratedSdfReader(experiment_path).convert_to_dict('numbers').sdf_data
-        experiment = { nuclide_name: { reaction_name: reaction['sensitivities'] } \
-                      for nuclide_name, nuclide in experiment.items() \
-                      for reaction_name, reaction in nuclide.items() }
-    elif experiment_path.suffix == '.h5':
-        experiment = read_region_integrated_h5_sdf(experiment_path)
-    else:
-        raise ValueError("The experiment path must be either an sdf or h5 file.")
-    
+    # Read the sdfs for the application and experiment into dictionaries keyed by nuclide ZAID and then reaction MT
+    application, experiment = {}, {}
+    for sensitivities, path, name in [ (application, application_path, 'application'), 
+                                       (experiment, experiment_path, 'experiment') ]:
+        table = _read_sensitivity_table(path, name)
+        if drop_threshold is not None:
+            table = table.drop_insignificant(drop_threshold)
+        for row, (zaid, mt) in enumerate(zip(table.index['zaid'].tolist(), table.index['reaction_mt'].tolist())):
+            sensitivities.setdefault(zaid, {})[mt] = table.uarray(row)
 
     # Filter out redundant reactions, which will introduce bias into the similarity scatter plot
     # Absorption, or "capture" as it's referred to in SCALE and total
@@ -209,58 +1030,30 @@ def generate_points(application_path: Union[Path, List[Path]], experiment_path:
     experiment_nuclide_reactions  = {nuclide: list(reactions.keys()) for nuclide, reactions in experiment.items()}
 
     # Take the union of the nuclide reactions for the application and experiment
-    all_nuclide_reactions = application_nuclide_reactions.copy()
-    all_nuclide_reactions.update(experiment_nuclide_reactions)
-
-    # Make a directory to store all cached cross section libraries if it doesn't already exist
-    if not cache_dir.exists():
-        os.mkdir(cache_dir)
-
-    # Make a directory to store the cached perturbed multigroup libraries if it doesn't already exist
-    library_name = base_library.name
-
-    # Get the base multigroup cross sections for each nuclide reaction and the list of all available nuclide reactions for
-    # caching the sampled perturbed cross sections
+    all_nuclide_reactions = { nuclide: list(reactions) for nuclide, reactions in application_nuclide_reactions.items() }
+    for nuclide, reactions in experiment_nuclide_reactions.items():
+        all_nuclide_reactions.setdefault(nuclide, []).extend( reaction for reaction in reactions \
+                                                              if reaction not in all_nuclide_reactions[nuclide] )
 
-    if not (cache_dir / f'cached_{library_name}.pkl').exists():
-        base_xs, available_nuclide_reactions = read_multigroup_xs(base_library, all_nuclide_reactions, \
-                                                                return_available_nuclide_reactions=True)
-        # Now read all cross sections and cache the base cross section library
-        base_xs = read_multigroup_xs(base_library, available_nuclide_reactions)
-        with open(cache_dir / f'cached_{library_name}.pkl', 'wb') as f:
-            pickle.dump(base_xs, f)
-    else:
-        with open(cache_dir / f'cached_{library_name}.pkl', 'rb') as f:
-            base_xs = pickle.load(f)
-
-        # Get available nuclide reactions
-        available_nuclide_reactions = { nuclide: list( reactions.keys() ) for nuclide, reactions in base_xs.items() }
-
-        # Filter out the desired nuclide reactions
-        base_xs = _filter_by_nuclie_reaction_dict(base_xs, all_nuclide_reactions)
-
-    perturbed_cache = cache_dir / f'cached_{library_name}_perturbations'
-    if not perturbed_cache.exists():
-        os.mkdir(perturbed_cache)
+    # Get the base multigroup cross sections for each nuclide reaction from the perturbation store (only the nuclide reactions
+    # in the library can be perturbed)
+    store = _perturbation_store(base_library)
+    columns = store.columns(all_nuclide_reactions)
+    base_xs = store.as_dict(store.base(columns), columns)
+    all_nuclide_reactions = { nuclide: list( reactions.keys() ) for nuclide, reactions in base_xs.items() }
 
     # --------------------------------
     # Main loop for generating points
     # --------------------------------
-    points = []
-    for i in tqdm(range(1, num_perturbations + 1), desc="Generating perturbation points"):
-        # Cache the perturbed cross section libraries if not already cached
-        perturbed_xs_cache = perturbed_cache / f'perturbed_xs_{i}.pkl'
-        if not perturbed_xs_cache.exists():
-            perturbed_xs = _generate_and_read_perturbed_library(base_library, perturbation_factors, i, \
-                                                               available_nuclide_reactions)
-            with open(perturbed_xs_cache, 'wb') as f:
-                pickle.dump(perturbed_xs, f)
-        else:
-            with open(perturbed_xs_cache, 'rb') as f:
-                perturbed_xs = pickle.load(f)
+    # Generate the perturbed cross section libraries that are not already in the store
+    _write_missing_samples(store, base_library, perturbation_factors, num_perturbations)
 
-        # Now filter out the desired nuclide reactions
-        perturbed_xs = _filter_by_nuclie_reaction_dict(perturbed_xs, all_nuclide_reactions)
+    # Only the columns of the desired nuclide reactions are read, and the next samples are read while the current one is used
+    read = lambda i: store.samples([i], columns)[0]
+    samples = _prefetch(read, range(1, num_perturbations + 1), 8 * len(columns))
+    points = []
+    for i, sample in tqdm(samples, total=num_perturbations, desc="Generating perturbation points"):
+        perturbed_xs = store.as_dict(sample, columns)
 
         # ----------------------------------------------
         # Compute S ⋅ Δσ for application and experiment
@@ -281,8 +1074,8 @@ def generate_points(application_path: Union[Path, List[Path]], experiment_path:
     return points
         
 
-def _cache_perturbed_library(args: Tuple[int, Path, Path, int, Dict[str, List[str]], Path]) -> float:
-    """Caches a single perturbed cross section library.
+def _cache_perturbed_library(args: Tuple[int, Path, Path, Path]) -> float:
+    """Caches a single perturbed cross section library in a :class:`PerturbationStore`.
 
     Parameters
     ----------
@@ -290,31 +1083,26 @@ def _cache_perturbed_library(args: Tuple[int, Path, Path, int, Dict[str, List[st
         A tuple containing all necessary components to perform the caching of a 
         perturbed library.
         
-        - i (int):
-            The sample number to use for generating the perturbed library.
-        - base_library (str | Path):
-            Path to the base cross section library.
-        - perturbation_factors (str | Path):
-            Path to the cross section perturbation factors (used to generate the perturbed libraries).
         - sample_number (int):
             The sample number to use for generating the perturbed library. Must be from 1 - ``NUM_SAMPLES``, where ``NUM_SAMPLES``
             is the number of perturbation factor samples provided in the user's current version of SCALE. 
             (0 :math:`\\leq` ``sample_number`` :math:`\\leq` ``NUM_SAMPLES``)
-        - available_nuclide_reactions (Dict[str, List[str]]):
-            A dictionary containing the nuclide reactions that are read from the perturbed library.
+        - base_library (str | Path):
+            Path to the base cross section library.
+        - perturbation_factors (str | Path):
+            Path to the cross section perturbation factors (used to generate the perturbed libraries).
+        - store_directory (Path):
+            Directory of the perturbation store to write the perturbed library to.
 
     Returns
     -------
         The time taken to cache the perturbed library.
     """    
-    i, base_library, perturbation_factors, sample_number, available_nuclide_reactions, perturbed_cache = args
-    perturbed_xs_cache = perturbed_cache / f'perturbed_xs_{i}.pkl'
-    if not perturbed_xs_cache.exists():
+    sample_number, base_library, perturbation_factors, store_directory = args
+    store = PerturbationStore(store_directory)
+    if not store.written[sample_number - 1]:
         start = time.time()
-        perturbed_xs = _generate_and_read_perturbed_library(base_library, perturbation_factors, sample_number, available_nuclide_reactions)
-        with open(perturbed_xs_cache, 'wb') as f:
-            pickle.dump(perturbed_xs, f)
-        
+        _write_perturbed_sample(store, base_library, perturbation_factors, sample_number)
         end = time.time()
         return end - start
     else:
@@ -345,17 +1133,17 @@ def cache_all_libraries(base_library: Path, perturbation_factors: Path, reset_ca
     * This function will cache the base cross section library and the perturbed cross section libraries in the user's home
       directory under the ``.tsunami_ip_utils_cache`` directory. If the user wishes to reset the cache, they can do so by
       setting the ``reset_cache`` parameter to ``True`` in the :func:`cache_all_libraries` function.
-    * The caches can be `very` large, so make sure that sufficient space is available. For example, caching SCALE's 252-group
-      ENDF-v7.1 library and all of the perturbed libraries currently available in SCALE (1000 samples) requires 48 GB of space,
-      and for ENDF-v8.0, it requires 76 GB of space.
+    * The perturbed libraries are stored as a single dense memory-mapped array of shape ``(num_samples, num_features)`` (see
+      :class:`PerturbationStore`), which takes ``8 * num_samples * num_features`` bytes. For SCALE's 252-group libraries
+      and 1000 samples this is still about 48 GB for ENDF-v7.1 and 76 GB for ENDF-v8.0, roughly the same as the per-sample 
+      pickles of previous versions. The advantage of the store is that only the columns of the nuclide-reactions that are 
+      needed are read from disk, rather than whole libraries. Pickled caches made by previous versions are read into the 
+      store when present.
     * The time taken to cache the libraries can be significant (~5 hours on 6 cores, but this is hardware dependent), but when 
       caching the libraries a progress bar will be displayed with a time estimate.
     * Note, if using ``num_cores`` greater than half the number of cores available on your system, you may experience excessive
       memory usage, so proceed with caution.
     """
-    # Read the base library, use an arbitrary nuclide reaction dict just to get the available reactions
-    all_nuclide_reactions = { '92235': ['18'] } # u-235 fission
-
     # Make a directory to store all cached cross section libraries if it doesn't already exist
     if not cache_dir.exists():
         os.mkdir(cache_dir)
@@ -363,54 +1151,23 @@ def cache_all_libraries(base_library: Path, perturbation_factors: Path, reset_ca
     if reset_cache:
         # Remove all cached cross section libraries
         for f in os.listdir(cache_dir):
-            if f.endswith('_perturbations'): # A perturbed library directory
-                for p in os.listdir(cache_dir / f):
-                    os.remove(cache_dir / f / p)
-            else:
+            if f.endswith('_perturbations') or f.endswith('_store'): # A perturbed library directory or perturbation store
+                shutil.rmtree(cache_dir / f)
+            elif f.startswith('cached_'):
                 os.remove(cache_dir / f)
 
-    # Cache base library if not already cached (requires reading twice)
-    library_name = base_library.name
-    base_library_cache = cache_dir / f'cached_{library_name}.pkl'
+    # Cache base library if not already cached
     print("Reading base library... ")
-    if not base_library_cache.exists():
-        _, available_nuclide_reactions = read_multigroup_xs(base_library, all_nuclide_reactions, \
-                                                                return_available_nuclide_reactions=True)
-
-        start = time.time()
-        print("Caching base library... ", end='')
-        base_xs = read_multigroup_xs(base_library, available_nuclide_reactions)
-        with open( base_library_cache, 'wb') as f:
-            pickle.dump(base_xs, f)
-        end = time.time()
-        print(f"Done in {end - start} seconds")
-    else:
-        with open(cache_dir / f'cached_{library_name}.pkl', 'rb') as f:
-            base_xs = pickle.load(f)
-
-        # Get available nuclide reactions
-        available_nuclide_reactions = { nuclide: list( reactions.keys() ) for nuclide, reactions in base_xs.items() }
-        
-    
-    # Make a directory to store the cached perturbed multigroup libraries if it doesn't already exist
-    perturbed_cache = cache_dir / f'cached_{library_name}_perturbations'
-    if not perturbed_cache.exists():
-        os.mkdir(perturbed_cache)
+    start = time.time()
+    store = _perturbation_store(base_library)
+    print(f"Done in {time.time() - start} seconds")
 
     # ------------------------------------------
     # Main loop for caching perturbed libraries
     # ------------------------------------------
 
-    # Create a pool of worker processes
-    pool = Pool(processes=num_cores)
-
     # Create a list of arguments for each perturbed library
-    args_list = [(i, base_library, perturbation_factors, i, available_nuclide_reactions, perturbed_cache)
-                 for i in range(1, NUM_SAMPLES + 1)]
+    args_list = [(i, base_library, perturbation_factors, store.directory) for i in range(1, store.num_samples + 1)]
 
-    # Use the pool to cache the perturbed libraries in parallel with a progress bar
+    # Use a pool of worker processes to cache the perturbed libraries in parallel with a progress bar
     process_map(_cache_perturbed_library, args_list, max_workers=num_cores // 2, chunksize=1, desc='Caching perturbed libraries')
-
-    # Close the pool
-    pool.close()
-    pool.join()
\ No newline at end of file
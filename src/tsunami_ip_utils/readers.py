@@ -2,16 +2,572 @@ import numpy as np
 from pyparsing import *
 from uncertainties import unumpy, ufloat
 import h5py
+import scipy.sparse as sp
 from pathlib import Path
 from tsunami_ip_utils import config
-from typing import Tuple, List, Union, Dict
+from tsunami_ip_utils import _sdf_cache
+from typing import Tuple, List, Union, Dict, Optional, Iterator, Any
 from string import Template
 from tempfile import NamedTemporaryFile
 import subprocess
 import os
+import re
+import mmap
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 
 ParserElement.enablePackrat()
 
+# ------------------------------------------------------
+# Compiled regular expressions used by the fast SDF engine
+# ------------------------------------------------------
+# A block of lines containing only (fortran formatted) real numbers, e.g. the energy boundaries or the groupwise
+# sensitivities and uncertainties of a profile. The block ends at the first line that does not start with a number.
+_SDF_NUMERIC_BLOCK = r"(?:[ \t]*[-+.\d][-+.\deE \t]*(?:\r?\n|\Z))*"
+
+_SDF_NUM_GROUPS = re.compile(r"(\d+)\s+number of neutron groups")
+_SDF_ENERGY_BOUNDARIES = re.compile(r"energy boundaries:[ \t]*\r?\n(?P<values>" + _SDF_NUMERIC_BLOCK + r")")
+
+# The fixed-layout TSUNAMI-B profile header (three lines), followed by the energy integrated data line
+_SDF_PROFILE_HEADER = (
+    r"^[ \t]*(?P<isotope>[a-z]{1,2}-\d+)[ \t]+(?P<reaction_type>[A-Za-z0-9,']+)[ \t]+(?P<zaid>\d{1,6})"
+        r"[ \t]+(?P<reaction_mt>\d{1,4})[ \t]*\r?\n"
+    r"[ \t]*(?P<zone_number>[-+]?\d+)[ \t]+(?P<zone_volume>[-+]?\d+)[ \t]*\r?\n"
+    r"[^\n]*\n"
+    r"(?P<integrated>[^\n]*)\n"
+)
+
+# A full profile, i.e. the header followed by the groupwise data
+_SDF_PROFILE = re.compile(_SDF_PROFILE_HEADER + r"(?P<values>" + _SDF_NUMERIC_BLOCK + r")", re.MULTILINE)
+
+# Profiles of natural (elemental) nuclides, e.g. carbon in ENDF/B-VII.1 libraries, have no mass number in their name. These are
+# skipped when reading, but kept when converting SDF files to HDF5
+_SDF_ANY_PROFILE = re.compile(_SDF_PROFILE.pattern.replace(r"[a-z]{1,2}-\d+", r"[a-z]{1,2}(?:-\d+)?", 1), re.MULTILINE)
+
+# The remaining descriptive data of an SDF file, which is only needed when converting it to HDF5
+_SDF_PROFILE_COUNTS = re.compile(r"(\d+)\s+number of sensitivity profiles\s+(\d+)\s+are region integrated")
+_SDF_REFERENCE = re.compile(r"^[ \t]*(\S+)[ \t]+\+/-[ \t]+(\S+)[ \t]+([^\n]*?)[ \t]*$", re.MULTILINE)
+
+# Byte patterns used for indexing (memory mapped) SDF files without decoding them
+_SDF_NUM_GROUPS_BYTES = re.compile(_SDF_NUM_GROUPS.pattern.encode())
+_SDF_ENERGY_BOUNDARIES_BYTES = re.compile(_SDF_ENERGY_BOUNDARIES.pattern.encode())
+_SDF_PROFILE_HEADER_BYTES = re.compile(_SDF_PROFILE_HEADER.encode(), re.MULTILINE)
+_SDF_NUMERIC_BLOCK_BYTES = re.compile(_SDF_NUMERIC_BLOCK.encode())
+
+# ------------------------------------------------------
+# Names used to label profiles read from HDF5 SDF files
+# ------------------------------------------------------
+# HDF5 formatted SDF files only store the ZAID and MT of each profile, so the isotope and reaction names that appear in the
+# text format are reconstructed from them
+_ELEMENT_SYMBOLS = (
+    "h he li be b c n o f ne na mg al si p s cl ar k ca sc ti v cr mn fe co ni cu zn ga ge as se br kr rb sr y zr nb mo tc "
+    "ru rh pd ag cd in sn sb te i xe cs ba la ce pr nd pm sm eu gd tb dy ho er tm yb lu hf ta w re os ir pt au hg tl pb bi "
+    "po at rn fr ra ac th pa u np pu am cm bk cf es fm md no lr rf db sg bh hs mt ds rg cn nh fl mc lv ts og"
+).split()
+
+_REACTION_NAMES = {
+    0: 'scatter', 1: 'total', 2: 'elastic', 4: "n,n'", 16: 'n,2n', 17: 'n,3n', 18: 'fission', 101: 'capture', 
+    102: 'n,gamma', 103: 'n,p', 104: 'n,d', 105: 'n,t', 106: 'n,he-3', 107: 'n,alpha', 452: 'nubar', 1018: 'chi'
+}
+
+SDF_ENGINES = ['fast', 'pyparsing']
+"""Available engines for parsing TSUNAMI-B SDF files. ``'fast'`` uses compiled regular expressions and bulk NumPy
+conversion, while ``'pyparsing'`` uses the original (much slower) pyparsing grammar."""
+
+class SensitivityTable:
+    """A columnar representation of a collection of sensitivity profiles. The groupwise sensitivities and their uncertainties
+    are stored as contiguous 2D float arrays (one row per profile), and the descriptive data for each profile (isotope, 
+    reaction, zone, etc.) is stored in a structured index array. This is far more compact than storing each profile as an array
+    of :func:`uncertainties.ufloat` objects, and allows the sensitivity data to be used in array computations directly.
+
+    Examples
+    --------
+    >>> table = RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table
+    >>> table
+    <tsunami_ip_utils.readers.SensitivityTable with 27 profiles and 252 energy groups>
+    >>> table.index[:3]['reaction_type']
+    array(['total', 'elastic', "n,n'"], dtype='<U7')
+    >>> table.values.shape, table.values.dtype
+    ((27, 252), dtype('float64'))
+    >>> fission = table.select(zaids=['92235'], mts=['18'])
+    >>> fission.index['isotope'], fission.index['reaction_type']
+    (array(['u-235'], dtype='<U5'), array(['fission'], dtype='<U7'))
+    """
+    INDEX_NAMES = config.SDF_DATA_NAMES[:6]
+    """Names of the fields of the structured :attr:`index` array, i.e. the descriptive data in ``SDF_DATA_NAMES``."""
+
+    INTEGRATED_NAMES = [
+        "energy_integrated_sensitivity",
+        "energy_integrated_sensitivity_uncertainty",
+        "abs_sum_groupwise_sensitivities",
+        "sum_opposite_sign_groupwise_sensitivities",
+        "sum_opposite_sign_groupwise_sensitivities_uncertainty"
+    ]
+    """Names of the columns of :attr:`integrated_values`."""
+
+    values: np.ndarray
+    """Groupwise sensitivities, shape ``(num_profiles, num_groups)``. Ordered from lowest to highest energy group (i.e. the
+    same order as the cross section values)."""
+
+    sigmas: np.ndarray
+    """Uncertainties of the groupwise sensitivities, shape ``(num_profiles, num_groups)``."""
+
+    index: np.ndarray
+    """Structured array of the descriptive data for each profile, with fields given by :attr:`INDEX_NAMES`."""
+
+    integrated_values: np.ndarray
+    """Energy integrated data for each profile, shape ``(num_profiles, 5)`` with columns given by :attr:`INTEGRATED_NAMES`."""
+
+    def __init__(self, values: np.ndarray, sigmas: np.ndarray, index: np.ndarray, 
+                 integrated_values: Optional[np.ndarray]=None):
+        """Create a sensitivity table from its columns.
+        
+        Parameters
+        ----------
+        values
+            Groupwise sensitivities, shape ``(num_profiles, num_groups)``.
+        sigmas
+            Uncertainties of the groupwise sensitivities, shape ``(num_profiles, num_groups)``.
+        index
+            Structured array of descriptive data for each profile with fields :attr:`INDEX_NAMES`.
+        integrated_values
+            Energy integrated data for each profile, shape ``(num_profiles, 5)``. If not supplied, it is computed from the
+            groupwise data (with zero uncertainty)."""
+        self.values = np.ascontiguousarray(values, dtype=np.float64)
+        self.sigmas = np.ascontiguousarray(sigmas, dtype=np.float64)
+        self.index = index
+        if self.values.shape != self.sigmas.shape or self.values.shape[0] != len(index):
+            raise ValueError("The values, sigmas and index of a sensitivity table must have consistent shapes.")
+
+        if integrated_values is None:
+            integrated = self.values.sum(axis=1)
+            opposite_sign = np.where(np.sign(self.values) == -np.sign(integrated)[:, np.newaxis], self.values, 0).sum(axis=1)
+            integrated_values = np.column_stack([ integrated, np.zeros_like(integrated), np.abs(self.values).sum(axis=1),
+                                                  opposite_sign, np.zeros_like(integrated) ])
+        self.integrated_values = np.ascontiguousarray(integrated_values, dtype=np.float64)
+
+    @classmethod
+    def from_columns(cls, values: np.ndarray, sigmas: np.ndarray, integrated_values: Optional[np.ndarray]=None, 
+                     **index_columns: List) -> 'SensitivityTable':
+        """Create a sensitivity table from the groupwise data and one list per index field.
+        
+        Parameters
+        ----------
+        values
+            Groupwise sensitivities, shape ``(num_profiles, num_groups)``.
+        sigmas
+            Uncertainties of the groupwise sensitivities, shape ``(num_profiles, num_groups)``.
+        integrated_values
+            Energy integrated data for each profile (optional).
+        **index_columns
+            One list for each name in :attr:`INDEX_NAMES`.
+        
+        Returns
+        -------
+            The sensitivity table."""
+        # Empty columns default to the types of non-empty ones (strings for the names and numbers, integers for the zones)
+        default_dtypes = ['U1', 'U1', 'U1', 'U1', np.int64, np.int64]
+        columns = [ np.array(index_columns[name], dtype=None if len(index_columns[name]) > 0 else dtype) \
+                    for name, dtype in zip(cls.INDEX_NAMES, default_dtypes) ]
+        index = np.rec.fromarrays(columns, names=cls.INDEX_NAMES).view(np.ndarray)
+        return cls(values, sigmas, index, integrated_values)
+
+    @classmethod
+    def from_sdf_data(cls, sdf_data: List[dict]) -> 'SensitivityTable':
+        """Create a sensitivity table from a list of sdf profile dictionaries (e.g. :attr:`SdfReader.sdf_data`).
+        
+        Parameters
+        ----------
+        sdf_data
+            List of dictionaries keyed by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`.
+        
+        Returns
+        -------
+            The sensitivity table."""
+        num_groups = len(sdf_data[0]['sensitivities']) if sdf_data else 0
+        values = np.array([ unumpy.nominal_values(profile['sensitivities']) for profile in sdf_data ]).reshape(-1, num_groups)
+        sigmas = np.array([ unumpy.std_devs(profile['sensitivities']) for profile in sdf_data ]).reshape(-1, num_groups)
+        integrated_values = np.array([ [ profile['energy_integrated_sensitivity'].n, profile['energy_integrated_sensitivity'].s,
+                                         profile['abs_sum_groupwise_sensitivities'],
+                                         profile['sum_opposite_sign_groupwise_sensitivities'].n, 
+                                         profile['sum_opposite_sign_groupwise_sensitivities'].s ] for profile in sdf_data ]
+                                    ).reshape(-1, 5)
+        index_columns = { name: [ profile[name] for profile in sdf_data ] for name in cls.INDEX_NAMES }
+        return cls.from_columns(values, sigmas, integrated_values, **index_columns)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.readers.SensitivityTable with {len(self)} profiles and {self.num_groups} energy groups>"
+
+    def __getitem__(self, key: Union[int, slice, np.ndarray, List[int]]) -> 'SensitivityTable':
+        """Select a subset of the profiles. Slices return views of the underlying arrays, while boolean masks and index arrays
+        return copies."""
+        if isinstance(key, (int, np.integer)):
+            key = slice(key, key + 1 if key != -1 else None)
+        return SensitivityTable(self.values[key], self.sigmas[key], self.index[key], self.integrated_values[key])
+
+    @property
+    def num_groups(self) -> int:
+        """Number of energy groups in each profile."""
+        return self.values.shape[1]
+
+    def region_integrated(self) -> 'SensitivityTable':
+        """Returns the region integrated profiles, i.e. those with ``zone_number == 0`` and ``zone_volume == 0``."""
+        return self[ ( self.index['zone_number'] == 0 ) & ( self.index['zone_volume'] == 0 ) ]
+
+    def select(self, reaction_type: str='all', zaids: Optional[List[str]]=None, 
+               mts: Optional[List[str]]=None) -> 'SensitivityTable':
+        """Select the profiles with a given reaction type and/or ZAIDs and reaction MTs.
+        
+        Parameters
+        ----------
+        reaction_type
+            The type of reaction to select. Default is ``'all'`` which selects all reactions.
+        zaids
+            ZAIDs of the nuclides to select. If ``None``, all nuclides are selected.
+        mts
+            Reaction MTs to select. If ``None``, all reactions are selected.
+        
+        Returns
+        -------
+            The selected profiles (in the order they appear in the table)."""
+        mask = np.ones(len(self), dtype=bool)
+        if reaction_type != 'all':
+            mask &= self.index['reaction_type'] == reaction_type
+        if zaids is not None:
+            mask &= np.isin(self.index['zaid'], [ str(zaid) for zaid in zaids ])
+        if mts is not None:
+            mask &= np.isin(self.index['reaction_mt'], [ str(mt) for mt in mts ])
+        return self[mask]
+
+    def drop_insignificant(self, threshold: float=1.0) -> 'SensitivityTable':
+        """Returns a copy of the table where the groupwise sensitivities that are not statistically significant, i.e. with
+        :math:`|S| < k\\sigma` for ``threshold`` :math:`k`, are set to zero (along with their uncertainties). The energy 
+        integrated data is left unchanged.
+
+        Examples
+        --------
+        >>> table = RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table
+        >>> int(np.count_nonzero(table.values)), int(np.count_nonzero(table.drop_insignificant(2).values))
+        (1910, 1164)
+        
+        Parameters
+        ----------
+        threshold
+            The multiple :math:`k` of the uncertainty below which sensitivities are dropped. Default is ``1``.
+        
+        Returns
+        -------
+            The table with the insignificant sensitivities dropped."""
+        significant = np.abs(self.values) >= threshold * self.sigmas
+        return SensitivityTable(np.where(significant, self.values, 0.0), np.where(significant, self.sigmas, 0.0), self.index, 
+                                self.integrated_values)
+
+    def uarray(self, row: int) -> unumpy.uarray:
+        """Returns the sensitivity profile in the given row as a :func:`uncertainties.unumpy.uarray`."""
+        return unumpy.uarray(self.values[row], self.sigmas[row])
+
+    def profile(self, row: int) -> dict:
+        """Returns the profile in the given row as a dictionary keyed by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`
+        (excluding ``'uncertainties'``), i.e. the same format as an entry of :attr:`SdfReader.sdf_data`."""
+        profile = dict(zip(self.INDEX_NAMES, self.index[row].tolist()))
+        integrated = self.integrated_values[row].tolist()
+        profile.update({
+            'energy_integrated_sensitivity': ufloat(integrated[0], integrated[1]),
+            'abs_sum_groupwise_sensitivities': integrated[2],
+            'sum_opposite_sign_groupwise_sensitivities': ufloat(integrated[3], integrated[4]),
+            'sensitivities': self.uarray(row),
+        })
+        return profile
+
+    def to_sdf_data(self) -> List[dict]:
+        """Converts the table to a list of profile dictionaries (see :meth:`profile`)."""
+        return [ self.profile(row) for row in range(len(self)) ]
+
+
+class FeatureRegistry:
+    """A registry of the sensitivity profiles (identified by their ZAID, reaction MT and zone) of a set of systems, which maps 
+    each (profile, energy group) pair, i.e. each nuclide-reaction-group feature, to a stable column of a shared feature space. 
+    Profiles are assigned consecutive positions in the order they are first registered, and registering new profiles never
+    changes the columns of existing ones, so a registry can be extended with new systems and saved to reuse the same 
+    feature space across sessions (e.g. for cached datasets).
+
+    Examples
+    --------
+    >>> table = RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table
+    >>> registry = FeatureRegistry(table.num_groups)
+    >>> registry.extend(table.select(zaids=['92235'], mts=['18', '102']))
+    array([0, 1])
+    >>> registry.extend(table)[10:17]
+    array([12, 13, 14,  0, 15,  1, 16])
+    >>> registry
+    <tsunami_ip_utils.readers.FeatureRegistry of 27 profiles and 252 energy groups>
+    >>> registry.columns(table.select(zaids=['92235'], mts=['102']))[0, :3]
+    array([252, 253, 254])
+    """
+    num_groups: int
+    """Number of energy groups in each profile."""
+
+    KEY_NAMES = ['zaid', 'reaction_mt', 'zone_number', 'zone_volume']
+    """Fields of ``SensitivityTable.INDEX_NAMES`` that identify a profile."""
+
+    def __init__(self, num_groups: int, index: Optional[np.ndarray]=None):
+        """Create a registry, optionally with the given (already registered) profiles.
+        
+        Parameters
+        ----------
+        num_groups
+            Number of energy groups in each profile.
+        index
+            Structured array of the descriptive data of registered profiles, with fields ``SensitivityTable.INDEX_NAMES``, in
+            the order of their positions."""
+        self.num_groups = num_groups
+        self._indices = []
+        self._positions = {}
+        if index is not None:
+            self._register(index)
+
+    def _register(self, index: np.ndarray) -> np.ndarray:
+        """Registers any new profiles in ``index`` and returns the positions of all of its profiles."""
+        keys = zip(*[ index[name].tolist() for name in self.KEY_NAMES ])
+        positions = np.empty(len(index), dtype=np.int64)
+        new_rows = []
+        for row, key in enumerate(keys):
+            position = self._positions.get(key)
+            if position is None:
+                position = self._positions[key] = len(self._positions)
+                new_rows.append(row)
+            positions[row] = position
+        if new_rows:
+            self._indices.append(index[new_rows])
+        return positions
+
+    def __len__(self) -> int:
+        return self.num_features
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.readers.FeatureRegistry of {self.num_profiles} profiles and {self.num_groups} energy groups>"
+
+    @property
+    def num_profiles(self) -> int:
+        """Number of registered profiles."""
+        return len(self._positions)
+
+    @property
+    def num_features(self) -> int:
+        """Number of columns of the feature space, i.e. ``num_profiles * num_groups``."""
+        return self.num_profiles * self.num_groups
+
+    @property
+    def index(self) -> np.ndarray:
+        """Structured array of the descriptive data of the registered profiles (with fields ``SensitivityTable.INDEX_NAMES``)
+        in the order of their positions."""
+        if len(self._indices) > 1:
+            self._indices = [ np.concatenate(self._indices) ]
+        return self._indices[0].copy() if self._indices else SensitivityTable.from_columns(
+            np.empty((0, 0)), np.empty((0, 0)), **{ name: [] for name in SensitivityTable.INDEX_NAMES }).index
+
+    def extend(self, table: SensitivityTable) -> np.ndarray:
+        """Registers the profiles of a sensitivity table that are not registered yet.
+        
+        Parameters
+        ----------
+        table
+            The sensitivity table, which must have :attr:`num_groups` energy groups.
+        
+        Returns
+        -------
+            The position of each profile (row) of the table in the registry."""
+        if len(table) > 0 and table.num_groups != self.num_groups:
+            raise ValueError(f"The sensitivity table has {table.num_groups} energy groups, but the registry has "
+                             f"{self.num_groups}.")
+        return self._register(table.index)
+
+    def positions(self, table: SensitivityTable) -> np.ndarray:
+        """Returns the position of each profile (row) of a sensitivity table in the registry. Unlike :meth:`extend`, all of the
+        profiles must already be registered."""
+        keys = zip(*[ table.index[name].tolist() for name in self.KEY_NAMES ])
+        try:
+            return np.array([ self._positions[key] for key in keys ], dtype=np.int64)
+        except KeyError as error:
+            raise ValueError(f"The profile {error.args[0]} is not in the registry.") from None
+
+    def columns(self, table: SensitivityTable) -> np.ndarray:
+        """Returns the columns of the feature space of each (profile, group) entry of a sensitivity table, shape 
+        ``(len(table), num_groups)``."""
+        return self.positions(table)[:, np.newaxis] * self.num_groups + np.arange(self.num_groups)
+
+    def save(self, filename: Union[str, Path]) -> None:
+        """Saves the registry to a ``.npz`` file, which can be loaded with :meth:`load`."""
+        np.savez(filename, index=self.index, num_groups=self.num_groups)
+
+    @classmethod
+    def load(cls, filename: Union[str, Path]) -> 'FeatureRegistry':
+        """Loads a registry saved with :meth:`save`.
+
+        Examples
+        --------
+        >>> import tempfile, os
+        >>> registry = FeatureRegistry(252, RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table.index)
+        >>> with tempfile.TemporaryDirectory() as directory:
+        ...     registry.save(os.path.join(directory, 'registry.npz'))
+        ...     loaded = FeatureRegistry.load(os.path.join(directory, 'registry.npz'))
+        >>> loaded.num_features, np.array_equal(loaded.index, registry.index)
+        (6804, True)
+        """
+        with np.load(filename, allow_pickle=False) as data:
+            return cls(int(data['num_groups']), data['index'])
+
+
+class SensitivityStack:
+    """The sensitivity profiles of several systems, aligned on a common set of profiles and stacked into 3D arrays (one slice
+    per system). Profiles are identified by their ZAID, reaction MT and zone, and a profile that is missing from a system is 
+    filled with zeros, so that the stacked arrays can be used directly in array computations over all systems.
+
+    Examples
+    --------
+    >>> tables = [ RegionIntegratedSdfReader(filename).table for filename in 
+    ...            ['tests/example_files/sphere_model_1.sdf', 'tests/example_files/sphere_model_1.sdf'] ]
+    >>> stack = SensitivityStack(tables)
+    >>> stack
+    <tsunami_ip_utils.readers.SensitivityStack of 2 systems with 27 profiles and 252 energy groups>
+    >>> stack.values.shape
+    (2, 27, 252)
+    >>> stack[1]
+    <tsunami_ip_utils.readers.SensitivityTable with 27 profiles and 252 energy groups>
+
+    Since most groupwise sensitivities are exactly zero (and a profile that is missing from a system is entirely zero), the 
+    stack can also be stored sparsely, with one row of flattened profiles per system
+
+    >>> sparse_stack = SensitivityStack(tables, sparse=True)
+    >>> sparse_stack.values.shape, sparse_stack.values.nnz
+    ((2, 6804), 3820)
+    >>> np.array_equal(sparse_stack[1].values, stack[1].values)
+    True
+    """
+    filenames: List[Union[str, Path]]
+    """Paths to the files of each system (empty if the stack was not read from files)."""
+
+    index: np.ndarray
+    """Structured array of the descriptive data for each (aligned) profile, with fields ``SensitivityTable.INDEX_NAMES``."""
+
+    values: Union[np.ndarray, sp.csr_array]
+    """Groupwise sensitivities, shape ``(num_systems, num_profiles, num_groups)``. If the stack is :attr:`sparse`, this is
+    instead a ``scipy.sparse.csr_array`` of shape ``(num_systems, num_profiles * num_groups)`` (i.e. the profiles of each
+    system are flattened into a single row)."""
+
+    sigmas: Union[np.ndarray, sp.csr_array]
+    """Uncertainties of the groupwise sensitivities (same shape and storage as :attr:`values`, and for a sparse stack, the same
+    sparsity structure)."""
+
+    integrated_values: np.ndarray
+    """Energy integrated data, shape ``(num_systems, num_profiles, 5)`` with columns ``SensitivityTable.INTEGRATED_NAMES``."""
+
+    present: np.ndarray
+    """Boolean array of shape ``(num_systems, num_profiles)`` which is ``True`` where a system actually has the profile."""
+
+    registry: FeatureRegistry
+    """The feature registry that the profiles are aligned with. The profiles of the stack are the first ``num_profiles`` 
+    profiles of the registry (it may have been extended since)."""
+
+    def __init__(self, tables: List[SensitivityTable], filenames: Optional[List[Union[str, Path]]]=None, 
+                 sparse: bool=False, registry: Optional[FeatureRegistry]=None):
+        """Align and stack the given sensitivity tables.
+        
+        Parameters
+        ----------
+        tables
+            Sensitivity tables of each system. All tables must have the same number of energy groups.
+        filenames
+            Paths to the files that each table was read from (optional).
+        sparse
+            Whether to store the groupwise data as sparse matrices. Only the groups with a nonzero sensitivity or uncertainty
+            are stored, and the dense 3D arrays are never created. Default is ``False``.
+        registry
+            A feature registry to align the profiles with (any profiles that are not registered yet are added to it), e.g. one
+            that was loaded with :meth:`FeatureRegistry.load`, so that the columns of the stack match a previously used 
+            feature space. By default, a new registry is created, which orders the profiles by their first appearance."""
+        if len({ table.num_groups for table in tables }) > 1:
+            raise ValueError("All sensitivity tables must have the same number of energy groups to be stacked.")
+        self.filenames = list(filenames) if filenames is not None else []
+        if registry is None:
+            registry = FeatureRegistry(tables[0].num_groups if tables else 0)
+        self.registry = registry
+        self._num_groups = registry.num_groups
+
+        # Each system is scattered into the shared feature space exactly once
+        rows = [ registry.extend(table) for table in tables ]
+        self.index = registry.index
+        self.integrated_values = np.zeros((len(tables), len(self.index), 5))
+        self.present = np.zeros((len(tables), len(self.index)), dtype=bool)
+        for system, (table, table_rows) in enumerate(zip(tables, rows)):
+            self.integrated_values[system, table_rows] = table.integrated_values
+            self.present[system, table_rows] = True
+
+        if sparse:
+            self.values, self.sigmas = self._stack_sparse(tables, rows)
+            return
+
+        self.values = np.zeros((len(tables), len(self.index), self._num_groups))
+        self.sigmas = np.zeros_like(self.values)
+        for system, (table, table_rows) in enumerate(zip(tables, rows)):
+            self.values[system, table_rows] = table.values
+            self.sigmas[system, table_rows] = table.sigmas
+
+    def _stack_sparse(self, tables: List[SensitivityTable], rows: List[np.ndarray]
+                      ) -> Tuple[sp.csr_array, sp.csr_array]:
+        """Builds the sparse (CSR) sensitivity and uncertainty matrices from the nonzero groups of each table, where ``rows``
+        are the positions of each table's profiles in :attr:`index`."""
+        system_indices, columns, values, sigmas = [], [], [], []
+        for system, (table, table_rows) in enumerate(zip(tables, rows)):
+            profile_indices, groups = np.nonzero(( table.values != 0 ) | ( table.sigmas != 0 ))
+            system_indices.append(np.full(len(groups), system))
+            columns.append(table_rows[profile_indices] * self._num_groups + groups)
+            values.append(table.values[profile_indices, groups])
+            sigmas.append(table.sigmas[profile_indices, groups])
+
+        shape = (len(tables), len(self.index) * self._num_groups)
+        coordinates = (np.concatenate(system_indices), np.concatenate(columns)) if tables else ([], [])
+        values = sp.coo_array((np.concatenate(values) if tables else [], coordinates), shape=shape).tocsr()
+        sigmas = sp.coo_array((np.concatenate(sigmas) if tables else [], coordinates), shape=shape).tocsr()
+        return values, sigmas
+
+    def __len__(self) -> int:
+        return self.values.shape[0]
+
+    def __repr__(self) -> str:
+        return f"<tsunami_ip_utils.readers.SensitivityStack of {len(self)} systems with {len(self.index)} profiles and " \
+               f"{self.num_groups} energy groups>"
+
+    def __getitem__(self, system: int) -> SensitivityTable:
+        """Returns the (aligned) sensitivity table of the given system."""
+        if self.sparse:
+            shape = (len(self.index), self.num_groups)
+            return SensitivityTable(self.values[[system]].toarray().reshape(shape), 
+                                    self.sigmas[[system]].toarray().reshape(shape), self.index, self.integrated_values[system])
+        return SensitivityTable(self.values[system], self.sigmas[system], self.index, self.integrated_values[system])
+
+    @property
+    def num_groups(self) -> int:
+        """Number of energy groups in each profile."""
+        return self._num_groups
+
+    @property
+    def sparse(self) -> bool:
+        """Whether the groupwise data is stored as sparse matrices."""
+        return sp.issparse(self.values)
+
+    def flatten(self) -> Tuple[Union[np.ndarray, sp.csr_array], Union[np.ndarray, sp.csr_array]]:
+        """Returns the sensitivity vector of each system (i.e. its profiles concatenated together) and their uncertainties, 
+        both with shape ``(num_systems, num_profiles * num_groups)``. These are views for a dense stack, and the stored
+        matrices for a sparse stack."""
+        if self.sparse:
+            return self.values, self.sigmas
+        return self.values.reshape(len(self), -1), self.sigmas.reshape(len(self), -1)
+
+
 class SdfReader:
     """A class for reading TSUNAMI-B Sentitivity Data Files (SDFs, i.e. ``.sdf`` files produced by TSUNAMI-3D monte carlo
     transport simulations).
@@ -29,15 +585,98 @@ class SdfReader:
     sdf_data: List[dict]
     """List of dictionaries containing the sensitivity profiles and other derived/descriptive data. The dictionary
             keys are given by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`."""
-    def __init__(self, filename: Union[str, Path]):
+    def __init__(self, filename: Union[str, Path], engine: str='fast'):
         """Create a TSUNAMI-B SDF reader object from the given filename
         
         Parameters
         ----------
         filename
-            Path to the sdf file."""
-        self.energy_boundaries, self.sdf_data = self._read_sdf(filename)
+            Path to the sdf file.
+        engine
+            The parsing engine to use. Default is ``'fast'``, which tokenizes the fixed-layout profile headers with compiled
+            regular expressions and converts the groupwise data in bulk with NumPy. ``'pyparsing'`` uses the original pyparsing
+            grammar. Both engines produce identical ``sdf_data``."""
+        if engine == 'fast':
+            self.energy_boundaries, self.sdf_data = self._read_sdf_fast(filename)
+        elif engine == 'pyparsing':
+            self.energy_boundaries, self.sdf_data = self._read_sdf(filename)
+        else:
+            raise ValueError(f"Invalid SDF engine '{engine}'. Available engines are: {SDF_ENGINES}")
+        
+    def _read_sdf_fast(self, filename: Union[str, Path]) -> Tuple[np.ndarray, List[dict]]:
+        """Reads the SDF file using compiled regular expressions for the profile headers and bulk NumPy conversion of the
+        groupwise data. The output is identical to :meth:`_read_sdf`.
+        
+        Parameters
+        ----------
+        filename
+            Path to the sdf file.
+        
+        Returns
+        -------
+        energy_boundaries
+            Energy boundaries for the energy groups.
+        sdf_data
+            List of dictionaries containing the sensitivity profiles and other derived/descriptive data. The dictionary
+            keys are given by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`."""
+        energy_boundaries, table = self._read_sdf_table(filename)
+        return energy_boundaries, table.to_sdf_data()
+
+    @staticmethod
+    def _read_sdf_table(filename: Union[str, Path], natural_isotopes: bool=False) -> Tuple[np.ndarray, SensitivityTable]:
+        """Reads the SDF file into a :class:`SensitivityTable` using compiled regular expressions for the profile headers and 
+        bulk NumPy conversion of the groupwise data.
         
+        Parameters
+        ----------
+        filename
+            Path to the sdf file.
+        natural_isotopes
+            Whether to also read the profiles of natural (elemental) nuclides, whose names have no mass number (e.g. ``'c'``).
+            These are skipped by default, as in :meth:`_read_sdf`.
+        
+        Returns
+        -------
+        energy_boundaries
+            Energy boundaries for the energy groups.
+        table
+            All of the sensitivity profiles in the sdf file."""
+        with open(filename, 'r') as f:
+            data = f.read()
+
+        num_groups_match = _SDF_NUM_GROUPS.search(data)
+        energy_boundaries_match = _SDF_ENERGY_BOUNDARIES.search(data)
+        if num_groups_match is None or energy_boundaries_match is None:
+            raise ValueError(f"The file {filename} does not appear to be a TSUNAMI-B formatted SDF file.")
+        
+        num_groups = int(num_groups_match.group(1))
+        energy_boundaries = np.array(energy_boundaries_match.group('values').split(), dtype=np.float64)
+
+        # Tokenize the headers of all profiles, and collect the numeric blocks so that they can be converted all at once
+        profile_pattern = _SDF_ANY_PROFILE if natural_isotopes else _SDF_PROFILE
+        profiles = list(profile_pattern.finditer(data, energy_boundaries_match.end()))
+        integrated_tokens = [ profile.group('integrated').split() for profile in profiles ]
+        value_tokens = [ profile.group('values').split() for profile in profiles ]
+        if any( len(tokens) != 2*num_groups for tokens in value_tokens ):
+            raise ValueError(f"The file {filename} contains a sensitivity profile that does not have {num_groups} groupwise "
+                             "sensitivities and uncertainties.")
+
+        integrated_values = np.array(list(chain.from_iterable(integrated_tokens)), dtype=np.float64).reshape(-1, 5)
+        values = np.array(list(chain.from_iterable(value_tokens)), dtype=np.float64).reshape(-1, 2, num_groups)
+
+        # NOTE: The sensitivities are read from largest to smallest energy group, so they are reversed to correspond to the
+        # cross section values
+        table = SensitivityTable.from_columns(
+            values[:, 0, ::-1], values[:, 1, ::-1], integrated_values,
+            isotope=[ profile.group('isotope') for profile in profiles ],
+            reaction_type=[ profile.group('reaction_type') for profile in profiles ],
+            zaid=[ profile.group('zaid') for profile in profiles ],
+            reaction_mt=[ profile.group('reaction_mt') for profile in profiles ],
+            zone_number=[ int(profile.group('zone_number')) for profile in profiles ],
+            zone_volume=[ int(profile.group('zone_volume')) for profile in profiles ]
+        )
+        return energy_boundaries, table
+
     def _read_sdf(self, filename: Union[str, Path]) -> Tuple[np.ndarray, List[dict]]:
         """Reads the SDF file and returns a dictionary of nuclide-reaction pairs and energy-dependent
         sensitivities (with uncertainties)
@@ -135,19 +774,46 @@ class RegionIntegratedSdfReader(SdfReader):
 
     filename: Union[str, Path]
     """Path to the sdf file."""
+
+    engine: str
+    """The parsing engine used to read the sdf file."""
+
+    table: SensitivityTable
+    """Columnar representation of the region integrated sdf profiles. This is the primary storage of the sensitivity data,
+    :attr:`sdf_data` is only created from it when first accessed."""
     
-    sdf_data: Union[List[dict], Dict[str, Dict[str, dict]]]
-    """Collection of region integrated sdf profiles. Only includes SDF profiles with ``zone_number == 0`` and ``zone_volume == 0`` 
-    This can either be a list or a twice-nested dictionary (keyed by first by 
-    nuclide and then reaction type) of dictionaries keyed by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`."""
+    @property
+    def sdf_data(self) -> Union[List[dict], Dict[str, Dict[str, dict]]]:
+        """Collection of region integrated sdf profiles. Only includes SDF profiles with ``zone_number == 0`` and ``zone_volume == 0`` 
+        This can either be a list or a twice-nested dictionary (keyed by first by 
+        nuclide and then reaction type) of dictionaries keyed by ``SDF_DATA_NAMES`` = :globalparam:`SDF_DATA_NAMES`."""
+        if self._sdf_data is None:
+            self._sdf_data = self.table.to_sdf_data()
+        return self._sdf_data
     
-    def __init__(self, filename: Union[str, Path]):
+    @sdf_data.setter
+    def sdf_data(self, sdf_data: Union[List[dict], Dict[str, Dict[str, dict]]]):
+        self._sdf_data = sdf_data
+
+    def __init__(self, filename: Union[str, Path], engine: str='fast', cache: Optional[bool]=None, 
+                 cache_dir: Optional[Union[str, Path]]=None, sdf_cache_max_size: Optional[int]=None):
         """Create a TSUNAMI-B region integrated SDF reader object from the given filename
         
         Parameters
         ----------
         filename:
             Path to the sdf file.
+        engine
+            The parsing engine to use, one of ``SDF_ENGINES`` (default is ``'fast'``).
+        cache
+            Whether to use the on-disk SDF cache. If the file has been cached (and has not changed since), its sensitivity data 
+            is memory mapped from the cache instead of being parsed, otherwise the file is parsed and then cached. Default is 
+            ``None``, which uses ``config.sdf_cache``.
+        cache_dir
+            Directory containing the SDF cache (under ``cache_dir / 'sdf_cache'``). Default is ``None``, which uses 
+            ``config.cache_dir``.
+        sdf_cache_max_size
+            Maximum size of the SDF cache in bytes. Default is ``None``, which uses ``config.sdf_cache_max_size``.
             
         Examples
         --------
@@ -267,12 +933,37 @@ class RegionIntegratedSdfReader(SdfReader):
                1.500e-03, 1.200e-03, 1.000e-03, 7.500e-04, 5.000e-04, 1.000e-04,
                1.000e-05])
         """
-        super().__init__(filename)
-        
-        # Now only return the region integrated sdf profiles
-        # i.e. those with zone number and zone volume both equal to 0
         self.filename = filename
-        self.sdf_data = [ match for match in self.sdf_data if match['zone_number'] == 0 and match['zone_volume'] == 0 ]
+        self.engine = engine
+        cache = config.sdf_cache if cache is None else cache
+
+        cached_arrays = _sdf_cache._load(filename, cache_dir) if cache else None
+        if cached_arrays is not None:
+            self.energy_boundaries = cached_arrays['energy_boundaries']
+            self.table = SensitivityTable(cached_arrays['values'], cached_arrays['sigmas'], cached_arrays['index'], 
+                                          cached_arrays['integrated_values'])
+        else:
+            if engine == 'fast':
+                self.energy_boundaries, table = self._read_sdf_table(filename)
+            else:
+                super().__init__(filename, engine)
+                table = SensitivityTable.from_sdf_data(self.sdf_data)
+            
+            # Now only return the region integrated sdf profiles
+            # i.e. those with zone number and zone volume both equal to 0
+            self.table = table.region_integrated()
+
+            if cache:
+                _sdf_cache._store(filename, {
+                    'energy_boundaries': self.energy_boundaries,
+                    'values': self.table.values,
+                    'sigmas': self.table.sigmas,
+                    'index': self.table.index,
+                    'integrated_values': self.table.integrated_values
+                }, cache_dir, sdf_cache_max_size)
+
+        # The dictionary representation of the profiles is created lazily from the table
+        self.sdf_data = None
     
     def __repr__(self):
         return f"<tsunami_ip_utils.readers.RegionIntegratedSdfReader object from {self.filename}>"
@@ -436,12 +1127,9 @@ class RegionIntegratedSdfReader(SdfReader):
                2.231817e-05+/-7.640867e-06, 3.150126e-06+/-3.827818e-06,
                9.240951e-08+/-1.080839e-07, 0.0+/-0, 0.0+/-0, 0.0+/-0],
               dtype=object)"""
-        if type(self.sdf_data) == list:
-            if reaction_type == 'all':
-                return [ data['sensitivities'] for data in RegionIntegratedSdfReader(self.filename).sdf_data ]
-            else:
-                return [ data['sensitivities'] for data in RegionIntegratedSdfReader(self.filename).sdf_data \
-                        if data['reaction_type'] == reaction_type ]
+        if self._sdf_data is None or type(self._sdf_data) == list:
+            table = self.table.select(reaction_type)
+            return [ table.uarray(row) for row in range(len(table)) ]
         elif type(self.sdf_data) == dict:
             if reaction_type == 'all':
                 return [ reaction['sensitivities'] for isotope in self.sdf_data.values() for reaction in isotope.values() ]
@@ -451,13 +1139,336 @@ class RegionIntegratedSdfReader(SdfReader):
         else:
             raise ValueError("Invalid data type for sdf_data. How did that happen?")
 
+class LazySdfReader:
+    """Reads only the requested sensitivity profiles from a TSUNAMI-B SDF file. When created, the reader makes a single pass over
+    the (memory mapped) file which only tokenizes the profile headers and records the byte offset of each profile's data. The
+    groupwise data is then only decoded for the profiles requested with :meth:`read`, so the cost of a partial read is
+    proportional to the amount of data requested rather than to the size of the file.
+
+    Examples
+    --------
+    >>> reader = LazySdfReader('tests/example_files/sphere_model_1.sdf')
+    >>> len(reader)
+    81
+    >>> table = reader.read({'92235': ['18', '452']})
+    >>> table.index['reaction_type']
+    array(['fission', 'nubar'], dtype='<U7')
+    >>> table.values[0, -5:].tolist()
+    [4.487634e-05, 2.314977e-06, 0.0, 0.0, 0.0]
+    """
+    filename: Union[str, Path]
+    """Path to the sdf file."""
+
+    num_groups: int
+    """Number of energy groups in each profile."""
+
+    energy_boundaries: np.ndarray
+    """Boundaries for the energy groups"""
+
+    index: np.ndarray
+    """Structured array describing every profile in the file, with the fields ``SensitivityTable.INDEX_NAMES`` and
+    ``'offset'``, the byte offset of the energy integrated data line of the profile."""
+
+    def __init__(self, filename: Union[str, Path]):
+        """Index the profiles in a TSUNAMI-B SDF file.
+        
+        Parameters
+        ----------
+        filename
+            Path to the sdf file."""
+        self.filename = filename
+        with open(filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            num_groups_match = _SDF_NUM_GROUPS_BYTES.search(data)
+            energy_boundaries_match = _SDF_ENERGY_BOUNDARIES_BYTES.search(data)
+            if num_groups_match is None or energy_boundaries_match is None:
+                raise ValueError(f"The file {filename} does not appear to be a TSUNAMI-B formatted SDF file.")
+            
+            self.num_groups = int(num_groups_match.group(1))
+            self.energy_boundaries = np.array(energy_boundaries_match.group('values').split(), dtype=np.float64)
+
+            headers = [ ( header.group('isotope').decode(), header.group('reaction_type').decode(), header.group('zaid').decode(),
+                          header.group('reaction_mt').decode(), int(header.group('zone_number')), 
+                          int(header.group('zone_volume')), header.start('integrated') ) 
+                        for header in _SDF_PROFILE_HEADER_BYTES.finditer(data, energy_boundaries_match.end()) ]
+        
+        columns = list(zip(*headers)) if headers else [ [] for _ in range(7) ]
+        default_dtypes = ['U1', 'U1', 'U1', 'U1', np.int64, np.int64, np.int64]
+        columns = [ np.array(column, dtype=None if len(column) > 0 else dtype) for column, dtype in zip(columns, default_dtypes) ]
+        self.index = np.rec.fromarrays(columns, names=SensitivityTable.INDEX_NAMES + ['offset']).view(np.ndarray)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __repr__(self):
+        return f"<tsunami_ip_utils.readers.LazySdfReader object from {self.filename}>"
+
+    def select(self, nuclide_reactions: Optional[Dict[str, List[str]]]=None, region_integrated: bool=True, 
+               zone_numbers: Optional[List[int]]=None) -> np.ndarray:
+        """Returns the rows of :attr:`index` matching the given nuclide-reactions and zone filters.
+        
+        Parameters
+        ----------
+        nuclide_reactions
+            Dictionary keyed by nuclide ZAID with a list of the reaction MTs to select for each nuclide. A list of ``'all'`` 
+            selects all reactions of a nuclide. If ``None``, all nuclide-reactions are selected.
+        region_integrated
+            Whether to only select region integrated profiles (i.e. with ``zone_number == 0`` and ``zone_volume == 0``). 
+            Default is ``True``.
+        zone_numbers
+            Zone numbers to select. If ``None``, profiles from all zones are selected.
+        
+        Returns
+        -------
+            Row numbers of the selected profiles (in the order they appear in the file)."""
+        mask = _nuclide_reaction_mask(self.index, nuclide_reactions, region_integrated)
+        if zone_numbers is not None:
+            mask &= np.isin(self.index['zone_number'], zone_numbers)
+        return np.flatnonzero(mask)
+
+    def read(self, nuclide_reactions: Optional[Dict[str, List[str]]]=None, region_integrated: bool=True,
+             zone_numbers: Optional[List[int]]=None) -> SensitivityTable:
+        """Decodes the requested profiles. The arguments are the same as for :meth:`select`.
+        
+        Returns
+        -------
+            The requested profiles."""
+        rows = self.select(nuclide_reactions, region_integrated, zone_numbers)
+        integrated_tokens = []
+        value_tokens = []
+        with open(self.filename, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for offset in self.index['offset'][rows].tolist():
+                line_end = data.find(b'\n', offset)
+                integrated_tokens.append(data[offset:line_end].split())
+
+                block = _SDF_NUMERIC_BLOCK_BYTES.match(data, line_end + 1).group(0).split()
+                if len(block) != 2*self.num_groups:
+                    raise ValueError(f"The file {self.filename} contains a sensitivity profile that does not have "
+                                     f"{self.num_groups} groupwise sensitivities and uncertainties.")
+                value_tokens.append(block)
+
+        integrated_values = np.array(list(chain.from_iterable(integrated_tokens)), dtype=np.float64).reshape(-1, 5)
+        values = np.array(list(chain.from_iterable(value_tokens)), dtype=np.float64).reshape(-1, 2, self.num_groups)
+
+        # NOTE: The sensitivities are read from largest to smallest energy group, so they are reversed to correspond to the
+        # cross section values
+        index = self.index[rows]
+        index = np.rec.fromarrays([ index[name] for name in SensitivityTable.INDEX_NAMES ], 
+                                  names=SensitivityTable.INDEX_NAMES).view(np.ndarray)
+        return SensitivityTable(values[:, 0, ::-1], values[:, 1, ::-1], index, integrated_values)
+
+class ScaleOutputIndex:
+    """An index of the sections of a SCALE (e.g. TSUNAMI-IP or TSUNAMI-3D) ``.out`` file. When created, the (memory mapped) file is
+    searched for the known section titles in :attr:`SECTIONS`, and the byte offset of every occurrence of each title is
+    recorded. Readers can then jump directly to the sections they need, so reading several kinds of results from one
+    output file only requires one scan of the file.
+
+    Examples
+    --------
+    >>> index = ScaleOutputIndex('examples/data/tsunami_ip_hmf.out')
+    >>> len(index.offsets['integral_values']), len(index.offsets['uncertainty_contributions'])
+    (12, 12)
+    >>> next(index.lines('integral_values', 1)).strip()
+    'Integral Values for Application #2'
+    """
+    SECTIONS = {
+        'integral_values': "Integral Values for Application #",
+        'extended_uncertainty_edit': "Extended Uncertainty Edit for Application",
+        'uncertainty_contributions': 
+            "contributions to uncertainty in keff ( % dk/k ) by individual energy covariance matrices:",
+        'tsunami_3d_uncertainty_contributions': 
+            "contributions to uncertainty in k-eff (% delta-k/k) by individual energy covariance matrices:",
+        'extended_ck_edit': "Extended c(k) Edit for Application",
+        'ck_contributions': "contributions to c(k) by individual energy covariance matrices",
+    }
+    """The indexed sections, keyed by name, with the title that starts each section. ``'uncertainty_contributions'`` are the
+    covariance-wise uncertainty contributions in TSUNAMI-IP extended uncertainty edits, while 
+    ``'tsunami_3d_uncertainty_contributions'`` are those printed by TSUNAMI-3D."""
+
+    filename: Union[str, Path]
+    """Path to the output file."""
+
+    offsets: Dict[str, np.ndarray]
+    """Byte offsets of the start of the first line of each occurrence of each section (in the order they appear in the file), 
+    keyed by the names in :attr:`SECTIONS`."""
+
+    def __init__(self, filename: Union[str, Path]):
+        """Index the sections of a SCALE output file.
+        
+        Parameters
+        ----------
+        filename
+            Path to the output file."""
+        self.filename = filename
+        offsets = { name: [] for name in self.SECTIONS }
+        with open(filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > 0:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    # NOTE: Searching for each (literal) title with mmap.find is several times faster than a single regular
+                    # expression pass matching any of the titles
+                    for name, title in self.SECTIONS.items():
+                        title = title.encode()
+                        position = data.find(title)
+                        while position != -1:
+                            offsets[name].append(data.rfind(b'\n', 0, position) + 1)
+                            position = data.find(title, position + len(title))
+        self.offsets = { name: np.array(section_offsets, dtype=np.int64) for name, section_offsets in offsets.items() }
+        self._section_starts = np.sort(np.concatenate(list(self.offsets.values())))
+
+    def __repr__(self):
+        return f"<tsunami_ip_utils.readers.ScaleOutputIndex object from {self.filename}>"
+
+    def lines(self, section: str, occurrence: int=0) -> Iterator[str]:
+        """Yields the lines of the output file starting from the first line of the given section until the end of the file (so the
+        caller decides where the section ends).
+        
+        Parameters
+        ----------
+        section
+            Name of the section (one of :attr:`SECTIONS`).
+        occurrence
+            Which occurrence of the section to start from (e.g. the application number minus one for ``'integral_values'``).
+        
+        Returns
+        -------
+            Iterator over the lines (including the line endings)."""
+        with open(self.filename, 'rb') as f:
+            f.seek(int(self.offsets[section][occurrence]))
+            for line in f:
+                yield line.decode()
+
+    def text(self, section: str, occurrence: int=0) -> str:
+        """Returns the text of an occurrence of a section, i.e. from its first line up to the start of the next indexed section 
+        (or the end of the file).
+        
+        Parameters
+        ----------
+        section
+            Name of the section (one of :attr:`SECTIONS`).
+        occurrence
+            Which occurrence of the section to read.
+        
+        Returns
+        -------
+            The text of the section."""
+        start = int(self.offsets[section][occurrence])
+        next_starts = self._section_starts[self._section_starts > start]
+        with open(self.filename, 'rb') as f:
+            f.seek(start)
+            data = f.read(int(next_starts[0]) - start) if len(next_starts) > 0 else f.read()
+        return data.decode()
+
+def _nuclide_reaction_mask(index: np.ndarray, nuclide_reactions: Optional[Dict[str, List[str]]]=None, 
+                           region_integrated: bool=True) -> np.ndarray:
+    """Returns a boolean mask of the rows of a structured profile index (with the fields ``SensitivityTable.INDEX_NAMES``) that
+    match the given nuclide-reactions (see :meth:`LazySdfReader.select`) and, optionally, are region integrated."""
+    mask = np.ones(len(index), dtype=bool)
+    if nuclide_reactions is not None:
+        nuclide_mask = np.zeros(len(index), dtype=bool)
+        for zaid, mts in nuclide_reactions.items():
+            selected = index['zaid'] == str(zaid)
+            if 'all' not in mts:
+                selected &= np.isin(index['reaction_mt'], [ str(mt) for mt in mts ])
+            nuclide_mask |= selected
+        mask &= nuclide_mask
+    if region_integrated:
+        mask &= ( index['zone_number'] == 0 ) & ( index['zone_volume'] == 0 )
+    return mask
+
+def clear_sdf_cache() -> None:
+    """Removes all of the SDF files cached by :class:`RegionIntegratedSdfReader` (see ``config.sdf_cache``)."""
+    _sdf_cache._clear()
+
 def read_covariance_matrix(filename: str):
     pass
 
 def _read_ck_contributions(filename: str):
     pass
 
-def read_uncertainty_contributions_out(filename: Union[str, Path]) -> Tuple[List[dict], List[dict]]:
+# A row of an uncertainty contribution table, e.g. "u-238 n,n'   u-238 elastic   -7.7343E-01 +/- 1.3256E-03". Isotopes may have
+# no mass number (e.g. carbon in ENDF-7.1 libraries)
+_UNCERTAINTY_CONTRIBUTION_ROW = re.compile(
+    r"^[ \t]*([a-z]{1,2}(?:-\d+)?)[ \t]+([A-Za-z0-9,']+)[ \t]+([a-z]{1,2}(?:-\d+)?)[ \t]+([A-Za-z0-9,']+)"
+    r"[ \t]+(\S+)[ \t]+\+/-[ \t]+(\S+)[ \t]*\r?$", re.MULTILINE
+)
+
+def _read_uncertainty_contribution_table(text: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Parses the rows of an uncertainty contribution table (e.g. the ``'uncertainty_contributions'`` section of a
+    :class:`ScaleOutputIndex`).
+    
+    Parameters
+    ----------
+    text
+        Text of the section, starting with the title line of the table.
+    
+    Returns
+    -------
+        The arrays ``(isotopes, reaction_types, contributions, std_devs)``, where the isotopes and reaction types are of the form
+        ``'u-235 - u-238'`` and ``'n,gamma - elastic'``."""
+    # Skip the column headers, which end with a line of dashes
+    position = text.find('\n', text.find('---')) + 1
+    rows = []
+    row = _UNCERTAINTY_CONTRIBUTION_ROW.match(text, position) if position > 0 else None
+    while row is not None:
+        rows.append(row.groups())
+        position = row.end() + 1
+        row = _UNCERTAINTY_CONTRIBUTION_ROW.match(text, position)
+    
+    columns = list(zip(*rows)) if rows else [ () ] * 6
+    isotopes = np.array([ f'{isotope_1} - {isotope_2}' for isotope_1, isotope_2 in zip(columns[0], columns[2]) ], dtype=str)
+    reaction_types = np.array([ f'{reaction_1} - {reaction_2}' for reaction_1, reaction_2 in zip(columns[1], columns[3]) ],
+                              dtype=str)
+    return isotopes, reaction_types, np.array(columns[4], dtype=np.float64), np.array(columns[5], dtype=np.float64)
+
+def _signed_rss_totals(isotopes: np.ndarray, contributions: np.ndarray, std_devs: np.ndarray
+                       ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Sums the nuclide-reaction wise uncertainty contributions of each isotope via :math:`\\sqrt{\\sum_{+} c^2 - \\sum_{-} c^2}`, 
+    where negative contributions (from anticorrelations) are subtracted, and a negative total is reported as 
+    :math:`-\\sqrt{|\\cdot|}`. The uncertainties are propagated linearly (assuming independent contributions), as 
+    :func:`uncertainties.ufloat` arithmetic would, except when the contributions of an isotope cancel exactly, where the square 
+    root of the standard deviation of the squared total is reported (instead of an infinite standard deviation).
+    
+    Returns
+    -------
+        The isotopes (in order of first appearance), their total contributions and the standard deviations of the totals."""
+    unique_isotopes, first, inverse = np.unique(isotopes, return_index=True, return_inverse=True)
+    order = np.argsort(first)
+    inverse = np.argsort(order)[inverse.ravel()]
+
+    signed_squares = np.where(contributions < 0, -contributions**2, contributions**2)
+    variances = ( 2 * contributions * std_devs )**2
+    squared_totals = np.bincount(inverse, weights=signed_squares, minlength=len(order))
+    squared_total_std_devs = np.sqrt(np.bincount(inverse, weights=variances, minlength=len(order)))
+
+    magnitudes = np.sqrt(np.abs(squared_totals))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        total_std_devs = np.where(squared_total_std_devs == 0, 0.0, squared_total_std_devs / ( 2 * magnitudes ))
+    # The linear propagation diverges when the contributions cancel exactly, so the square root of the uncertainty of the 
+    # squared total is reported instead
+    total_std_devs = np.where(( magnitudes == 0 ) & ( squared_total_std_devs != 0 ), np.sqrt(squared_total_std_devs), 
+                              total_std_devs)
+    return unique_isotopes[order], np.sign(squared_totals) * magnitudes, total_std_devs
+
+def _uncertainty_contributions(isotopes: np.ndarray, reaction_types: np.ndarray, contributions: np.ndarray, 
+                               std_devs: np.ndarray, as_arrays: bool=False
+                               ) -> Tuple[Union[List[dict], dict], Union[List[dict], dict]]:
+    """Computes the isotope totals of a parsed uncertainty contribution table, and returns both the totals and the nuclide-reaction
+    wise contributions either as lists of dictionaries (with :func:`uncertainties.ufloat` contributions) or, if ``as_arrays``, as
+    dictionaries of arrays, where ``'contribution'`` is a ``(nominal_values, std_devs)`` tuple."""
+    total_isotopes, totals, total_std_devs = _signed_rss_totals(isotopes, contributions, std_devs)
+    if as_arrays:
+        return { 'isotope': total_isotopes, 'contribution': ( totals, total_std_devs ) }, \
+               { 'isotope': isotopes, 'reaction_type': reaction_types, 'contribution': ( contributions, std_devs ) }
+    
+    isotope_totals = [ { 'isotope': isotope, 'contribution': ufloat(total, std_dev) } for isotope, total, std_dev in 
+                       zip(total_isotopes.tolist(), totals.tolist(), total_std_devs.tolist()) ]
+    isotope_reaction = [ { 'isotope': isotope, 'reaction_type': reaction_type, 'contribution': ufloat(contribution, std_dev) }
+                         for isotope, reaction_type, contribution, std_dev in 
+                         zip(isotopes.tolist(), reaction_types.tolist(), contributions.tolist(), std_devs.tolist()) ]
+    return isotope_totals, isotope_reaction
+
+def read_uncertainty_contributions_out(filename: Union[str, Path], as_arrays: bool=False, 
+                                       index: Optional[ScaleOutputIndex]=None
+                                       ) -> Tuple[Union[List[dict], dict], Union[List[dict], dict]]:
     """Reads the output file from TSUNAMI-3D and returns the uncertainty contributions for each nuclide-reaction
     covariance.
     
@@ -465,80 +1476,33 @@ def read_uncertainty_contributions_out(filename: Union[str, Path]) -> Tuple[List
     ----------
     filename
         Path to the TSUNAMI-3D output file.
+    as_arrays
+        If ``True``, the contributions are returned as dictionaries of arrays (one entry per key below, with 
+        ``'contribution'`` given as a ``(nominal_values, std_devs)`` tuple of float arrays) instead of lists of dictionaries.
+    index
+        A :class:`ScaleOutputIndex` of the output file, e.g. if it is shared with other readers. If ``None`` (default), the file
+        is indexed here.
 
     Returns
     -------
         * isotope_totals
             List of dictionaries with keys: ``'isotope'`` and ``'contribution'``.
         * isotope_reaction
-            List of dictionaries with keys: ``'isotope'``, ``'reaction_type'`` and ``'contribution'``."""
-    with open(filename, 'r') as f:
-        data = f.read()
-
-    # ----------------------------------------------------
-    # Define the formattting that precedes the data table
-    # ----------------------------------------------------
-    table_identifier = Literal("contributions to uncertainty in k-eff (% delta-k/k) by individual energy covariance matrices:")
-    skipped_lines = SkipTo(table_identifier)
-    pre_header = Literal("covariance matrix") + LineEnd()
-    header = Word("nuclide-reaction") + Word("with") + Word("nuclide-reaction") + Word("% delta-k/k due to this matrix")
-    dash_separator = OneOrMore(OneOrMore('-'))
-
-    # ----------------------
-    # Define the data lines
-    # ----------------------
-
-    # Define the grammar for the nuclide-reaction pair
-    atomic_number = Word(nums)
-    element = Word(alphas.lower(), max=2) 
-    isotope_name = Combine(element + Optional('-' + atomic_number)) # To handle the case of carbon in ENDF-7.1 libraries
-    reaction_type = Word(alphanums + ',\'')
-
-    data_line = Group(isotope_name + reaction_type + isotope_name + reaction_type + \
-                pyparsing_common.sci_real + Suppress(Literal("+/-")) + pyparsing_common.sci_real + Suppress(LineEnd()))
-    data_block = OneOrMore(data_line)
-
-    # -------------------------------------------
-    # Define the total parser and parse the data
-    # -------------------------------------------
-    data_parser = Suppress(skipped_lines) + Suppress(table_identifier) + Suppress(pre_header) + Suppress(header) + \
-                    Suppress(dash_separator) + data_block
-
-    # -------------------------------------------------------------------------------
-    # Now convert the data into isotope wise and isotope-reaction wise contributions
-    # -------------------------------------------------------------------------------
-    isotope_reaction = []
-    for match in data_parser.parseString(data):
-        isotope_reaction.append({
-            'isotope': f'{match[0]} - {match[2]}',
-            'reaction_type': f'{match[1]} - {match[3]}',
-            'contribution': ufloat(match[4], match[5])
-        })
-
-    # Now calculate nuclide totals by summing the contributions for each nuclide via total = sqrt((pos)^2 - (neg)^2)
-    isotope_totals = {}
-    for data in isotope_reaction:
-        # First add up squared sums of all reaction-wise contributions
-        isotope = data['isotope']
-        contribution = data['contribution']
-        if isotope not in isotope_totals.keys():
-            isotope_totals[isotope] = ufloat(0,0)
-
-        if contribution < 0:
-            isotope_totals[isotope] -= ( data['contribution'] )**2
-        else:
-            isotope_totals[isotope] += ( data['contribution'] )**2
-        
-    # Now take square root of all contributions
-    for isotope, total in isotope_totals.items():
-        isotope_totals[isotope] = total**0.5
-
-    # Now convert into a list of dictionaries
-    isotope_totals = [ {'isotope': isotope, 'contribution': total} for isotope, total in isotope_totals.items() ]
-
-    return isotope_totals, isotope_reaction
-
-def read_uncertainty_contributions_sdf(filenames: List[Path]) -> Tuple[List[List[dict]], List[List[dict]]]:
+            List of dictionaries with keys: ``'isotope'``, ``'reaction_type'`` and ``'contribution'``.
+            
+    Notes
+    -----
+    The isotope totals are computed from the nuclide-reaction wise contributions via 
+    :math:`\\sqrt{\\sum_{+} c^2 - \\sum_{-} c^2}`, where negative contributions are subtracted. If the total is negative, it is 
+    reported as a negative contribution."""
+    index = ScaleOutputIndex(filename) if index is None else index
+    if len(index.offsets['tsunami_3d_uncertainty_contributions']) == 0:
+        raise ValueError(f"No uncertainty contributions found in the output file {filename}.")
+    table = _read_uncertainty_contribution_table(index.text('tsunami_3d_uncertainty_contributions'))
+    return _uncertainty_contributions(*table, as_arrays=as_arrays)
+
+def read_uncertainty_contributions_sdf(filenames: List[Path], as_arrays: bool=False
+                                       ) -> Tuple[List[Union[List[dict], dict]], List[Union[List[dict], dict]]]:
     """Reads the uncertainty contributions from a list of TSUNAMI-B SDF files and returns the contributions for each nuclide-
     reaction covariance by first running a TSUNAMI-IP calculation to generate the extended uncertainty edit.
     
@@ -546,6 +1510,9 @@ def read_uncertainty_contributions_sdf(filenames: List[Path]) -> Tuple[List[List
     ----------
     filenames
         List of paths to the SDF files.
+    as_arrays
+        If ``True``, the contributions of each SDF file are returned as dictionaries of arrays instead of lists of dictionaries
+        (see :func:`read_uncertainty_contributions_out`).
         
     Returns
     -------
@@ -596,72 +1563,13 @@ def read_uncertainty_contributions_sdf(filenames: List[Path]) -> Tuple[List[List
     # ========================
     # Process the Output File
     # ========================
-    with open(f"{input_filename}.out", 'r') as f:
-        data = f.read()
-    
-    # ----------------------------------------------------
-    # Define the formattting that precedes the data table
-    # ----------------------------------------------------
-    table_identifier = Literal("contributions to uncertainty in keff ( % dk/k ) by individual energy covariance matrices:")
-    pre_header = Literal("covariance matrix") + LineEnd()
-    header = Word("nuclide-reaction") + Word("with") + Word("nuclide-reaction") + Word("% delta-k/k due to this matrix")
-    dash_separator = OneOrMore(OneOrMore('-'))
-
-    # ----------------------
-    # Define the data lines
-    # ----------------------
-
-    # Define the grammar for the nuclide-reaction pair
-    atomic_number = Word(nums)
-    element = Word(alphas.lower(), max=2) 
-    isotope_name = Combine(element + Optional('-' + atomic_number)) # To handle the case of carbon in ENDF-7.1 libraries
-    reaction_type = Word(alphanums + ',\'')
-
-    data_line = Group(isotope_name + reaction_type + isotope_name + reaction_type + \
-                pyparsing_common.sci_real + Suppress(Literal("+/-")) + pyparsing_common.sci_real + Suppress(LineEnd()))
-    data_block = OneOrMore(data_line)
-
-    # -------------------------------------------
-    # Define the total parser and parse the data
-    # -------------------------------------------
-    data_parser = Suppress(table_identifier) + Suppress(pre_header) + Suppress(header) + \
-                    Suppress(dash_separator) + data_block
-
-    # -------------------------------------------------------------------------------
-    # Now convert the data into isotope wise and isotope-reaction wise contributions
-    # -------------------------------------------------------------------------------
-    parsed_data = data_parser.searchString(data)
-    num_sdfs = len(parsed_data)
-    isotope_reaction = [ [] for _ in range(num_sdfs) ]
-    for i, match in enumerate(parsed_data):
-        for data_element in match:
-            isotope_reaction[i].append({
-                'isotope': f'{data_element[0]} - {data_element[2]}',
-                'reaction_type': f'{data_element[1]} - {data_element[3]}',
-                'contribution': ufloat(data_element[4], data_element[5])
-            })
-
-    # Now calculate nuclide totals by summing the contributions for each nuclide via total = sqrt((pos)^2 - (neg)^2)
-    isotope_totals = [ {} for _ in range(num_sdfs) ]
-    for i, application in enumerate(isotope_reaction):
-        for data in application:
-            # First add up squared sums of all reaction-wise contributions
-            isotope = data['isotope']
-            contribution = data['contribution']
-            if isotope not in isotope_totals[i].keys():
-                isotope_totals[i][isotope] = ufloat(0,0)
-
-            if contribution < 0:
-                isotope_totals[i][isotope] -= ( data['contribution'] )**2
-            else:
-                isotope_totals[i][isotope] += ( data['contribution'] )**2
-        
-        # Now take square root of all contributions
-        for isotope, total in isotope_totals[i].items():
-            isotope_totals[i][isotope] = total**0.5 if total > 0 else -(-total)**0.5 # Allow for negative isotope totals
-
-        # Now convert into a list of dictionaries
-        isotope_totals[i] = [ {'isotope': isotope, 'contribution': total} for isotope, total in isotope_totals[i].items() ]
+    index = ScaleOutputIndex(f"{input_filename}.out")
+    isotope_totals, isotope_reaction = [], []
+    for occurrence in range(len(index.offsets['uncertainty_contributions'])):
+        table = _read_uncertainty_contribution_table(index.text('uncertainty_contributions', occurrence))
+        totals, reaction_wise = _uncertainty_contributions(*table, as_arrays=as_arrays)
+        isotope_totals.append(totals)
+        isotope_reaction.append(reaction_wise)
 
     # Remove the temporary input and output files
     os.remove(input_filename)
@@ -669,13 +1577,105 @@ def read_uncertainty_contributions_sdf(filenames: List[Path]) -> Tuple[List[List
 
     return isotope_totals, isotope_reaction
 
-def read_integral_indices(filename: Union[str, Path]) -> Dict[str, unumpy.uarray]:
+_INTEGRAL_INDEX_NAMES = ['c_k', 'E_total', 'E_fission', 'E_capture', 'E_scatter']
+"""Names of the integral indices read from TSUNAMI-IP output files (in the order of the columns of the output tables)."""
+
+_DASHES = re.compile(r"-+")
+
+def _read_integral_value_table(lines: Iterator[str], filename: Union[str, Path]) -> np.ndarray:
+    """Reads an integral value table line by line. The columns of the table are located using the dashed line under the table 
+    header, so that the integral values can be sliced out of each row (without tokenizing the experiment names, which may 
+    contain spaces), and the whole table is converted to floats at once.
+    
+    Parameters
+    ----------
+    lines
+        Lines of the output file, starting at the title of the table (see :meth:`ScaleOutputIndex.lines`).
+    filename
+        Path to the output file (used in error messages).
+    
+    Returns
+    -------
+        The integral values of each experiment, shape ``(num_experiments, 10)``, with the nominal values and standard deviations
+        of the integral indices (ordered as ``_INTEGRAL_INDEX_NAMES``) alternating."""
+    state = 'header'
+    rows = []
+    for line in lines:
+        if state == 'header':
+            if line.split()[:1] == ['Experiment']:
+                state = 'columns'
+        elif state == 'columns':
+            # The integral values are right aligned in the last ten columns, so each field extends from the end of the 
+            # previous column to the end of its own
+            column_ends = [ dashes.end() for dashes in _DASHES.finditer(line) ][-11:]
+            if len(column_ends) != 11:
+                raise ValueError(f"Unexpected integral value table format in {filename}")
+            fields = list(zip(column_ends[:-1], column_ends[1:]))
+            state = 'first_row'
+        elif state == 'first_row':
+            # The first row (experiment 0) is a repeat of the application itself
+            state = 'rows'
+        elif line.strip():
+            rows.append([ line[start:end].strip() or '0' for start, end in fields ])
+        else:
+            break
+    
+    if state != 'rows':
+        raise ValueError(f"The output file {filename} ended before the end of an integral value table")
+    return np.array(rows, dtype=np.float64).reshape(-1, 10)
+
+def _read_integral_indices_fast(filename: Union[str, Path], index: Optional[ScaleOutputIndex]=None
+                                ) -> Tuple[np.ndarray, np.ndarray]:
+    """Reads the integral value tables of a TSUNAMI-IP output file, jumping directly to each table with a 
+    :class:`ScaleOutputIndex` and reading it line by line into a preallocated array.
+    
+    Parameters
+    ----------
+    filename
+        Path to the TSUNAMI-IP output file.
+    index
+        Index of the output file. If ``None``, the file is indexed here.
+    
+    Returns
+    -------
+    nominal_values
+        Nominal values of the integral indices, shape ``(num_applications, num_experiments, 5)``, where the last axis is ordered 
+        as ``_INTEGRAL_INDEX_NAMES``.
+    std_devs
+        Standard deviations of the integral indices (same shape as ``nominal_values``)."""
+    index = ScaleOutputIndex(filename) if index is None else index
+    num_applications = len(index.offsets['integral_values'])
+    if num_applications == 0:
+        raise ValueError("No integral values found in the output file. Please ensure that the output/TSUNAMI-IP input files are "
+                         "formatted correctly.")
+
+    values = None # Shape (num_applications, num_experiments, 10), alternating nominal values and standard deviations
+    for application in range(num_applications):
+        table = _read_integral_value_table(index.lines('integral_values', application), filename)
+        if values is None:
+            values = np.empty((num_applications, len(table), 10))
+        if table.shape[0] != values.shape[1]:
+            raise ValueError(f"The integral value tables in {filename} do not all have the same number of experiments")
+        values[application] = table
+    return values[:, :, 0::2], values[:, :, 1::2]
+
+def read_integral_indices(filename: Union[str, Path], engine: str='fast', as_arrays: bool=False, 
+                          index: Optional[ScaleOutputIndex]=None) -> Dict[str, Union[unumpy.uarray, Tuple[np.ndarray, np.ndarray]]]:
     """Reads the output file from TSUNAMI-IP and returns the integral values for each application.
 
     Parameters
     ----------
     filename
         Path to the TSUNAMI-IP output file.
+    engine
+        The parsing engine to use. ``'fast'`` (default) jumps to each integral value table using a :class:`ScaleOutputIndex`, 
+        reads it line by line and writes the integral values directly into float arrays, while ``'pyparsing'`` uses the original pyparsing grammar.
+    as_arrays
+        If ``True``, the integral indices are returned as plain ``(nominal_values, std_devs)`` tuples of float arrays instead of
+        arrays of :func:`uncertainties.ufloat` objects, which avoids creating a ufloat for every application-experiment pair.
+    index
+        A :class:`ScaleOutputIndex` of the output file (only used by the ``'fast'`` engine), e.g. if it is shared with other
+        readers. If ``None`` (default), the file is indexed here.
     
     Returns
     -------
@@ -754,6 +1754,14 @@ def read_integral_indices(filename: Union[str, Path]) -> Dict[str, unumpy.uarray
     >>> application_1_with_experiment_2_ck = integral_indices['c_k'][0, 1]
     >>> application_1_with_experiment_2_ck
     0.9986+/-0.0024"""
+    if engine == 'fast':
+        nominal_values, std_devs = _read_integral_indices_fast(filename, index)
+        if as_arrays:
+            return { name: ( nominal_values[:, :, i], std_devs[:, :, i] ) for i, name in enumerate(_INTEGRAL_INDEX_NAMES) }
+        return { name: unumpy.uarray(nominal_values[:, :, i], std_devs[:, :, i]) \
+                 for i, name in enumerate(_INTEGRAL_INDEX_NAMES) }
+    elif engine != 'pyparsing':
+        raise ValueError(f"Invalid engine '{engine}'. The engine must be either 'fast' or 'pyparsing'.")
 
     with open(filename, 'r') as f:
         data = f.read()
@@ -822,8 +1830,113 @@ def read_integral_indices(filename: Union[str, Path]) -> Dict[str, unumpy.uarray
         "E_scatter": E_scatter.transpose()
     })
 
+    if as_arrays:
+        return { name: ( unumpy.nominal_values(matrix), unumpy.std_devs(matrix) ) for name, matrix in integral_matrices.items() }
     return integral_matrices
 
+_H5_INTEGRATED_NAMES = ['values_sum', 'values_sigma', 'values_abs_sum', 'values_osc_sum', 'values_osc_sigma']
+"""Datasets of a HDF5 formatted SDF file corresponding to ``SensitivityTable.INTEGRATED_NAMES``."""
+
+def _isotope_name(zaid: int) -> str:
+    """Reconstructs the isotope name used in TSUNAMI-B SDF files (e.g. ``'u-235'``, or ``'c'`` for natural carbon) from a ZAID."""
+    metastable, za = divmod(zaid, 1000000)
+    atomic_number, mass_number = divmod(za, 1000)
+    symbol = _ELEMENT_SYMBOLS[atomic_number - 1] if 0 < atomic_number <= len(_ELEMENT_SYMBOLS) else str(atomic_number)
+    return symbol if mass_number == 0 else f"{symbol}-{mass_number}{'m' if metastable else ''}"
+
+def read_h5_sensitivity_table(filename: Union[str, Path], nuclide_reactions: Optional[Dict[str, List[str]]]=None, 
+                              region_integrated: bool=True) -> SensitivityTable:
+    """Reads the sensitivity profiles from a HDF5 (``.h5``) formatted TSUNAMI-B sdf file into a :class:`SensitivityTable`. 
+    Only the (small) descriptive datasets are read in full, the groupwise data of the requested profiles is then read with a 
+    single slice of each dataset.
+    
+    Parameters
+    ----------
+    filename
+        Path to the .h5 SDF file (e.g. ``my_model.sdf.h5``)
+    nuclide_reactions
+        Dictionary keyed by nuclide ZAID with a list of the reaction MTs to read for each nuclide. A list of ``'all'`` reads all
+        reactions of a nuclide. If ``None`` (default), all nuclide-reactions are read.
+    region_integrated
+        Whether to only read the region integrated profiles (i.e. with ``unit == 0`` and ``region == 0``). Default is ``True``.
+        
+    Returns
+    -------
+        The requested profiles. Since HDF5 SDF files do not store the isotope and reaction names, these are reconstructed from
+        the ZAIDs and MTs.
+        
+    Examples
+    --------
+    >>> table = read_h5_sensitivity_table('tests/example_files/sphere_model_1.sdf.h5', {'92235': ['18', '452']})
+    >>> table.index['isotope'], table.index['reaction_type']
+    (array(['u-235', 'u-235'], dtype='<U5'), array(['fission', 'nubar'], dtype='<U7'))
+    >>> text_table = RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table
+    >>> np.array_equal(table.values, text_table.select(zaids=['92235'], mts=['18', '452']).values)
+    True
+    """
+    with h5py.File(filename, 'r') as f:
+        zaids, mts = f['nuclide_id'][:], f['mt'][:]
+        unique_zaids, zaid_rows = np.unique(zaids, return_inverse=True)
+        isotopes = np.array([ _isotope_name(int(zaid)) for zaid in unique_zaids ], dtype=str)[zaid_rows.ravel()] \
+                   if len(zaids) > 0 else []
+        reaction_types = [ _REACTION_NAMES.get(int(mt), '') for mt in mts ]
+        index = SensitivityTable.from_columns(np.empty((len(zaids), 0)), np.empty((len(zaids), 0)), 
+                                              isotope=isotopes, reaction_type=reaction_types, zaid=zaids.astype(str), 
+                                              reaction_mt=mts.astype(str), zone_number=f['unit'][:].astype(np.int64), 
+                                              zone_volume=f['region'][:].astype(np.int64)).index
+        rows = np.flatnonzero(_nuclide_reaction_mask(index, nuclide_reactions, region_integrated))
+
+        # Use a plain slice when the requested rows are contiguous (e.g. the region integrated profiles, which come first), 
+        # since this is much faster than a point selection
+        if len(rows) == 0 or rows[-1] - rows[0] + 1 == len(rows):
+            selection = slice(rows[0], rows[-1] + 1) if len(rows) > 0 else slice(0, 0)
+        else:
+            selection = rows
+        values = f['profile_values'][selection]
+        sigmas = f['profile_sigmas'][selection]
+        integrated_values = np.column_stack([ f[name][selection] for name in _H5_INTEGRATED_NAMES ]) \
+                            if all( name in f for name in _H5_INTEGRATED_NAMES ) else None
+
+    # NOTE: The sensitivities are stored from largest to smallest energy group, so they are reversed to correspond to the
+    # cross section values
+    return SensitivityTable(values[:, ::-1], sigmas[:, ::-1], index[rows], integrated_values)
+
+def read_h5_sdfs(filenames: Union[str, Path, List[str], List[Path]], nuclide_reactions: Optional[Dict[str, List[str]]]=None,
+                 region_integrated: bool=True, sparse: bool=False, registry: Optional[FeatureRegistry]=None
+                 ) -> SensitivityStack:
+    """Reads the sensitivity profiles from many HDF5 (``.h5``) formatted TSUNAMI-B sdf files into a single
+    :class:`SensitivityStack`.
+    
+    Parameters
+    ----------
+    filenames
+        Paths to the .h5 SDF files, or a directory, in which case all ``.h5`` files in the directory are read (in sorted order).
+    nuclide_reactions
+        Nuclide-reactions to read (see :func:`read_h5_sensitivity_table`). If ``None`` (default), all nuclide-reactions are read.
+    region_integrated
+        Whether to only read the region integrated profiles. Default is ``True``.
+    sparse
+        Whether to store the stacked profiles sparsely (see :class:`SensitivityStack`). Default is ``False``.
+    registry
+        Feature registry to align the profiles with (see :class:`SensitivityStack`).
+        
+    Returns
+    -------
+        The aligned and stacked profiles of all of the files.
+        
+    Examples
+    --------
+    >>> stack = read_h5_sdfs('tests/example_files')
+    >>> stack.filenames
+    [PosixPath('tests/example_files/sphere_model_1.sdf.h5')]
+    >>> stack.values.shape
+    (1, 27, 252)
+    """
+    if isinstance(filenames, (str, Path)) and Path(filenames).is_dir():
+        filenames = sorted(Path(filenames).glob('*.h5'))
+    tables = [ read_h5_sensitivity_table(filename, nuclide_reactions, region_integrated) for filename in filenames ]
+    return SensitivityStack(tables, filenames, sparse, registry)
+
 def read_region_integrated_h5_sdf(filename: Union[str, Path]) -> Dict[str, unumpy.uarray]:
     """Reads all region integrated SDFs from a HDF5 (``.h5``) formatted TSUNAMI-B sdf file and returns a dictionary of 
     the data
@@ -854,17 +1967,231 @@ def read_region_integrated_h5_sdf(filename: Union[str, Path]) -> Dict[str, unump
     
         tao convert *.sdf
     """
-    with h5py.File(filename, 'r') as f:
-        # Get the region integrated sdf's, i.e. where unit=0
-        region_integrated_indices = np.where(f['unit'][:] == 0)[0]
-        mts = f['mt'][region_integrated_indices]
-        zaids = f['nuclide_id'][region_integrated_indices]
-        sensitivities = f['profile_values'][region_integrated_indices, :]
-        uncertainties = f['profile_sigmas'][region_integrated_indices, :]
-
-        # Now convert the data into a dictionary
-        unique_zaids = set(zaids)
-        sdf_data = {str(zaid): {} for zaid in unique_zaids}
-        for index in region_integrated_indices:
-            sdf_data[str(zaids[index])][str(mts[index])] = unumpy.uarray(sensitivities[index][::-1], uncertainties[index][::-1])
-    return sdf_data
\ No newline at end of file
+    table = read_h5_sensitivity_table(filename)
+    sdf_data = {}
+    for row, (zaid, mt) in enumerate(zip(table.index['zaid'].tolist(), table.index['reaction_mt'].tolist())):
+        sdf_data.setdefault(zaid, {})[mt] = table.uarray(row)
+    return sdf_data
+
+def _apply_config(settings: Dict[str, Any]) -> None:
+    """Initializer of the worker processes of :func:`read_sdfs`, which applies the configuration of the calling process (each 
+    worker process has its own ``config``)."""
+    for name, value in settings.items():
+        setattr(config, name, value)
+
+def _read_sdf_or_h5(filename: Union[str, Path], engine: str, cache: bool, cache_settings: Dict[str, Any]
+                    ) -> Union[RegionIntegratedSdfReader, Dict[str, Dict[str, unumpy.uarray]]]:
+    """Reads a single ``.sdf`` file with :class:`RegionIntegratedSdfReader` or ``.h5`` file with 
+    :func:`read_region_integrated_h5_sdf` (used by the workers of :func:`read_sdfs`). ``cache_settings`` are the SDF cache 
+    settings of the calling process (``cache_dir`` and ``sdf_cache_max_size``), which are passed to the reader explicitly."""
+    if Path(filename).suffix == '.h5':
+        return read_region_integrated_h5_sdf(filename)
+    elif Path(filename).suffix == '.sdf':
+        return RegionIntegratedSdfReader(filename, engine=engine, cache=cache, **cache_settings)
+    else:
+        raise ValueError(f"The file {filename} must be either an sdf or h5 file.")
+
+def read_sdfs(filenames: Union[List[str], List[Path]], workers: Optional[int]=None, executor: str='process', 
+              stream: bool=False, engine: str='fast', cache: Optional[bool]=None
+              ) -> Union[List[Union[RegionIntegratedSdfReader, Dict[str, Dict[str, unumpy.uarray]], Exception]], 
+                         Iterator[Union[RegionIntegratedSdfReader, Dict[str, Dict[str, unumpy.uarray]], Exception]]]:
+    """Reads many region integrated ``.sdf`` and ``.sdf.h5`` files concurrently.
+    
+    Parameters
+    ----------
+    filenames
+        Paths to the ``.sdf`` and/or ``.h5`` files (any iterable of paths).
+    workers
+        Number of worker processes (or threads) to use. Default is ``None``, which uses the number of available cores.
+    executor
+        Either ``'process'`` (default), which parses the files in a pool of worker processes, or ``'thread'``, which uses a pool
+        of threads. Threads avoid the cost of sending the parsed data between processes, but only parse in parallel when the
+        work releases the GIL (e.g. when reading cached or ``.h5`` files).
+    stream
+        If ``True``, a generator is returned which yields the results (in input order) as they become available instead of
+        waiting for all files to be read.
+    engine
+        The parsing engine used for ``.sdf`` files, one of ``SDF_ENGINES`` (default is ``'fast'``).
+    cache
+        Whether to use the on-disk SDF cache for ``.sdf`` files. Default is ``None``, which uses ``config.sdf_cache``.
+    
+    Returns
+    -------
+        The result for each file, in the same order as ``filenames``. ``.sdf`` files are read with 
+        :class:`RegionIntegratedSdfReader` and ``.h5`` files with :func:`read_region_integrated_h5_sdf`. If reading a file fails,
+        the exception raised is returned in its place so that one bad file does not abort the whole batch.
+        
+    Examples
+    --------
+    >>> filenames = ['tests/example_files/sphere_model_1.sdf', 'tests/example_files/sphere_model_1.sdf.h5', 'missing.sdf']
+    >>> results = read_sdfs(filenames, workers=2, executor='thread')
+    >>> results[0]
+    <tsunami_ip_utils.readers.RegionIntegratedSdfReader object from tests/example_files/sphere_model_1.sdf>
+    >>> sorted(results[1].keys())
+    ['92234', '92235', '92238']
+    >>> results[2]
+    FileNotFoundError(2, 'No such file or directory')
+    """
+    if executor == 'process':
+        pool_class = ProcessPoolExecutor
+    elif executor == 'thread':
+        pool_class = ThreadPoolExecutor
+    else:
+        raise ValueError(f"Invalid executor '{executor}'. The executor must be either 'process' or 'thread'.")
+    
+    # Resolve the cache settings here, since worker processes may not share the configuration of this process
+    cache = config.sdf_cache if cache is None else cache
+    cache_settings = { 'cache_dir': config.cache_dir, 'sdf_cache_max_size': config.sdf_cache_max_size }
+    filenames = list(filenames)
+    workers = min(workers or os.cpu_count() or 1, max(len(filenames), 1))
+
+    def _results() -> Iterator[Union[RegionIntegratedSdfReader, Dict[str, Dict[str, unumpy.uarray]], Exception]]:
+        pool_arguments = { 'initializer': _apply_config, 'initargs': (cache_settings,) } if executor == 'process' else {}
+        with pool_class(max_workers=workers, **pool_arguments) as pool:
+            futures = [ pool.submit(_read_sdf_or_h5, filename, engine, cache, cache_settings) for filename in filenames ]
+            for future in futures:
+                try:
+                    yield future.result()
+                except Exception as exception:
+                    yield exception
+
+    return _results() if stream else list(_results())
+
+def write_h5_sdf(filename: Union[str, Path], h5_filename: Optional[Union[str, Path]]=None, compression: Optional[str]='gzip', 
+                 compression_level: int=4) -> Path:
+    """Converts a TSUNAMI-B formatted ``.sdf`` file to a HDF5 (``.h5``) formatted sdf file, using the same layout as the SCALE
+    utility `tao <https://scale-manual.ornl.gov/tsunami-ip-appAB.html#format-of-hdf5-based-sensitivity-data-file>`_, so that
+    the converted file can be read with :func:`read_region_integrated_h5_sdf` or :func:`read_h5_sensitivity_table`.
+    
+    Parameters
+    ----------
+    filename
+        Path to the sdf file.
+    h5_filename
+        Path of the HDF5 file to write. Default is ``None``, which appends ``.h5`` to ``filename`` (as ``tao`` does).
+    compression
+        Compression filter used for the groupwise datasets (any filter supported by h5py, e.g. ``'gzip'`` or ``'lzf'``), or 
+        ``None`` for no compression. Default is ``'gzip'``.
+    compression_level
+        Compression level used with the ``'gzip'`` filter. Default is ``4``.
+        
+    Returns
+    -------
+        Path to the written HDF5 file.
+        
+    Notes
+    -----
+    All profiles in the file are converted, including the profiles of each zone and those of natural (elemental) nuclides, which
+    are not read by :class:`RegionIntegratedSdfReader`. The groupwise datasets are chunked by profile, so reading a subset of 
+    the profiles only decompresses the chunks containing them.
+        
+    Examples
+    --------
+    >>> from tempfile import TemporaryDirectory
+    >>> with TemporaryDirectory() as directory:
+    ...     h5_filename = write_h5_sdf('tests/example_files/sphere_model_1.sdf', f'{directory}/sphere_model_1.sdf.h5')
+    ...     table = read_h5_sensitivity_table(h5_filename)
+    >>> text_table = RegionIntegratedSdfReader('tests/example_files/sphere_model_1.sdf').table
+    >>> np.array_equal(table.index, text_table.index), np.array_equal(table.values, text_table.values)
+    (True, True)
+    """
+    h5_filename = Path(f'{filename}.h5') if h5_filename is None else Path(h5_filename)
+    energy_boundaries, table = SdfReader._read_sdf_table(filename, natural_isotopes=True)
+    with open(filename, 'r') as f:
+        header = ''.join( f.readline() for _ in range(4) )
+        constrained_chi = 'chi sensitivities are constrained' in f.read()
+
+    profile_counts_match = _SDF_PROFILE_COUNTS.search(header)
+    reference_match = _SDF_REFERENCE.search(header)
+    if profile_counts_match is None or reference_match is None:
+        raise ValueError(f"The file {filename} does not appear to be a TSUNAMI-B formatted SDF file.")
+    reference_comment = reference_match.group(3)
+
+    num_profiles = len(table)
+    compression_opts = compression_level if compression == 'gzip' else None
+    chunks = ( max(min(num_profiles, 32), 1), max(table.num_groups, 1) )
+    with h5py.File(h5_filename, 'w') as f:
+        f.attrs['file_type'] = np.bytes_('SDF_ARCHIVE')
+        f.attrs['file_version'] = np.bytes_('1.0.0')
+        f.attrs['title'] = np.bytes_(header.splitlines()[0].strip())
+        f.attrs['sdf_type'] = np.bytes_('MonteCarlo')
+        f.attrs['constrained_chi'] = np.bool_(constrained_chi)
+        f.attrs['list_energies'] = energy_boundaries
+        f.attrs['number_neutron_groups'] = np.uint64(table.num_groups)
+        f.attrs['number_profiles'] = np.uint64(num_profiles)
+        f.attrs['number_region_integrated'] = np.uint64(profile_counts_match.group(2))
+        f.attrs['reference_value'] = np.float64(reference_match.group(1))
+        f.attrs['reference_sigma'] = np.float64(reference_match.group(2))
+        f.attrs['reference_comment'] = np.bytes_(reference_comment)
+        f.attrs['reference_quantity'] = np.bytes_('keff' if 'k-eff' in reference_comment else reference_comment.split()[0])
+
+        # NOTE: The groupwise data is stored from largest to smallest energy group, as in the text format
+        for name, data in [('profile_values', table.values[:, ::-1]), ('profile_sigmas', table.sigmas[:, ::-1])]:
+            f.create_dataset(name, data=data, chunks=chunks, compression=compression, compression_opts=compression_opts,
+                             shuffle=compression is not None)
+        for name, column in zip(_H5_INTEGRATED_NAMES, table.integrated_values.T):
+            f.create_dataset(name, data=column)
+        f.create_dataset('nuclide_id', data=table.index['zaid'].astype(np.int32))
+        f.create_dataset('mt', data=table.index['reaction_mt'].astype(np.int32))
+        f.create_dataset('unit', data=table.index['zone_number'].astype(np.int32))
+        f.create_dataset('region', data=table.index['zone_volume'].astype(np.int32))
+        f.create_dataset('material', data=np.zeros(num_profiles, dtype=np.int32))
+        f.create_dataset('region_uses', data=np.zeros(num_profiles, dtype=np.int32))
+        f.create_dataset('volume', data=np.zeros(num_profiles))
+        f.create_dataset('comment', data=np.full(num_profiles, b'', dtype=object), dtype=h5py.string_dtype('ascii'))
+    return h5_filename
+
+def convert_sdfs_to_h5(filenames: Union[str, Path, List[str], List[Path]], output_directory: Optional[Union[str, Path]]=None,
+                       workers: Optional[int]=None, compression: Optional[str]='gzip', compression_level: int=4
+                       ) -> List[Union[Path, Exception]]:
+    """Converts many TSUNAMI-B formatted ``.sdf`` files to HDF5 formatted sdf files (see :func:`write_h5_sdf`) in parallel.
+    
+    Parameters
+    ----------
+    filenames
+        Paths to the sdf files, or a directory, in which case all ``.sdf`` files in the directory are converted.
+    output_directory
+        Directory to write the HDF5 files to (created if it does not exist). Default is ``None``, which writes each HDF5 file
+        next to its sdf file.
+    workers
+        Number of worker processes to use. Default is ``None``, which uses the number of available cores.
+    compression
+        Compression filter used for the groupwise datasets (see :func:`write_h5_sdf`).
+    compression_level
+        Compression level used with the ``'gzip'`` filter.
+        
+    Returns
+    -------
+        Path of the HDF5 file written for each sdf file (in the same order as ``filenames``). If converting a file fails, the 
+        exception raised is returned in its place so that one bad file does not abort the whole batch.
+        
+    Examples
+    --------
+    >>> from tempfile import TemporaryDirectory
+    >>> with TemporaryDirectory() as directory:
+    ...     h5_filenames = convert_sdfs_to_h5('tests/example_files', directory, workers=1)
+    ...     stack = read_h5_sdfs(directory)
+    >>> [ h5_filename.name for h5_filename in h5_filenames ]
+    ['sphere_model_1.sdf.h5']
+    >>> stack.values.shape
+    (1, 27, 252)
+    """
+    if isinstance(filenames, (str, Path)) and Path(filenames).is_dir():
+        filenames = sorted(Path(filenames).glob('*.sdf'))
+    if output_directory is not None:
+        Path(output_directory).mkdir(parents=True, exist_ok=True)
+        h5_filenames = [ Path(output_directory) / f'{Path(filename).name}.h5' for filename in filenames ]
+    else:
+        h5_filenames = [ None ] * len(filenames)
+
+    workers = min(workers or os.cpu_count() or 1, max(len(filenames), 1))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [ pool.submit(write_h5_sdf, filename, h5_filename, compression, compression_level) 
+                    for filename, h5_filename in zip(filenames, h5_filenames) ]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as exception:
+                results.append(exception)
+    return results
@@ -4,11 +4,12 @@ from uncertainties import ufloat
 from pathlib import Path
 from typing import Callable
 import functools
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Tuple
 import tempfile
 from string import Template
 import subprocess
 from tsunami_ip_utils.readers import read_integral_indices
+from tsunami_ip_utils._sdf_cache import _content_hash
 import os
 
 def _isotope_reaction_list_to_nested_dict(isotope_reaction_list, field_of_interest):
@@ -105,6 +106,48 @@ def _convert_paths(func: Callable) -> Callable:
     
     return wrapper
 
+def _unique_systems(filenames: Union[List[str], List[Path]]) -> Tuple[List[Union[str, Path]], np.ndarray, List[str]]:
+    """Finds the distinct systems among the given files by the hash of their contents, so that a system that appears more than
+    once (e.g. in both the application and experiment lists, or as copies of the same file) only has to be read and processed
+    once. Each distinct path is only hashed once.
+    
+    Parameters
+    ----------
+    filenames
+        Paths to the (e.g. sdf) files of each system.
+    
+    Returns
+    -------
+    unique_filenames
+        The first file of each distinct system, in order of first appearance.
+    inverse
+        Integer array with the position in ``unique_filenames`` of the system of each file, so that 
+        ``unique_filenames[inverse[i]]`` has the same contents as ``filenames[i]``.
+    hashes
+        The content hash of each file.
+        
+    Examples
+    --------
+    >>> filenames = ['tests/example_files/sphere_model_1.sdf', 'examples/data/example_sdfs/u235-dummy/sphere_model_1.sdf',
+    ...              './tests/example_files/sphere_model_1.sdf']
+    >>> unique_filenames, inverse, _ = _unique_systems(filenames)
+    >>> unique_filenames, inverse
+    (['tests/example_files/sphere_model_1.sdf', 'examples/data/example_sdfs/u235-dummy/sphere_model_1.sdf'], array([0, 1, 0]))
+    """
+    path_hashes = {}
+    for filename in filenames:
+        if os.path.abspath(filename) not in path_hashes:
+            path_hashes[os.path.abspath(filename)] = _content_hash(filename)
+    hashes = [ path_hashes[os.path.abspath(filename)] for filename in filenames ]
+
+    positions, unique_filenames = {}, []
+    for filename, content_hash in zip(filenames, hashes):
+        if content_hash not in positions:
+            positions[content_hash] = len(unique_filenames)
+            unique_filenames.append(filename)
+    inverse = np.array([ positions[content_hash] for content_hash in hashes ], dtype=np.int64)
+    return unique_filenames, inverse, hashes
+
 @_convert_paths
 def _run_and_read_TSUNAMI_IP(application_filenames: Union[List[str], List[Path]], 
                             experiment_filenames: Union[List[str], List[Path]], coverx_library: str):